@@ -0,0 +1,43 @@
+"""Compares two benchmark reports from benchmarks.run.
+
+    python -m benchmarks.compare before.json after.json
+
+Every numeric measurement present in both reports is printed with its
+relative change. Configuration keys (assumptions, concurrency, rows, results)
+identify each row rather than being compared.
+"""
+import json
+import sys
+from typing import Dict, Tuple
+
+KEY_FIELDS = ("assumptions", "concurrency", "rows", "results")
+
+def flatten(report: Dict) -> Dict[Tuple[str, str, str], float]:
+    """Maps (suite, configuration, metric) to value for every measurement in a report."""
+    values = {}
+    for suite, runs in report.get("results", {}).items():
+        for run in runs:
+            config = ",".join(f"{k}={run[k]}" for k in KEY_FIELDS if k in run)
+            for metric, value in run.items():
+                if metric not in KEY_FIELDS and isinstance(value, (int, float)):
+                    values[(suite, config, metric)] = value
+    return values
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    with open(argv[0], encoding="utf-8") as f:
+        before = json.load(f)
+    with open(argv[1], encoding="utf-8") as f:
+        after = json.load(f)
+    old, new = flatten(before), flatten(after)
+    print(f"{'suite':<16} {'configuration':<28} {'metric':<28} {before.get('commit') or 'before':>12} {after.get('commit') or 'after':>12} {'change':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        change = f"{(new[key] - old[key]) / old[key] * 100:+.1f}%" if old[key] else "n/a"
+        print(f"{key[0]:<16} {key[1]:<28} {key[2]:<28} {old[key]:>12g} {new[key]:>12g} {change:>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
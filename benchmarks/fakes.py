@@ -0,0 +1,104 @@
+"""Deterministic, offline stand-ins for ChatGoogleGenerativeAI and DDGS.
+
+Both accept the same constructor and call signatures the application uses,
+sleep for a configurable latency and return responses of a configurable size,
+so benchmarks exercise the real pipeline without network access or API keys.
+"""
+import hashlib
+import json
+import re
+import time
+from typing import Dict, Iterator, List
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+FILLER = ("the record shows that this statement is consistent with published sources and official data "
+          "collected over several years by independent researchers and public agencies").split()
+
+def _filler(seed: str, words: int) -> str:
+    """Returns `words` words of deterministic filler text that starts with the seed's words."""
+    seed_words = seed.split()
+    body = [FILLER[i % len(FILLER)] for i in range(max(0, words - len(seed_words)))]
+    return " ".join(seed_words + body) + "."
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+
+class FakeChatModel:
+    """Answers each prompt in prompts.yaml with a plausible, fixed-shape response.
+
+    assumptions controls how many assumptions the extraction prompt returns;
+    response_words the length of free-text answers.
+    """
+
+    def __init__(self, latency: float = 0.05, response_words: int = 60, assumptions: int = 4, **_llm_kwargs):
+        self.latency = latency
+        self.response_words = response_words
+        self.assumptions = assumptions
+
+    def _respond(self, prompt: str) -> str:
+        tail = prompt.rstrip()
+        if tail.endswith("Category:"):
+            return "Factual"
+        if tail.endswith("Initial Response:"):
+            claim = re.search(r"Claim: (.*)", prompt).group(1)
+            return _filler(f"Regarding {claim}:", self.response_words)
+        if tail.endswith("Assumptions:"):
+            key = _digest(prompt)
+            return "\n".join(f"- Assumption {i + 1} of claim {key} holds" for i in range(self.assumptions))
+        if tail.endswith("Reason:"):
+            return _filler("True -", self.response_words // 3)
+        if tail.endswith("JSON:"):
+            if '"verdict"' in prompt:
+                count = len(re.findall(r"^\d+\. ", prompt, re.MULTILINE))
+                return json.dumps([{"index": i + 1, "verdict": "True", "reason": _filler("Consistent with sources", 10)} for i in range(count)])
+            count = len(re.findall(r"^Assumption \d+: ", prompt, re.MULTILINE))
+            return json.dumps([{"index": i + 1, "evidence": _filler("Evidence", self.response_words // 2)} for i in range(count)])
+        if tail.endswith("Final Answer:"):
+            return _filler("True.", self.response_words)
+        # Evidence extraction and search result summaries.
+        return _filler("Evidence:", self.response_words // 2)
+
+    def _usage(self, prompt: str, response: str) -> Dict[str, int]:
+        input_tokens, output_tokens = len(prompt) // 4 + 1, len(response) // 4 + 1
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    @staticmethod
+    def _prompt_text(messages) -> str:
+        return "\n".join(getattr(m, "content", str(m)) for m in messages)
+
+    def invoke(self, messages, **_kwargs) -> AIMessage:
+        prompt = self._prompt_text(messages)
+        time.sleep(self.latency)
+        response = self._respond(prompt)
+        return AIMessage(content=response, usage_metadata=self._usage(prompt, response))
+
+    def stream(self, messages, **_kwargs) -> Iterator[AIMessageChunk]:
+        prompt = self._prompt_text(messages)
+        time.sleep(self.latency)
+        response = self._respond(prompt)
+        words = response.split(" ")
+        for start in range(0, len(words), 8):
+            yield AIMessageChunk(content=" ".join(words[start:start + 8]) + " ")
+        yield AIMessageChunk(content="", usage_metadata=self._usage(prompt, response))
+
+class FakeDDGS:
+    """Returns max_results results per query; every third result links to a page shared by all queries,
+    so the cross-assumption deduplication has realistic work to do."""
+
+    def __init__(self, latency: float = 0.03, snippet_words: int = 40, **_kwargs):
+        self.latency = latency
+        self.snippet_words = snippet_words
+
+    def text(self, keywords: str, max_results: int = 10, **_kwargs) -> List[Dict]:
+        time.sleep(self.latency)
+        key = _digest(keywords)
+        results = []
+        for i in range(max_results):
+            shared = i % 3 == 2
+            href = f"https://shared.example.org/page/{i}" if shared else f"https://example.com/{key}/{i}"
+            results.append({
+                "title": f"Result {i} for {keywords}",
+                "href": href,
+                "body": _filler(keywords.replace(" fact check", ""), self.snippet_words),
+            })
+        return results
@@ -0,0 +1,263 @@
+"""Offline performance benchmarks.
+
+Runs the real pipeline and database code against the fakes in
+benchmarks/fakes.py and prints (or writes) the measurements as JSON, so runs
+on different commits can be compared with benchmarks/compare.py:
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --suites db --rows 10000,100000,1000000
+"""
+import argparse
+import contextlib
+import functools
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List
+from unittest import mock
+
+from benchmarks.fakes import FakeChatModel, FakeDDGS
+from config.settings import settings
+import src.database as database
+from src.clients import reset_clients
+from src.resilience import reset_backends
+from src.search_tools import SearchTools
+
+logger = logging.getLogger(__name__)
+SUITES = ("pipeline", "db", "process_results", "startup")
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+@contextlib.contextmanager
+def offline_environment(workdir: str, llm_latency: float = 0.05, search_latency: float = 0.03,
+                        response_words: int = 60, snippet_words: int = 40, assumptions: int = 4) -> Iterator[None]:
+    """Points every cache and database at workdir and swaps the Gemini and DuckDuckGo clients for fakes.
+
+    The LLM cache is disabled and client-side rate limits are lifted, so each
+    run measures the pipeline itself rather than cache hits or throttling.
+    """
+    fake_llm = functools.partial(FakeChatModel, latency=llm_latency, response_words=response_words, assumptions=assumptions)
+    fake_ddgs = functools.partial(FakeDDGS, latency=search_latency, snippet_words=snippet_words)
+    overrides = {
+        "SEARCH_CACHE_FILE": str(Path(workdir) / "search_cache.db"),
+        "LLM_CACHE_FILE": str(Path(workdir) / "llm_cache.db"),
+        "LLM_CACHE_ENABLED": False,
+        "GEMINI_REQUESTS_PER_MINUTE": 1e9,
+        "GEMINI_MAX_CONCURRENCY": 1024,
+        "SEARCH_REQUESTS_PER_MINUTE": 1e9,
+        "SEARCH_MAX_CONCURRENCY": 1024,
+        "METRICS_FILE": "",
+        "METRICS_PORT": 0,
+    }
+    with contextlib.ExitStack() as stack:
+        for name, value in overrides.items():
+            stack.enter_context(mock.patch.object(settings, name, value))
+        stack.enter_context(mock.patch.object(database, "DATABASE_FILE", str(Path(workdir) / "fact_checks.db")))
+        # The app imports both lazily, on first use, so patching the modules themselves is enough.
+        stack.enter_context(mock.patch("langchain_google_genai.ChatGoogleGenerativeAI", fake_llm))
+        stack.enter_context(mock.patch("duckduckgo_search.DDGS", fake_ddgs))
+        reset_backends()
+        reset_clients()
+        database.init_db()
+        try:
+            yield
+        finally:
+            database.flush_writes()
+            reset_backends()
+            reset_clients()
+
+def bench_pipeline(args) -> List[Dict]:
+    """process_claim latency (claims run one at a time) and throughput (args.claim_workers at a time)."""
+    from src.fact_checker import FactChecker
+
+    runs = []
+    for assumptions in args.assumptions:
+        for concurrency in args.concurrency:
+            with tempfile.TemporaryDirectory() as workdir, offline_environment(
+                    workdir, args.llm_latency, args.search_latency, args.response_words, args.snippet_words, assumptions):
+                fact_checker = FactChecker(model_name="gemini-benchmark", search_tool_name="duckduckgo", max_concurrency=concurrency)
+                latencies, tokens = [], 0
+                for i in range(args.claims):
+                    started = time.perf_counter()
+                    result = fact_checker.process_claim(f"Latency claim {assumptions}-{concurrency}-{i}", reuse_previous=False, mode=args.mode)
+                    latencies.append(time.perf_counter() - started)
+                    tokens += sum(s["attributes"].get("input_tokens", 0) + s["attributes"].get("output_tokens", 0) for s in result["spans"])
+
+                claims = [f"Throughput claim {assumptions}-{concurrency}-{i}" for i in range(args.claims)]
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=args.claim_workers) as executor:
+                    list(executor.map(lambda claim: fact_checker.process_claim(claim, reuse_previous=False, mode=args.mode), claims))
+                elapsed = time.perf_counter() - started
+
+            run = {
+                "assumptions": assumptions,
+                "concurrency": concurrency,
+                "latency_mean_s": round(statistics.mean(latencies), 4),
+                "latency_p50_s": round(_percentile(latencies, 0.5), 4),
+                "latency_p95_s": round(_percentile(latencies, 0.95), 4),
+                "throughput_claims_per_min": round(len(claims) / elapsed * 60, 2),
+                "tokens_per_claim": round(tokens / len(latencies)),
+            }
+            logger.info(f"pipeline: {run}")
+            runs.append(run)
+    return runs
+
+def _synthetic_fact_check(i: int) -> Dict:
+    return {
+        "claim": f"Synthetic claim number {i} about topic {i % 997}",
+        "claim_type": "Factual",
+        "initial_response": "Initial response text. " * 10,
+        "assumptions": [f"Assumption {i}-{j}" for j in range(4)],
+        "assumptions_verdicts": [f"Assumption: Assumption {i}-{j} | Verdict: True - reason" for j in range(4)],
+        "gathered_evidence": [f"Assumption: Assumption {i}-{j}\nEvidence: " + "evidence text " * 20 for j in range(4)],
+        "final_answer": "True. Final answer text. " * 8,
+    }
+
+def bench_db(args) -> List[Dict]:
+    """Bulk and single-row inserts, then full and paged reads, at each table size."""
+    runs = []
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir, mock.patch.object(database, "DATABASE_FILE", str(Path(workdir) / "fact_checks.db")):
+            database.init_db()
+            run = {"rows": rows}
+
+            single = min(rows, args.single_inserts)
+            started = time.perf_counter()
+            futures = [database.save_fact_check(_synthetic_fact_check(i)) for i in range(single)]
+            for future in futures:
+                future.result()
+            run["save_fact_check_rows_per_s"] = round(single / (time.perf_counter() - started))
+
+            started = time.perf_counter()
+            for start in range(single, rows, args.chunk_size):
+                database.save_fact_checks([_synthetic_fact_check(i) for i in range(start, min(rows, start + args.chunk_size))])
+            if rows > single:
+                run["save_fact_checks_rows_per_s"] = round((rows - single) / (time.perf_counter() - started))
+
+            started = time.perf_counter()
+            loaded = database.load_all_fact_checks()
+            run["load_all_fact_checks_s"] = round(time.perf_counter() - started, 4)
+            assert len(loaded) == rows, f"expected {rows} rows, loaded {len(loaded)}"
+            del loaded
+
+            run["load_history_page_ms"] = round(timeit.timeit(lambda: database.load_history_page(limit=20), number=20) / 20 * 1000, 3)
+            run["search_fact_checks_ms"] = round(timeit.timeit(lambda: database.search_fact_checks("topic 42"), number=20) / 20 * 1000, 3)
+            database.flush_writes()
+            database.get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            run["db_bytes_per_row"] = round(os.path.getsize(database.DATABASE_FILE) / rows)
+        logger.info(f"db: {run}")
+        runs.append(run)
+    return runs
+
+def bench_process_results(args) -> List[Dict]:
+    """Time to format n search results into the prompt string."""
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir, offline_environment(workdir):
+        search_tools = SearchTools()
+        for n in args.result_counts:
+            results = [{"title": f"Title {i}", "href": f"https://example.com/{i}", "body": "Snippet text " * 20} for i in range(n)]
+            number = max(1, 20000 // n)
+            seconds = timeit.timeit(lambda: search_tools.process_results(results), number=number) / number
+            runs.append({"results": n, "us_per_call": round(seconds * 1e6, 2)})
+    return runs
+
+STARTUP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from src.fact_checker import FactChecker
+imported = time.perf_counter()
+FactChecker(model_name="gemini-benchmark")
+first = time.perf_counter()
+FactChecker(model_name="gemini-benchmark")
+print(json.dumps({"import_s": imported - started, "first_fact_checker_s": first - imported,
+                  "session_fact_checker_s": time.perf_counter() - first}))
+"""
+
+def bench_startup(args) -> List[Dict]:
+    """Cold start in a fresh interpreter: importing the pipeline, the first FactChecker and each one after it (a new session)."""
+    samples: Dict[str, List[float]] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, SEARCH_CACHE_FILE=str(Path(workdir) / "search_cache.db"),
+                   LLM_CACHE_FILE=str(Path(workdir) / "llm_cache.db"), METRICS_PORT="0", METRICS_FILE="")
+        for _ in range(args.startup_runs):
+            output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=Path(__file__).resolve().parent.parent,
+                                    env=env, capture_output=True, text=True, check=True).stdout
+            for name, seconds in json.loads(output.strip().splitlines()[-1]).items():
+                samples.setdefault(name, []).append(seconds)
+    run = {name: round(statistics.median(values), 4) for name, values in samples.items()}
+    logger.info(f"startup: {run}")
+    return [run]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the fact-checking pipeline and database.")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated suites to run: {', '.join(SUITES)}.")
+    parser.add_argument("--output", default="-", help="JSON output file, or '-' for stdout.")
+    parser.add_argument("--assumptions", type=_int_list, default=[1, 4, 8], help="Assumptions per claim (comma-separated).")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 8], help="Verification concurrency levels (comma-separated).")
+    parser.add_argument("--mode", default="deep", help="Pipeline mode for the pipeline suite (deep searches every assumption).")
+    parser.add_argument("--claims", type=int, default=8, help="Claims per pipeline configuration.")
+    parser.add_argument("--claim-workers", type=int, default=4, help="Claims processed in parallel for the throughput run.")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call.")
+    parser.add_argument("--search-latency", type=float, default=0.03, help="Seconds per fake search.")
+    parser.add_argument("--response-words", type=int, default=60, help="Words in a fake LLM answer.")
+    parser.add_argument("--snippet-words", type=int, default=40, help="Words in a fake search snippet.")
+    parser.add_argument("--rows", type=_int_list, default=[10000, 100000], help="Table sizes for the db suite (comma-separated).")
+    parser.add_argument("--single-inserts", type=int, default=2000, help="Rows inserted one save_fact_check at a time before bulk loading.")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per save_fact_checks call.")
+    parser.add_argument("--startup-runs", type=int, default=5, help="Fresh interpreters started for the startup suite.")
+    parser.add_argument("--result-counts", type=_int_list, default=[10, 100, 1000], help="Search result counts for process_results.")
+    return parser.parse_args(argv)
+
+def run(args) -> Dict:
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark suites: {', '.join(sorted(unknown))}")
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": {},
+    }
+    benches = {"pipeline": bench_pipeline, "db": bench_db, "process_results": bench_process_results, "startup": bench_startup}
+    for suite in suites:
+        started = time.perf_counter()
+        report["results"][suite] = benches[suite](args)
+        logger.info(f"Finished {suite} benchmarks in {time.perf_counter() - started:.1f}s.")
+    return report
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger.setLevel(logging.INFO)
+    args = parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+if __name__ == "__main__":
+    sys.exit(main())
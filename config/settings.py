@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +11,135 @@ class Settings:
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", 0.2))
     MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", 2048))
 
+    # Search backend: "duckduckgo", "local" (an on-disk index of LOCAL_CORPUS_DIR, built with
+    # python main.py index) or "fanout" (the FANOUT_BACKENDS queried in parallel, results merged).
     SEARCH_TOOL: str = os.getenv("SEARCH_TOOL", "duckduckgo")
+    LOCAL_INDEX_DIR: str = os.getenv("LOCAL_INDEX_DIR", "local_index")
+    # When set, new and changed files in this directory are indexed whenever the local backend starts.
+    LOCAL_CORPUS_DIR: str = os.getenv("LOCAL_CORPUS_DIR", "")
+    LOCAL_INDEX_PASSAGE_WORDS: int = int(os.getenv("LOCAL_INDEX_PASSAGE_WORDS", 120))
+    LOCAL_INDEX_MAX_SEGMENTS: int = int(os.getenv("LOCAL_INDEX_MAX_SEGMENTS", 8))
+    FANOUT_BACKENDS: list = [b.strip() for b in os.getenv("FANOUT_BACKENDS", "local,duckduckgo").split(",") if b.strip()]
+
+    # Persistent search result cache. News-style queries expire much sooner than encyclopedic ones.
+    SEARCH_CACHE_FILE: str = os.getenv("SEARCH_CACHE_FILE", "search_cache.db")
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 10000))
+    SEARCH_CACHE_TTL: int = int(os.getenv("SEARCH_CACHE_TTL", 7 * 24 * 3600))
+    SEARCH_CACHE_NEWS_TTL: int = int(os.getenv("SEARCH_CACHE_NEWS_TTL", 3600))
+
+    # LLM response cache. Set LLM_CACHE_ENABLED=false to always call the model.
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_FILE: str = os.getenv("LLM_CACHE_FILE", "llm_cache.db")
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", 512))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 50000))
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", 30 * 24 * 3600))
+
+    # How search results are condensed before evidence gathering: "extractive" ranks snippet
+    # sentences locally (BM25) and falls back to the LLM; "llm" always asks the LLM.
+    SUMMARIZER: str = os.getenv("SUMMARIZER", "extractive")
+    SUMMARY_TOKEN_BUDGET: int = int(os.getenv("SUMMARY_TOKEN_BUDGET", 400))
+
+    # Reuse stored fact-checks of near-identical claims (Jaccard similarity of content words).
+    DUPLICATE_CLAIM_LOOKUP: bool = os.getenv("DUPLICATE_CLAIM_LOOKUP", "true").lower() in ("1", "true", "yes")
+    DUPLICATE_CLAIM_THRESHOLD: float = float(os.getenv("DUPLICATE_CLAIM_THRESHOLD", 0.9))
+
+    # How long a stored assumption verdict may be reused, in hours, by claim type (0 disables reuse).
+    # Assumptions about recent events use ASSUMPTION_NEWS_FRESHNESS_HOURS when that is shorter.
+    ASSUMPTION_FRESHNESS_HOURS: dict = json.loads(os.getenv(
+        "ASSUMPTION_FRESHNESS_HOURS",
+        '{"Factual": 720, "Mixed": 168, "Opinion": 24, "Unverifiable": 24, "default": 24}'
+    ))
+    ASSUMPTION_NEWS_FRESHNESS_HOURS: float = float(os.getenv("ASSUMPTION_NEWS_FRESHNESS_HOURS", 1))
+
+    # Maximum number of assumptions verified in parallel per claim (1 = serial).
+    VERIFICATION_CONCURRENCY: int = int(os.getenv("VERIFICATION_CONCURRENCY", 4))
+
+    # Web results fetched per assumption, and how many of the claim's pooled, deduplicated results
+    # (and roughly how many prompt tokens of them) are passed on as evidence for each assumption.
+    SEARCH_RESULTS_PER_ASSUMPTION: int = int(os.getenv("SEARCH_RESULTS_PER_ASSUMPTION", 10))
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", 5))
+    RETRIEVAL_TOKEN_BUDGET: int = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", 1200))
+
+    # Download the top FETCH_TOP_N result pages per assumption and add their main text to the evidence.
+    FETCH_PAGES: bool = os.getenv("FETCH_PAGES", "false").lower() in ("1", "true", "yes")
+    FETCH_TOP_N: int = int(os.getenv("FETCH_TOP_N", 3))
+    FETCH_WORKERS: int = int(os.getenv("FETCH_WORKERS", 8))
+    FETCH_PER_HOST: int = int(os.getenv("FETCH_PER_HOST", 2))
+    FETCH_TIMEOUT: float = float(os.getenv("FETCH_TIMEOUT", 5.0))
+    FETCH_MAX_BYTES: int = int(os.getenv("FETCH_MAX_BYTES", 2_000_000))
+    FETCH_MAX_CHARS: int = int(os.getenv("FETCH_MAX_CHARS", 4000))
+
+    # Client-side limits shared by every call to each backend. Throttled (429) and transient
+    # failures are retried with jittered exponential backoff; concurrency adapts between 1 and
+    # *_MAX_CONCURRENCY (AIMD), and a backend failing CIRCUIT_FAILURE_THRESHOLD calls in a row is
+    # not called again for CIRCUIT_RESET_SECONDS.
+    GEMINI_REQUESTS_PER_MINUTE: float = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", 60))
+    GEMINI_MAX_CONCURRENCY: int = int(os.getenv("GEMINI_MAX_CONCURRENCY", 8))
+    SEARCH_REQUESTS_PER_MINUTE: float = float(os.getenv("SEARCH_REQUESTS_PER_MINUTE", 30))
+    SEARCH_MAX_CONCURRENCY: int = int(os.getenv("SEARCH_MAX_CONCURRENCY", 4))
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", 4))
+    RETRY_BASE_DELAY: float = float(os.getenv("RETRY_BASE_DELAY", 1.0))
+    RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", 30.0))
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", 30.0))
+
+    # Prometheus metrics (stage duration histograms, token and cache counters, backend health):
+    # rewritten to METRICS_FILE after every claim and/or served at http://127.0.0.1:METRICS_PORT/metrics.
+    METRICS_FILE: str = os.getenv("METRICS_FILE", "")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", 0))
+
+    # HTTP fact-check service (python main.py serve): claims wait in a bounded queue (429 when full)
+    # and are processed by SERVICE_WORKERS threads sharing one FactChecker. On shutdown, queued and
+    # running jobs get SERVICE_DRAIN_TIMEOUT seconds to finish.
+    SERVICE_HOST: str = os.getenv("SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT: int = int(os.getenv("SERVICE_PORT", 8080))
+    SERVICE_WORKERS: int = int(os.getenv("SERVICE_WORKERS", 4))
+    SERVICE_QUEUE_SIZE: int = int(os.getenv("SERVICE_QUEUE_SIZE", 100))
+    SERVICE_DRAIN_TIMEOUT: float = float(os.getenv("SERVICE_DRAIN_TIMEOUT", 60))
+    # When set (e.g. http://127.0.0.1:8080), the Streamlit app sends claims and history queries
+    # to that service instead of running its own FactChecker.
+    FACT_CHECK_SERVICE_URL: str = os.getenv("FACT_CHECK_SERVICE_URL", "")
+
+    # Pipeline depth: "fast", "standard" or "deep" (selectable per claim). Each mode caps the LLM calls,
+    # searches, assumptions and wall time per claim; past the deadline the answer is synthesized from
+    # the evidence gathered so far. Opinion/Unverifiable claims are never searched; other claim types
+    # are only searched when the verdict is Uncertain, unless listed in the mode's search_confident.
+    # A mode with "fetch_pages": true fetches result pages even when FETCH_PAGES is off.
+    PIPELINE_MODE: str = os.getenv("PIPELINE_MODE", "standard")
+    PIPELINE_MODES: dict = json.loads(os.getenv(
+        "PIPELINE_MODES",
+        '{"fast": {"max_llm_calls": 6, "max_searches": 2, "deadline_seconds": 15, "max_assumptions": 3, "search_confident": []},'
+        ' "standard": {"max_llm_calls": 20, "max_searches": 8, "deadline_seconds": 60, "max_assumptions": 8, "search_confident": ["Mixed"]},'
+        ' "deep": {"max_llm_calls": 60, "max_searches": 24, "deadline_seconds": 180, "max_assumptions": 20, "search_confident": ["Factual", "Mixed"]}}'
+    ))
+
+    # Verify assumptions (and gather their evidence) with one structured LLM call per chunk
+    # instead of one call each. Entries the model's JSON doesn't cover fall back to single calls.
+    BATCH_VERIFICATION: bool = os.getenv("BATCH_VERIFICATION", "false").lower() in ("1", "true", "yes")
+    VERIFICATION_BATCH_SIZE: int = int(os.getenv("VERIFICATION_BATCH_SIZE", 8))
+    EVIDENCE_BATCH_SIZE: int = int(os.getenv("EVIDENCE_BATCH_SIZE", 4))
+
+    # Re-verification of stale fact-checks (python main.py refresh, or every REFRESH_INTERVAL_MINUTES
+    # inside the HTTP service while it is idle). A stored result goes stale after FACT_CHECK_FRESHNESS_HOURS
+    # for its claim type (0 = never), or FACT_CHECK_NEWS_FRESHNESS_HOURS for claims about recent events.
+    # Its searches are repeated, and verification and synthesis only re-run if the results changed.
+    # The job never exceeds REFRESH_SEARCHES_PER_MINUTE and REFRESH_REVERIFICATIONS_PER_HOUR.
+    FACT_CHECK_FRESHNESS_HOURS: dict = json.loads(os.getenv(
+        "FACT_CHECK_FRESHNESS_HOURS",
+        '{"Factual": 720, "Mixed": 168, "Opinion": 0, "Unverifiable": 0, "default": 168}'
+    ))
+    FACT_CHECK_NEWS_FRESHNESS_HOURS: float = float(os.getenv("FACT_CHECK_NEWS_FRESHNESS_HOURS", 6))
+    REFRESH_MODE: str = os.getenv("REFRESH_MODE", "standard")
+    REFRESH_BATCH_SIZE: int = int(os.getenv("REFRESH_BATCH_SIZE", 20))
+    REFRESH_INTERVAL_MINUTES: float = float(os.getenv("REFRESH_INTERVAL_MINUTES", 0))
+    REFRESH_SEARCHES_PER_MINUTE: float = float(os.getenv("REFRESH_SEARCHES_PER_MINUTE", 6))
+    REFRESH_REVERIFICATIONS_PER_HOUR: float = float(os.getenv("REFRESH_REVERIFICATIONS_PER_HOUR", 30))
+
+    # Batch mode (python main.py batch): claims processed in parallel and rows per database transaction.
+    BATCH_WORKERS: int = int(os.getenv("BATCH_WORKERS", 4))
+    BATCH_DB_CHUNK_SIZE: int = int(os.getenv("BATCH_DB_CHUNK_SIZE", 100))
+
+    # History export/import (python main.py export/import): rows per chunk read, written and committed.
+    ARCHIVE_CHUNK_SIZE: int = int(os.getenv("ARCHIVE_CHUNK_SIZE", 500))
 
 settings = Settings()
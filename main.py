@@ -1,3 +1,5 @@
+import argparse
+import os
 import subprocess
 import sys
 import logging
@@ -20,5 +22,155 @@ def run_streamlit_app():
     except Exception as e:
         logging.error(f"An error occurred while running Streamlit: {e}")
 
+def run_batch_mode(args):
+    """Fact-checks every line of a file (or stdin) and streams JSONL results."""
+    from config.settings import settings
+    from src.batch import Checkpoint, prune_output, read_claims, run_batch
+    from src.fact_checker import FactChecker
+
+    # Logs go to stderr so stdout stays valid JSONL.
+    init_db()
+    fact_checker = FactChecker(model_name=settings.LLM_MODEL, search_tool_name=settings.SEARCH_TOOL)
+    checkpoint = args.checkpoint
+    if checkpoint is None and args.input != "-":
+        checkpoint = f"{args.input}.checkpoint"
+
+    if args.output != "-" and checkpoint and os.path.exists(args.output):
+        completed = Checkpoint(checkpoint).completed
+        if completed:
+            # Resuming: lines that will run again must not end up in the output twice.
+            prune_output(args.output, completed)
+
+    source = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+    output = sys.stdout if args.output == "-" else open(args.output, 'a', encoding='utf-8')
+    try:
+        run_batch(
+            fact_checker,
+            read_claims(source),
+            output,
+            workers=args.workers,
+            checkpoint_path=checkpoint,
+            db_chunk_size=args.chunk_size,
+            reuse_previous=not args.no_reuse
+        )
+    finally:
+        fact_checker.close()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+def run_service(args):
+    """Serves the fact-check HTTP API until interrupted."""
+    from src.service import serve
+
+    serve(args.host, args.port, workers=args.workers, queue_size=args.queue_size, drain_timeout=args.drain_timeout)
+
+def run_refresh(args):
+    """Re-verifies stored fact-checks whose evidence may have gone stale."""
+    from config.settings import settings
+    from src.fact_checker import FactChecker
+    from src.refresh import Refresher
+
+    init_db()
+    fact_checker = FactChecker(model_name=settings.LLM_MODEL, search_tool_name=settings.SEARCH_TOOL)
+    refresher = Refresher(fact_checker, mode=args.mode)
+    try:
+        if args.interval > 0:
+            try:
+                refresher.run_forever(args.interval, args.limit)
+            except KeyboardInterrupt:
+                logging.info("Refresh stopped.")
+        else:
+            refresher.run_once(args.limit)
+    finally:
+        fact_checker.close()
+
+def run_indexer(args):
+    """Builds or incrementally updates the local search index."""
+    from config.settings import settings
+    from src.local_index import LocalIndex
+
+    index = LocalIndex(args.index_dir, passage_words=settings.LOCAL_INDEX_PASSAGE_WORDS, max_segments=settings.LOCAL_INDEX_MAX_SEGMENTS)
+    try:
+        if args.corpus:
+            index.update(args.corpus)
+        if args.compact:
+            index.compact()
+        logging.info(f"The local index in {args.index_dir} holds {len(index)} passages.")
+    finally:
+        index.close()
+
+def run_export(args):
+    """Streams the fact-check history to an archive file."""
+    from src.archive import export_history
+
+    init_db()
+    export_history(args.output, layout=args.format, chunk_size=args.chunk_size)
+
+def run_import(args):
+    """Loads fact-checks from an archive file into the database."""
+    from src.archive import import_history
+
+    init_db()
+    import_history(args.input, chunk_size=args.chunk_size, renumber=args.renumber)
+
+def parse_args(argv=None):
+    from config.settings import settings
+
+    parser = argparse.ArgumentParser(description="AI Fact-Checker Bot")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("ui", help="Run the Streamlit app (default).")
+
+    batch_parser = subparsers.add_parser("batch", help="Fact-check claims from a file, one per line.")
+    batch_parser.add_argument("input", nargs="?", default="-", help="Input file with one claim per line, or '-' for stdin.")
+    batch_parser.add_argument("-o", "--output", default="-", help="JSONL output file (appended to; when resuming, records of lines that will run again are removed first), or '-' for stdout.")
+    batch_parser.add_argument("-w", "--workers", type=int, default=settings.BATCH_WORKERS, help="Claims processed concurrently.")
+    batch_parser.add_argument("--checkpoint", default=None, help="Checkpoint file for resuming (default: <input>.checkpoint).")
+    batch_parser.add_argument("--chunk-size", type=int, default=settings.BATCH_DB_CHUNK_SIZE, help="Results per database transaction.")
+    batch_parser.add_argument("--no-reuse", action="store_true", help="Always run the full pipeline, even for near-duplicate claims.")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the fact-check HTTP API.")
+    serve_parser.add_argument("--host", default=settings.SERVICE_HOST, help="Interface to listen on.")
+    serve_parser.add_argument("--port", type=int, default=settings.SERVICE_PORT, help="Port to listen on.")
+    serve_parser.add_argument("-w", "--workers", type=int, default=settings.SERVICE_WORKERS, help="Claims processed concurrently.")
+    serve_parser.add_argument("--queue-size", type=int, default=settings.SERVICE_QUEUE_SIZE, help="Claims allowed to wait before new ones get 429.")
+    serve_parser.add_argument("--drain-timeout", type=float, default=settings.SERVICE_DRAIN_TIMEOUT, help="Seconds to let in-flight claims finish on shutdown.")
+
+    refresh_parser = subparsers.add_parser("refresh", help="Re-verify stored fact-checks that are past their freshness window.")
+    refresh_parser.add_argument("--limit", type=int, default=settings.REFRESH_BATCH_SIZE, help="Fact-checks refreshed per run.")
+    refresh_parser.add_argument("--interval", type=float, default=0, help="Keep running, once every this many minutes (default: run once).")
+    refresh_parser.add_argument("--mode", default=settings.REFRESH_MODE, help="Pipeline mode for re-verification.")
+
+    index_parser = subparsers.add_parser("index", help="Index a directory of documents for SEARCH_TOOL=local.")
+    index_parser.add_argument("corpus", nargs="?", default=settings.LOCAL_CORPUS_DIR or None, help="Directory of .txt, .md, .html and .jsonl documents.")
+    index_parser.add_argument("--index-dir", default=settings.LOCAL_INDEX_DIR, help="Where the index is stored.")
+    index_parser.add_argument("--compact", action="store_true", help="Merge all segments and purge deleted passages.")
+
+    export_parser = subparsers.add_parser("export", help="Write the fact-check history to a JSONL or columnar archive.")
+    export_parser.add_argument("output", nargs="?", default="-", help="Archive file (gzipped if it ends in .gz), or '-' for stdout.")
+    export_parser.add_argument("--format", choices=["jsonl", "columns"], default="jsonl", help="One line per row, or one column-major line per chunk.")
+    export_parser.add_argument("--chunk-size", type=int, default=settings.ARCHIVE_CHUNK_SIZE, help="Rows read from the database at a time.")
+
+    import_parser = subparsers.add_parser("import", help="Load fact-checks from an archive written by export.")
+    import_parser.add_argument("input", nargs="?", default="-", help="Archive file (gzipped if it ends in .gz), or '-' for stdin.")
+    import_parser.add_argument("--chunk-size", type=int, default=settings.ARCHIVE_CHUNK_SIZE, help="Rows per database transaction.")
+    import_parser.add_argument("--renumber", action="store_true", help="Give rows new ids instead of keeping (and skipping existing) ones.")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    run_streamlit_app()
+    args = parse_args()
+    if args.command == "batch":
+        run_batch_mode(args)
+    elif args.command == "serve":
+        run_service(args)
+    elif args.command == "refresh":
+        run_refresh(args)
+    elif args.command == "index":
+        run_indexer(args)
+    elif args.command == "export":
+        run_export(args)
+    elif args.command == "import":
+        run_import(args)
+    else:
+        run_streamlit_app()
@@ -0,0 +1,93 @@
+import gzip
+import json
+import logging
+import sys
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, TextIO
+from src.database import import_fact_checks, iter_fact_checks
+
+ROWS = "jsonl"
+COLUMNS = "columns"
+FORMATS = (ROWS, COLUMNS)
+ARCHIVE_VERSION = 1
+
+# Exported fields, in column order; anything else a row carries is dropped.
+FIELDS = ("id", "claim", "claim_type", "initial_response", "assumptions", "assumptions_verdicts", "gathered_evidence",
+          "final_answer", "timestamp", "spans", "parent_id", "evidence_hash", "searched_assumptions", "checked_at")
+
+@contextmanager
+def open_archive(path: str, mode: str) -> Iterator[TextIO]:
+    """Opens path for text reading ("r") or writing ("w"); '-' is stdin/stdout and a .gz suffix means gzip."""
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, f"{mode}t", encoding="utf-8") as f:
+        yield f
+
+def write_archive(chunks: Iterable[List[dict]], output: TextIO, layout: str = ROWS) -> int:
+    """Writes a header line, then each chunk as one JSON line per row (jsonl) or one column-major line (columns).
+
+    Returns the number of rows written. Only one chunk is held at a time.
+    """
+    if layout not in FORMATS:
+        raise ValueError(f"Unsupported export format: {layout}. Choose one of: {', '.join(FORMATS)}.")
+    output.write(json.dumps({"format": "fact-checks", "version": ARCHIVE_VERSION, "layout": layout}) + "\n")
+    count = 0
+    for chunk in chunks:
+        if layout == COLUMNS:
+            output.write(json.dumps({"columns": {field: [row.get(field) for row in chunk] for field in FIELDS}}) + "\n")
+        else:
+            output.writelines(json.dumps({field: row.get(field) for field in FIELDS}) + "\n" for row in chunk)
+        count += len(chunk)
+    return count
+
+def read_archive(lines: Iterable[str], chunk_size: int = 500) -> Iterator[List[dict]]:
+    """Yields the rows of an archive in either layout, in lists of up to chunk_size.
+
+    The layout is detected line by line, and files without a header (such as
+    batch mode output) are read as plain JSONL rows.
+    """
+    chunk: List[dict] = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "format" in record:
+            if record.get("version", ARCHIVE_VERSION) > ARCHIVE_VERSION:
+                raise ValueError(f"Archive version {record['version']} is newer than this version of the bot supports.")
+            continue
+        if "columns" in record:
+            columns = record["columns"]
+            length = max((len(values) for values in columns.values()), default=0)
+            rows = [{field: values[i] for field, values in columns.items() if i < len(values)} for i in range(length)]
+        elif "error" in record:
+            logging.warning(f"Skipping line {line_number}: it records a failed fact-check.")
+            continue
+        else:
+            rows = [record]
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def export_history(path: str, layout: str = ROWS, chunk_size: int = 500) -> int:
+    """Streams every stored fact-check to path and returns how many were written."""
+    with open_archive(path, "w") as output:
+        count = write_archive(iter_fact_checks(chunk_size), output, layout)
+    logging.info(f"Exported {count} fact-checks to {path}.")
+    return count
+
+def import_history(path: str, chunk_size: int = 500, renumber: bool = False, fact_checker=None) -> int:
+    """Streams fact-checks from an archive at path into the database and returns how many were added.
+
+    The added claims are indexed for fact_checker's duplicate lookup, if one is given.
+    """
+    on_saved = fact_checker.index_claims if fact_checker is not None else None
+    with open_archive(path, "r") as source:
+        added = import_fact_checks(read_archive(source, chunk_size), renumber=renumber, on_saved=on_saved)
+    logging.info(f"Imported {added} fact-checks from {path}.")
+    return added
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+from src.database import save_fact_checks
+
+def read_claims(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Yields (line_number, claim) for every non-blank line, numbering lines from 1."""
+    for line_number, line in enumerate(lines, start=1):
+        claim = line.strip()
+        if claim:
+            yield line_number, claim
+
+class Checkpoint:
+    """Append-only record of the input line numbers whose results are safely stored."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.completed: Set[int] = set()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.completed = {int(line) for line in f if line.strip()}
+            logging.info(f"Resuming batch: {len(self.completed)} claims already completed according to {path}.")
+
+    def mark(self, line_numbers: List[int]):
+        self.completed.update(line_numbers)
+        if self.path and line_numbers:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("".join(f"{n}\n" for n in line_numbers))
+                f.flush()
+                os.fsync(f.fileno())
+
+def prune_output(path: str, completed: Set[int]) -> int:
+    """Rewrites a batch output file to keep one record per completed line, and returns how many were dropped.
+
+    Records are streamed as soon as each claim finishes, but only checkpointed
+    once stored, so after an interruption the output can hold records for
+    lines that will run again (failures and the last partial chunk). Pruning
+    before resuming keeps exactly one record per input line.
+    """
+    kept, dropped = set(), 0
+    tmp_path = f"{path}.tmp"
+    with open(path, 'r', encoding='utf-8') as source, open(tmp_path, 'w', encoding='utf-8') as target:
+        for raw in source:
+            try:
+                line_number = json.loads(raw).get("line")
+            except (json.JSONDecodeError, AttributeError):
+                line_number = None
+            if line_number in completed and line_number not in kept:
+                kept.add(line_number)
+                target.write(raw)
+            else:
+                dropped += 1
+        target.flush()
+        os.fsync(target.fileno())
+    os.replace(tmp_path, path)
+    if dropped:
+        logging.info(f"Dropped {dropped} records from {path} for lines that will be fact-checked again.")
+    return dropped
+
+def run_batch(fact_checker, claims: Iterable[Tuple[int, str]], output: TextIO, workers: int = 4,
+              checkpoint_path: Optional[str] = None, db_chunk_size: int = 100, reuse_previous: bool = True) -> Dict[str, int]:
+    """Fact-checks claims concurrently, streaming one JSON line per result as soon as it finishes.
+
+    Results are inserted into the database in chunks of db_chunk_size, and
+    added to fact_checker's duplicate lookup once committed. A claim is
+    recorded in the checkpoint only after its chunk has been committed, so an
+    interrupted run re-processes at most one partial chunk when resumed.
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    summary = {"processed": 0, "failed": 0, "skipped": 0}
+    pending_rows: List[dict] = []
+    pending_lines: List[int] = []
+
+    def flush():
+        if pending_rows:
+            ids = save_fact_checks(pending_rows)
+            if ids is None:
+                raise RuntimeError("Could not save batch results to the database; stopping so the checkpoint stays accurate.")
+            fact_checker.index_claims(zip(ids, [row["claim"] for row in pending_rows]))
+        checkpoint.mark(pending_lines)
+        pending_rows.clear()
+        pending_lines.clear()
+
+    def handle(line_number: int, claim: str, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.error(f"Fact-check failed for line {line_number}: {e}")
+            summary["failed"] += 1
+            output.write(json.dumps({"line": line_number, "claim": claim, "error": str(e)}) + "\n")
+            output.flush()
+            return
+        summary["processed"] += 1
+        output.write(json.dumps({"line": line_number, **result}, ensure_ascii=False) + "\n")
+        output.flush()
+        # Reused results are already stored; only new ones need inserting.
+        if result.get("duplicate_of") is None:
+            pending_rows.append(result)
+        pending_lines.append(line_number)
+        if len(pending_lines) >= db_chunk_size:
+            flush()
+
+    # Keep a bounded number of claims in flight so huge inputs are streamed, not loaded.
+    max_in_flight = max(1, workers) * 2
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as executor:
+        try:
+            for line_number, claim in claims:
+                if line_number in checkpoint.completed:
+                    summary["skipped"] += 1
+                    continue
+                future = executor.submit(fact_checker.process_claim, claim, reuse_previous=reuse_previous, persist=False)
+                in_flight[future] = (line_number, claim)
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(*in_flight.pop(future), future)
+            for future in as_completed(list(in_flight)):
+                handle(*in_flight.pop(future), future)
+        finally:
+            flush()
+
+    logging.info(f"Batch finished: {summary['processed']} processed, {summary['failed']} failed, {summary['skipped']} skipped from checkpoint.")
+    return summary
@@ -0,0 +1,156 @@
+import contextvars
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+from config.settings import settings
+
+FAST = "fast"
+STANDARD = "standard"
+DEEP = "deep"
+MODES = (FAST, STANDARD, DEEP)
+
+# When assumptions are searched for, given the claim type and the mode.
+SEARCH_NEVER = "never"
+SEARCH_UNCERTAIN = "uncertain"  # only when the model isn't confident in its verdict
+SEARCH_ALWAYS = "always"
+
+CLAIM_TYPES = ("Factual", "Opinion", "Mixed", "Unverifiable")
+# Claims that web evidence can't settle.
+NO_SEARCH_CLAIM_TYPES = ("Opinion", "Unverifiable")
+
+@dataclass(frozen=True)
+class PipelineMode:
+    """How deep the pipeline may go for one claim.
+
+    LLM calls and searches are counted per claim; once deadline_seconds have
+    passed, unfinished verification is abandoned and the answer is synthesized
+    from whatever evidence exists. search_confident lists the claim types whose
+    assumptions are searched even when the model is confident in its verdict.
+    """
+    name: str
+    max_llm_calls: int
+    max_searches: int
+    deadline_seconds: float
+    max_assumptions: int
+    search_confident: Tuple[str, ...] = ()
+    fetch_pages: bool = False
+
+    def search_policy(self, claim_type: Optional[str]) -> str:
+        claim_type = normalize_claim_type(claim_type)
+        if claim_type in NO_SEARCH_CLAIM_TYPES:
+            return SEARCH_NEVER
+        return SEARCH_ALWAYS if claim_type in self.search_confident else SEARCH_UNCERTAIN
+
+# Used when no budget is active, e.g. FactChecker.verify_assumptions called directly.
+UNLIMITED = PipelineMode("unlimited", max_llm_calls=10**9, max_searches=10**9, deadline_seconds=math.inf,
+                         max_assumptions=10**9, search_confident=CLAIM_TYPES)
+
+def normalize_claim_type(claim_type: Optional[str]) -> str:
+    """Maps the classifier's answer onto CLAIM_TYPES; anything unrecognized counts as Mixed."""
+    words = (claim_type or "").strip().strip(".*").split()
+    name = words[0].strip(".:,*").capitalize() if words else ""
+    return name if name in CLAIM_TYPES else "Mixed"
+
+def get_mode(name: Optional[str] = None) -> PipelineMode:
+    """Returns the configured mode (settings.PIPELINE_MODE by default). Raises ValueError for unknown names."""
+    name = (name or settings.PIPELINE_MODE).strip().lower()
+    if name not in settings.PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode: {name}. Choose one of: {', '.join(settings.PIPELINE_MODES)}.")
+    config = dict(settings.PIPELINE_MODES[name])
+    config["search_confident"] = tuple(config.get("search_confident", ()))
+    return PipelineMode(name=name, **config)
+
+@dataclass
+class Budget:
+    """The LLM calls, searches and time left for one claim. Safe to share between threads.
+
+    One LLM call is always held back for the final synthesis, so spending
+    the budget never leaves a claim without an answer.
+    """
+    mode: PipelineMode
+    started: float = field(default_factory=time.monotonic)
+    llm_calls: int = 0
+    searches: int = 0
+    exhausted: List[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def remaining(self) -> float:
+        return max(0.0, self.mode.deadline_seconds - (time.monotonic() - self.started))
+
+    def wait_timeout(self) -> Optional[float]:
+        """remaining() as a timeout for blocking waits; None when there is no deadline."""
+        remaining = self.remaining()
+        return remaining if remaining < threading.TIMEOUT_MAX else None
+
+    def expired(self) -> bool:
+        if self.remaining() > 0:
+            return False
+        self._note("deadline")
+        return True
+
+    def charge_llm_call(self):
+        """Counts an LLM call the pipeline can't do without (classification, synthesis, ...)."""
+        with self._lock:
+            self.llm_calls += 1
+
+    def try_llm_call(self) -> bool:
+        """Reserves an optional LLM call; False when the deadline or call limit has been reached."""
+        if self.expired():
+            return False
+        with self._lock:
+            if self.llm_calls + 1 < self.mode.max_llm_calls:
+                self.llm_calls += 1
+                return True
+        self._note("llm_calls")
+        return False
+
+    def release_llm_call(self):
+        """Gives back a call reserved with try_llm_call that turned out not to be needed."""
+        with self._lock:
+            self.llm_calls = max(0, self.llm_calls - 1)
+
+    def take_searches(self, wanted: int = 1) -> int:
+        """Reserves up to wanted searches and returns how many were granted."""
+        if self.expired():
+            return 0
+        with self._lock:
+            granted = max(0, min(wanted, self.mode.max_searches - self.searches))
+            self.searches += granted
+        if granted < wanted:
+            self._note("searches")
+        return granted
+
+    def _note(self, reason: str):
+        with self._lock:
+            if reason in self.exhausted:
+                return
+            self.exhausted.append(reason)
+        logging.warning(f"The {self.mode.name} pipeline budget ran out ({reason}); answering with the evidence gathered so far.")
+
+    def usage(self) -> dict:
+        return {"mode": self.mode.name, "llm_calls": self.llm_calls, "searches": self.searches,
+                "elapsed_s": round(time.monotonic() - self.started, 3), "exhausted": list(self.exhausted)}
+
+_current_budget: contextvars.ContextVar[Optional[Budget]] = contextvars.ContextVar("current_budget", default=None)
+
+@contextmanager
+def start_budget(mode: PipelineMode) -> Iterator[Budget]:
+    """Makes a new Budget current for the block (and for threads started with tracing.bind)."""
+    budget = Budget(mode)
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        try:
+            _current_budget.reset(token)
+        except ValueError:
+            _current_budget.set(None)
+
+def current_budget() -> Budget:
+    """Returns the active budget, or an unlimited one outside start_budget."""
+    budget = _current_budget.get()
+    return budget if budget is not None else Budget(UNLIMITED)
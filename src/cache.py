@@ -0,0 +1,219 @@
+import sqlite3
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from config.settings import settings
+from src.tracing import annotate
+
+class DiskCache:
+    """A small SQLite-backed key/value cache with per-entry TTL and LRU eviction.
+
+    Entries live in a single table of the given database file, so the cache
+    survives restarts and can be shared by several processes (SQLite handles
+    the locking; WAL mode lets readers proceed while another process writes).
+
+    To keep reads and writes cheap, expired entries are purged and the LRU
+    ones evicted only every maintenance_interval writes (about 1% of
+    max_entries by default), so the table can briefly run that far over
+    max_entries. Hits don't write either: their access times are collected in
+    memory and written in one batch before each eviction, or once
+    ACCESS_FLUSH_SIZE have piled up.
+    """
+
+    ACCESS_FLUSH_SIZE = 256
+
+    def __init__(self, path: str, table: str = "cache", max_entries: int = 10000, maintenance_interval: Optional[int] = None):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.maintenance_interval = maintenance_interval or max(1, min(100, max_entries // 100))
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._writes = 0
+        self._accesses: Dict[str, float] = {}
+        self._access_lock = threading.Lock()
+        self._init_table()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_table(self):
+        conn = self._connection()
+        with conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access ON {self.table} (last_access)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_expires_at ON {self.table} (expires_at)")
+
+    def _record(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value for key, or None if it is missing or expired."""
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    with conn:
+                        conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._record(hit=False)
+                return None
+        except sqlite3.Error as e:
+            logging.error(f"Error reading from cache '{self.table}': {e}")
+            self._record(hit=False)
+            return None
+        with self._access_lock:
+            self._accesses[key] = now
+            flush = len(self._accesses) >= self.ACCESS_FLUSH_SIZE
+        if flush:
+            try:
+                with conn:
+                    self._flush_accesses(conn)
+            except sqlite3.Error as e:
+                logging.error(f"Error recording cache accesses in '{self.table}': {e}")
+        self._record(hit=True)
+        return json.loads(row[0])
+
+    def _flush_accesses(self, conn: sqlite3.Connection):
+        """Writes the access times of recent hits, so eviction sees them."""
+        with self._access_lock:
+            accesses, self._accesses = self._accesses, {}
+        if accesses:
+            conn.executemany(f"UPDATE {self.table} SET last_access = MAX(last_access, ?) WHERE key = ?",
+                             [(accessed, key) for key, accessed in accesses.items()])
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Stores a JSON-serializable value for ttl seconds; every maintenance_interval writes, evicts least recently used entries."""
+        now = time.time()
+        with self._stats_lock:
+            self._writes += 1
+            maintain = self._writes % self.maintenance_interval == 0
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now + ttl, now)
+                )
+                if not maintain:
+                    return
+                self._flush_accesses(conn)
+                conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+                overflow = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                        (overflow,)
+                    )
+        except sqlite3.Error as e:
+            logging.error(f"Error writing to cache '{self.table}': {e}")
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        conn = self._connection()
+        with self._access_lock:
+            self._accesses.clear()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters for this instance and the current entry count."""
+        size = self._connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
+
+class LLMResponseCache:
+    """Two-tier (memory + disk) cache for LLM responses.
+
+    Keys are content hashes of the prompt template text, the input variables
+    and the model parameters, so editing a prompt in config/prompts.yaml or
+    switching models automatically misses instead of returning stale answers.
+    """
+
+    def __init__(self, path: str, memory_entries: int = 512, disk_entries: int = 50000, ttl: float = 30 * 24 * 3600, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._disk = DiskCache(path, table="llm_responses", max_entries=disk_entries) if enabled else None
+
+    @staticmethod
+    def make_key(template: str, inputs: Dict[str, Any], model_name: str, temperature: float, max_tokens: int) -> str:
+        payload = json.dumps({
+            "template": template,
+            "inputs": inputs,
+            "model": model_name,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                annotate(llm_cache_hits=1)
+                return self._memory[key]
+        value = self._disk.get(key)
+        if value is not None:
+            self._remember(key, value)
+        annotate(**{"llm_cache_hits" if value is not None else "llm_cache_misses": 1})
+        return value
+
+    def set(self, key: str, value: str):
+        if not self.enabled:
+            return
+        self._remember(key, value)
+        self._disk.set(key, value, ttl=self.ttl)
+
+    def _remember(self, key: str, value: str):
+        with self._memory_lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        """Returns the cached response for key, calling compute() and caching its result on a miss."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.set(key, value)
+        return value
+
+def create_llm_response_cache() -> LLMResponseCache:
+    """Builds an LLM response cache configured from settings."""
+    return LLMResponseCache(
+        settings.LLM_CACHE_FILE,
+        memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+        disk_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        ttl=settings.LLM_CACHE_TTL,
+        enabled=settings.LLM_CACHE_ENABLED
+    )
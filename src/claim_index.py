@@ -0,0 +1,101 @@
+import re
+import sys
+import threading
+import zlib
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Words that carry no meaning for claim identity. Negations are deliberately
+# absent: "Paris is not the capital of France" must never match its opposite.
+STOPWORDS = frozenset("""
+a an the is are was were be been being am do does did of in on at to for from by with about as into
+and or but if then than that this these those it its it's there their they he she his her we our you your
+i me my what which who whom whose when where why how whether true false fact check claim really actually
+""".split())
+NEGATIONS = frozenset(["not", "no", "never", "none", "nor", "nobody", "nothing", "neither", "without",
+                       "isnt", "arent", "wasnt", "werent", "dont", "doesnt", "didnt", "cant", "cannot", "wont", "hasnt", "havent"])
+
+NUM_PERMUTATIONS = 32
+BANDS = 8
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed coefficients keep signatures stable across processes.
+_PERMUTATIONS = [((i * 0x9E3779B1 + 0x7F4A7C15) % _MERSENNE_PRIME | 1, (i * 0x85EBCA77 + 0xC2B2AE3D) % _MERSENNE_PRIME)
+                 for i in range(1, NUM_PERMUTATIONS + 1)]
+
+def claim_tokens(claim: str) -> Tuple[str, ...]:
+    """Returns the sorted content words of a claim, ignoring case, punctuation and stopwords."""
+    words = re.findall(r"[a-z0-9]+", claim.lower().replace("'", "").replace("’", ""))
+    return tuple(sorted({w for w in words if w not in STOPWORDS}))
+
+@lru_cache(maxsize=65536)
+def _token_hashes(token: str) -> array:
+    h = zlib.crc32(token.encode("utf-8"))
+    return array("Q", [((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for a, b in _PERMUTATIONS])
+
+def _band_keys(tokens: Tuple[str, ...]) -> List[int]:
+    signature = list(map(min, zip(*(_token_hashes(t) for t in tokens))))
+    return [hash((band, tuple(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]))) for band in range(BANDS)]
+
+def jaccard(a: Tuple[str, ...], b: Tuple[str, ...]) -> float:
+    sa, sb = set(a), set(b)
+    return len(sa & sb) / len(sa | sb) if sa or sb else 0.0
+
+class ClaimIndex:
+    """In-memory MinHash/LSH index for finding near-duplicate claims.
+
+    Claims are reduced to their set of content words, hashed into banded
+    MinHash signatures, and only claims sharing a band bucket are compared
+    with exact Jaccard similarity. Lookups therefore touch a handful of
+    candidates regardless of how many claims are indexed.
+    """
+
+    def __init__(self, threshold: float = 0.9):
+        self.threshold = threshold
+        self._tokens: Dict[int, Tuple[str, ...]] = {}
+        self._buckets: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def add(self, fact_id: int, claim: str):
+        """Indexes a stored claim under its database id."""
+        tokens = tuple(map(sys.intern, claim_tokens(claim)))
+        if not tokens:
+            return
+        keys = _band_keys(tokens)
+        with self._lock:
+            self._tokens[fact_id] = tokens
+            for key in keys:
+                self._buckets.setdefault(key, []).append(fact_id)
+
+    def add_many(self, claims: Iterable[Tuple[int, str]]):
+        for fact_id, claim in claims:
+            self.add(fact_id, claim)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._buckets.clear()
+
+    def query(self, claim: str) -> Optional[Tuple[int, float]]:
+        """Returns (fact_id, similarity) of the closest indexed claim above the threshold, if any."""
+        tokens = claim_tokens(claim)
+        if not tokens:
+            return None
+        negations = NEGATIONS.intersection(tokens)
+        best = None
+        with self._lock:
+            candidates = {fact_id for key in _band_keys(tokens) for fact_id in self._buckets.get(key, ())}
+            for fact_id in candidates:
+                stored = self._tokens[fact_id]
+                if NEGATIONS.intersection(stored) != negations:
+                    continue
+                similarity = jaccard(tokens, stored)
+                # Prefer the most similar and, on ties, the most recent fact-check.
+                if similarity >= self.threshold and (best is None or (similarity, fact_id) > (best[1], best[0])):
+                    best = (fact_id, similarity)
+        return best
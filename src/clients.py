@@ -0,0 +1,52 @@
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Tuple
+from config.settings import settings
+from src.utils import load_prompts
+
+# Resolved from the package, so prompts load regardless of the working directory.
+PROMPTS_FILE = Path(__file__).resolve().parent.parent / "config" / "prompts.yaml"
+
+_chat_models: Dict[Tuple[str, float, int], Any] = {}
+_lock = threading.Lock()
+
+def get_chat_model(model_name: str, temperature: float, max_tokens: int):
+    """Returns the process-wide Gemini client for these parameters, creating it on first use.
+
+    Every PromptChains and SearchTools (and so every Streamlit session and
+    service worker) shares it, along with its HTTP connection pool. langchain
+    is only imported here, the first time a client is needed.
+    """
+    if "gemini" not in model_name:
+        raise ValueError(f"Unsupported LLM model: {model_name}. Only Gemini models are supported in this configuration.")
+    key = (model_name, temperature, max_tokens)
+    with _lock:
+        model = _chat_models.get(key)
+        if model is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            # Retries are handled by the shared "gemini" backend, so the SDK's own are disabled (1 = single attempt).
+            model = _chat_models[key] = ChatGoogleGenerativeAI(model=model_name, temperature=temperature, max_tokens=max_tokens,
+                                                               google_api_key=settings.GEMINI_API_KEY, max_retries=1)
+        return model
+
+@lru_cache(maxsize=None)
+def _load_prompts(path: str) -> Dict[str, str]:
+    return load_prompts(path)
+
+def get_prompts(path: Path = PROMPTS_FILE) -> Dict[str, str]:
+    """Returns the prompt templates, read from disk once per process. The dict is a copy the caller may modify."""
+    return dict(_load_prompts(str(path)))
+
+@lru_cache(maxsize=256)
+def compile_prompt(template: str):
+    """Returns the ChatPromptTemplate for a template string, parsing each distinct template once."""
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(template)
+
+def reset_clients():
+    """Drops the shared clients and cached prompts, so the next use builds them again (e.g. in tests)."""
+    with _lock:
+        _chat_models.clear()
+    _load_prompts.cache_clear()
+    compile_prompt.cache_clear()
@@ -1,14 +1,124 @@
 import sqlite3
 import json
 import logging
+import re
+import atexit
+import hashlib
+import os
+import queue
+import threading
+import zlib
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from src.budget import CLAIM_TYPES, normalize_claim_type
+from src.utils import canonical_text, is_time_sensitive
 
 DATABASE_FILE = "fact_checks.db"
+# Text fields at least this long are stored zlib-compressed (as a BLOB) when that makes them smaller.
+COMPRESS_MIN_BYTES = 256
+
+_local = threading.local()
+
+def get_connection() -> sqlite3.Connection:
+    """Returns this thread's connection to DATABASE_FILE, opening it on first use.
+
+    Connections are reused for the lifetime of the thread and run in WAL mode,
+    so readers never block on the background writer and vice versa.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DATABASE_FILE:
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(DATABASE_FILE, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _local.conn = conn
+        _local.path = DATABASE_FILE
+    return conn
+
+class _BatchedWriter:
+    """Applies database writes on a single background thread.
+
+    Jobs are callables taking a cursor. Whatever is queued when the thread wakes
+    up is applied in one transaction (each job under its own savepoint, so one
+    failing job doesn't roll back the others), which turns many small commits
+    into a few larger ones and keeps fsyncs off the request path.
+    """
+
+    def __init__(self, max_batch: int = 200):
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[Callable[[sqlite3.Cursor], Any], Future]]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, job: Callable[[sqlite3.Cursor], Any]) -> Future:
+        self._ensure_started()
+        future = Future()
+        self._queue.put((job, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None):
+        """Blocks until every write submitted so far has been committed."""
+        if self._thread is not None and self._thread.is_alive():
+            self.submit(lambda cursor: None).result(timeout)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply(batch)
+
+    def _apply(self, batch: List[Tuple[Callable[[sqlite3.Cursor], Any], Future]]):
+        outcomes = []
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            for job, future in batch:
+                cursor.execute("SAVEPOINT job")
+                try:
+                    outcomes.append((future, job(cursor), None))
+                    cursor.execute("RELEASE SAVEPOINT job")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT job")
+                    cursor.execute("RELEASE SAVEPOINT job")
+                    outcomes.append((future, None, e))
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error committing database writes: {e}")
+            outcomes = [(future, None, e) for _, future in batch]
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+_writer = _BatchedWriter()
+
+def flush_writes(timeout: Optional[float] = None):
+    """Waits for all queued database writes to be committed."""
+    _writer.flush(timeout)
+
+atexit.register(flush_writes)
 
 def init_db():
     """Initializes the SQLite database and creates the fact_checks table."""
-    conn = None
+    conn = get_connection()
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS fact_checks (
@@ -20,7 +130,15 @@ def init_db():
                 assumptions_verdicts TEXT,
                 gathered_evidence TEXT,
                 final_answer TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                spans TEXT,
+                parent_id INTEGER,
+                evidence_hash TEXT,
+                searched_assumptions TEXT,
+                checked_at DATETIME,
+                evidence_refs TEXT,
+                freshness_class TEXT,
+                superseded INTEGER NOT NULL DEFAULT 0
             )
         """)
         cursor.execute("PRAGMA table_info(fact_checks)")
@@ -28,70 +146,647 @@ def init_db():
         if 'claim_type' not in columns:
             cursor.execute("ALTER TABLE fact_checks ADD COLUMN claim_type TEXT")
             logging.info("Added 'claim_type' column to fact_checks table.")
+        # Added in this order, so SELECT * returns the same columns for old and new databases.
+        for column, column_type in [('spans', 'TEXT'), ('parent_id', 'INTEGER'), ('evidence_hash', 'TEXT'),
+                                    ('searched_assumptions', 'TEXT'), ('checked_at', 'DATETIME'), ('evidence_refs', 'TEXT'),
+                                    ('freshness_class', 'TEXT'), ('superseded', 'INTEGER NOT NULL DEFAULT 0')]:
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE fact_checks ADD COLUMN {column} {column_type}")
+                logging.info(f"Added '{column}' column to fact_checks table.")
+        if 'superseded' not in columns:
+            cursor.execute("UPDATE fact_checks SET superseded = 1 WHERE id IN (SELECT parent_id FROM fact_checks WHERE parent_id IS NOT NULL)")
+            cursor.executemany("UPDATE fact_checks SET freshness_class = ? WHERE id = ?",
+                               [(_freshness_class(claim, claim_type), fact_id)
+                                for fact_id, claim, claim_type in cursor.connection.execute("SELECT id, claim, claim_type FROM fact_checks")])
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_checks_timestamp ON fact_checks (timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_checks_claim ON fact_checks (claim)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_checks_parent ON fact_checks (parent_id)")
+        # Serves load_stale_fact_checks: the current versions of each freshness class, least recently checked first.
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fact_checks_stale ON fact_checks (freshness_class, COALESCE(checked_at, timestamp))
+            WHERE superseded = 0
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS assumptions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                canonical_text TEXT NOT NULL UNIQUE,
+                text TEXT NOT NULL,
+                verdict TEXT,
+                evidence TEXT,
+                source_urls TEXT,
+                verified_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                claim_type TEXT
+            )
+        """)
+        cursor.execute("PRAGMA table_info(assumptions)")
+        if 'claim_type' not in [info[1] for info in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE assumptions ADD COLUMN claim_type TEXT")
+            logging.info("Added 'claim_type' column to assumptions table.")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fact_check_assumptions (
+                fact_check_id INTEGER NOT NULL REFERENCES fact_checks (id) ON DELETE CASCADE,
+                assumption_id INTEGER NOT NULL REFERENCES assumptions (id) ON DELETE CASCADE,
+                PRIMARY KEY (fact_check_id, assumption_id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_check_assumptions_assumption ON fact_check_assumptions (assumption_id)")
+        # Evidence strings, stored once however many fact-checks cite them and keyed by a hash of their text.
+        # refs counts the fact-checks citing each one; the trigger drops strings nothing cites any more.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS evidence (
+                hash TEXT PRIMARY KEY,
+                content NOT NULL,
+                refs INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS fact_checks_evidence_release AFTER DELETE ON fact_checks
+            WHEN old.evidence_refs IS NOT NULL BEGIN
+                UPDATE evidence SET refs = refs - 1 WHERE hash IN (SELECT value FROM json_each(old.evidence_refs));
+                DELETE FROM evidence WHERE refs <= 0 AND hash IN (SELECT value FROM json_each(old.evidence_refs));
+            END
+        """)
+        _init_search_index(cursor)
 
         conn.commit()
         logging.info("Database initialized successfully.")
     except sqlite3.Error as e:
         logging.error(f"Error initializing database: {e}")
-    finally:
-        if conn:
-            conn.close()
+        # Don't leave the connection holding the write lock the background writer needs.
+        if conn.in_transaction:
+            conn.rollback()
+
+def _init_search_index(cursor: sqlite3.Cursor):
+    """Creates the FTS5 tables over claims, final answers and evidence.
+
+    Both are contentless, so the text is only stored (compressed) in
+    fact_checks and evidence. fact_checks_fts indexes each fact-check's claim
+    and final answer; evidence_fts indexes each evidence string once, under a
+    rowid derived from its hash, and fact_check_evidence links it back to the
+    fact-checks citing it. Rows are indexed by _insert_fact_check, which has
+    the uncompressed text. Contentless tables can only forget a row given its
+    original text, so clear_fact_checks empties them wholesale, and entries of
+    rows deleted any other way are left behind and filtered out by the join
+    against fact_checks.
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'fact_checks_fts'")
+    row = cursor.fetchone()
+    # Earlier versions kept a full copy of every field inside the FTS table.
+    if row is not None and "content" not in row[0]:
+        cursor.execute("DROP TABLE fact_checks_fts")
+        row = None
+    # Earlier versions indexed and deleted rows with triggers, which can't read compressed fields.
+    for trigger in ("fact_checks_fts_insert", "fact_checks_fts_update", "fact_checks_fts_delete"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    # The evidence column only holds evidence stored inline by versions that didn't deduplicate it.
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS fact_checks_fts
+        USING fts5(claim, final_answer, evidence, content = '', tokenize = 'porter unicode61')
+    """)
+    cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS evidence_fts USING fts5(content, content = '', tokenize = 'porter unicode61')")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fact_check_evidence (
+            evidence_id INTEGER NOT NULL,
+            fact_check_id INTEGER NOT NULL,
+            PRIMARY KEY (evidence_id, fact_check_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_check_evidence_fact_check ON fact_check_evidence (fact_check_id)")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS fact_checks_evidence_unlink AFTER DELETE ON fact_checks BEGIN
+            DELETE FROM fact_check_evidence WHERE fact_check_id = old.id;
+        END
+    """)
+    if row is None:
+        cursor.execute("INSERT INTO evidence_fts (evidence_fts) VALUES ('delete-all')")
+        cursor.execute("DELETE FROM fact_check_evidence")
+        cursor.executemany(INSERT_EVIDENCE_INDEX_SQL, ((_evidence_rowid(key), _unpack(content))
+                                                       for key, content in cursor.connection.execute("SELECT hash, content FROM evidence")))
+        count = 0
+        for fact_id, claim, final_answer, inline_evidence, evidence_refs in cursor.connection.execute(
+                "SELECT id, claim, final_answer, gathered_evidence, evidence_refs FROM fact_checks"):
+            legacy_evidence = " ".join(json.loads(inline_evidence)) if evidence_refs is None and inline_evidence else ""
+            cursor.execute(INSERT_SEARCH_INDEX_SQL, (fact_id, claim, _unpack(final_answer), legacy_evidence))
+            cursor.executemany(INSERT_EVIDENCE_LINK_SQL, [(_evidence_rowid(key), fact_id) for key in json.loads(evidence_refs or "[]")])
+            count += 1
+        logging.info(f"Built full-text search index for {count} existing fact-checks.")
+
+INSERT_SEARCH_INDEX_SQL = "INSERT INTO fact_checks_fts (rowid, claim, final_answer, evidence) VALUES (?, ?, ?, ?)"
+INSERT_EVIDENCE_INDEX_SQL = "INSERT INTO evidence_fts (rowid, content) VALUES (?, ?)"
+INSERT_EVIDENCE_LINK_SQL = "INSERT OR IGNORE INTO fact_check_evidence (evidence_id, fact_check_id) VALUES (?, ?)"
+
+def _pack(text: Optional[str]) -> Union[str, bytes, None]:
+    """Returns text as stored: zlib-compressed bytes when it is long and compresses, otherwise unchanged."""
+    if text is None or len(text) < COMPRESS_MIN_BYTES:
+        return text
+    raw = text.encode("utf-8")
+    compressed = zlib.compress(raw)
+    return compressed if len(compressed) < len(raw) else text
+
+def _unpack(value: Union[str, bytes, None]) -> Optional[str]:
+    return zlib.decompress(value).decode("utf-8") if isinstance(value, bytes) else value
+
+def _evidence_key(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def _evidence_rowid(key: str) -> int:
+    """The evidence_fts rowid of an evidence hash: its first 60 bits, which fit a positive SQLite integer."""
+    return int(key[:15], 16)
+
+def _load_evidence(fact_id: int, keys: List[str]) -> List[str]:
+    if not keys:
+        return []
+    rows = dict(get_connection().execute(
+        f"SELECT hash, content FROM evidence WHERE hash IN ({', '.join('?' for _ in set(keys))})", list(set(keys))))
+    missing = [key for key in keys if key not in rows]
+    if missing:
+        logging.error(f"Fact-check {fact_id} cites {len(missing)} evidence strings that are missing from the database; returning the rest.")
+    return [_unpack(rows[key]) for key in keys if key in rows]
+
+def _fact_check_columns(fact_check_data: dict) -> Dict[str, Any]:
+    return {
+        'claim': fact_check_data.get('claim'),
+        'claim_type': fact_check_data.get('claim_type'),
+        'initial_response': _pack(fact_check_data.get('initial_response')),
+        'assumptions': _pack(json.dumps(fact_check_data.get('assumptions'))),
+        'assumptions_verdicts': _pack(json.dumps(fact_check_data.get('assumptions_verdicts'))),
+        'evidence_refs': json.dumps([_evidence_key(e) for e in fact_check_data.get('gathered_evidence') or []]),
+        'final_answer': _pack(fact_check_data.get('final_answer')),
+        'spans': _pack(json.dumps(fact_check_data['spans'])) if fact_check_data.get('spans') else None,
+        'parent_id': fact_check_data.get('parent_id'),
+        'freshness_class': _freshness_class(fact_check_data.get('claim') or "", fact_check_data.get('claim_type')),
+        'evidence_hash': fact_check_data.get('evidence_hash'),
+        'searched_assumptions': json.dumps(fact_check_data['searched_assumptions']) if fact_check_data.get('searched_assumptions') is not None else None
+    }
+
+def _log_write_error(description: str, future: Future):
+    if future.exception() is not None:
+        logging.error(f"Error saving {description} to database: {future.exception()}")
+
+def _insert_fact_check(cursor: sqlite3.Cursor, fact_check_data: dict, restore: bool = False) -> Optional[int]:
+    """Inserts a fact-check, its evidence and its search index entry, and returns its id.
+
+    With restore (used by imports), the row keeps whichever of id, timestamp
+    and checked_at fact_check_data has; it is skipped, returning None, if
+    that id is taken.
+    """
+    columns = _fact_check_columns(fact_check_data)
+    if restore:
+        columns.update({key: fact_check_data[key] for key in ('id', 'timestamp', 'checked_at') if fact_check_data.get(key) is not None})
+    evidence = fact_check_data.get('gathered_evidence') or []
+    cursor.execute(f"INSERT {'OR IGNORE ' if restore else ''}INTO fact_checks ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                   tuple(columns.values()))
+    if cursor.rowcount == 0:
+        return None
+    fact_id = cursor.lastrowid
+    if fact_check_data.get('parent_id') is not None:
+        cursor.execute("UPDATE fact_checks SET superseded = 1 WHERE id = ?", (fact_check_data['parent_id'],))
+    keys = {_evidence_key(e): e for e in dict.fromkeys(evidence)}
+    if keys:
+        # Only evidence no other fact-check cites yet goes into the search index.
+        known = {key for (key,) in cursor.execute(
+            f"SELECT hash FROM evidence WHERE hash IN ({', '.join('?' for _ in keys)})", list(keys))}
+        cursor.executemany("""
+            INSERT INTO evidence (hash, content, refs) VALUES (?, ?, 1)
+            ON CONFLICT (hash) DO UPDATE SET refs = refs + 1
+        """, [(key, _pack(e)) for key, e in keys.items()])
+        cursor.executemany(INSERT_EVIDENCE_INDEX_SQL, [(_evidence_rowid(key), e) for key, e in keys.items() if key not in known])
+        cursor.executemany(INSERT_EVIDENCE_LINK_SQL, [(_evidence_rowid(key), fact_id) for key in keys])
+    cursor.execute(INSERT_SEARCH_INDEX_SQL, (fact_id, fact_check_data.get('claim'), fact_check_data.get('final_answer'), ""))
+    # Link the claim to the stored verdicts of its assumptions. Verdicts are queued
+    # on the same writer before the fact-check itself, so they already exist here.
+    canonical = [canonical_text(a) for a in fact_check_data.get('assumptions') or []]
+    if canonical:
+        placeholders = ", ".join("?" for _ in canonical)
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO fact_check_assumptions (fact_check_id, assumption_id)
+            SELECT ?, id FROM assumptions WHERE canonical_text IN ({placeholders})
+        """, (fact_id, *canonical))
+    return fact_id
+
+def save_fact_check(fact_check_data: dict) -> Future:
+    """Queues a fact-check result for saving.
+
+    Returns a Future that resolves to the new row id once the write is
+    committed; callers that don't need the id can ignore it.
+    """
+    def insert(cursor: sqlite3.Cursor) -> int:
+        fact_id = _insert_fact_check(cursor, fact_check_data)
+        logging.info(f"Fact-check for claim '{fact_check_data.get('claim')}' saved to database.")
+        return fact_id
+
+    future = _writer.submit(insert)
+    future.add_done_callback(lambda f: _log_write_error("fact-check", f))
+    return future
+
+def save_fact_checks(fact_checks: List[dict]) -> Optional[List[int]]:
+    """Saves several fact-check results in a single transaction and waits for the commit.
+
+    Returns the new row ids in input order, or None if the write failed.
+    """
+    if not fact_checks:
+        return []
+
+    def insert_many(cursor: sqlite3.Cursor) -> List[int]:
+        return [_insert_fact_check(cursor, data) for data in fact_checks]
 
-def save_fact_check(fact_check_data: dict):
-    """Saves a fact-check result to the database."""
-    conn = None
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
+        ids = _writer.submit(insert_many).result()
+        logging.info(f"Saved {len(fact_checks)} fact-checks to database.")
+        return ids
+    except sqlite3.Error as e:
+        logging.error(f"Error saving fact-checks to database: {e}")
+        return None
+
+def clear_fact_checks():
+    """Deletes every stored fact-check and assumption verdict."""
+    try:
+        def clear(cursor: sqlite3.Cursor):
+            cursor.execute("DELETE FROM fact_checks")
+            cursor.execute("DELETE FROM evidence")
+            cursor.execute("DELETE FROM fact_check_evidence")
+            cursor.execute("INSERT INTO fact_checks_fts (fact_checks_fts) VALUES ('delete-all')")
+            cursor.execute("INSERT INTO evidence_fts (evidence_fts) VALUES ('delete-all')")
+            cursor.execute("DELETE FROM assumptions")
+
+        _writer.submit(clear).result()
+        logging.info("Cleared all fact-checks from database.")
+    except sqlite3.Error as e:
+        logging.error(f"Error clearing fact-checks from database: {e}")
+
+def save_assumption_verdict(assumption: str, verdict: str, evidence: Optional[str], source_urls: List[str],
+                            claim_type: Optional[str] = None) -> Future:
+    """Queues a verified assumption for storage, replacing any older verdict for the same canonical text.
+
+    claim_type is the type of the claim the verdict was reached for, which
+    decides how long it may be reused.
+    """
+    def upsert(cursor: sqlite3.Cursor):
         cursor.execute("""
-            INSERT INTO fact_checks (claim, claim_type, initial_response, assumptions, assumptions_verdicts, gathered_evidence, final_answer)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            fact_check_data.get('claim'),
-            fact_check_data.get('claim_type'),
-            fact_check_data.get('initial_response'),
-            json.dumps(fact_check_data.get('assumptions')),
-            json.dumps(fact_check_data.get('assumptions_verdicts')),
-            json.dumps(fact_check_data.get('gathered_evidence')),
-            fact_check_data.get('final_answer')
-        ))
-        conn.commit()
-        logging.info(f"Fact-check for claim '{fact_check_data.get('claim')}' saved to database.")
+            INSERT INTO assumptions (canonical_text, text, verdict, evidence, source_urls, claim_type)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (canonical_text) DO UPDATE SET
+                text = excluded.text,
+                verdict = excluded.verdict,
+                evidence = excluded.evidence,
+                source_urls = excluded.source_urls,
+                claim_type = excluded.claim_type,
+                verified_at = CURRENT_TIMESTAMP
+        """, (canonical_text(assumption), assumption, verdict, evidence, json.dumps(source_urls), claim_type))
+
+    future = _writer.submit(upsert)
+    future.add_done_callback(lambda f: _log_write_error("assumption verdict", f))
+    return future
+
+def load_assumption_verdict(assumption: str) -> Optional[dict]:
+    """Returns the stored verdict for an assumption, with the claim_type it was stored for and its age_hours."""
+    try:
+        cursor = get_connection().cursor()
+        cursor.execute("""
+            SELECT id, text, verdict, evidence, source_urls, verified_at, claim_type,
+                   (julianday('now') - julianday(verified_at)) * 24
+            FROM assumptions
+            WHERE canonical_text = ?
+        """, (canonical_text(assumption),))
+        row = cursor.fetchone()
     except sqlite3.Error as e:
-        logging.error(f"Error saving fact-check to database: {e}")
-    finally:
-        if conn:
-            conn.close()
+        logging.error(f"Error loading assumption verdict from database: {e}")
+        return None
+    if row is None:
+        return None
+    return {
+        'id': row[0],
+        'text': row[1],
+        'verdict': row[2],
+        'evidence': row[3],
+        'source_urls': json.loads(row[4]) if row[4] else [],
+        'verified_at': row[5],
+        'claim_type': row[6],
+        'age_hours': row[7]
+    }
+
+def _row_to_fact_check(row: tuple) -> dict:
+    """Decodes a full fact_checks row, decompressing its fields and loading its evidence."""
+    evidence_refs = row[14] if len(row) > 14 else None
+    return {
+        'id': row[0],
+        'claim': row[1],
+        'claim_type': row[2],
+        'initial_response': _unpack(row[3]),
+        'assumptions': json.loads(_unpack(row[4])) if row[4] else [],
+        'assumptions_verdicts': json.loads(_unpack(row[5])) if row[5] else [],
+        # Rows written before evidence was deduplicated keep it inline.
+        'gathered_evidence': _load_evidence(row[0], json.loads(evidence_refs)) if evidence_refs is not None else (json.loads(row[6]) if row[6] else []),
+        'final_answer': _unpack(row[7]),
+        'timestamp': row[8],
+        'spans': json.loads(_unpack(row[9])) if len(row) > 9 and row[9] else [],
+        'parent_id': row[10] if len(row) > 10 else None,
+        'evidence_hash': row[11] if len(row) > 11 else None,
+        'searched_assumptions': json.loads(row[12]) if len(row) > 12 and row[12] is not None else None,
+        'checked_at': row[13] if len(row) > 13 else None
+    }
 
 def load_all_fact_checks() -> list:
     """Loads all fact-check results from the database."""
-    conn = None
     fact_checks = []
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
         cursor.execute("SELECT * FROM fact_checks ORDER BY timestamp ASC")
         rows = cursor.fetchall()
-        logging.info(f"Raw rows loaded from DB: {rows}") # Added logging
         for row in rows:
-            fact_checks.append({
-                'id': row[0],
-                'claim': row[1],
-                'claim_type': row[2],
-                'initial_response': row[3],
-                'assumptions': json.loads(row[4]) if row[4] else [],
-                'assumptions_verdicts': json.loads(row[5]) if row[5] else [],
-                'gathered_evidence': json.loads(row[6]) if row[6] else [],
-                'final_answer': row[7],
-                'timestamp': row[8]
-            })
+            fact_checks.append(_row_to_fact_check(row))
         logging.info(f"Loaded {len(fact_checks)} fact-checks from database.")
     except sqlite3.Error as e:
         logging.error(f"Error loading fact-checks from database: {e}")
     except json.JSONDecodeError as e: # Added JSON decode error handling
         logging.error(f"JSON decoding error in load_all_fact_checks: {e}. This might be due to old data format.")
         logging.error("Consider deleting fact_checks.db and rerunning if this persists.")
+    return fact_checks
+
+# A separate WHERE clause per case, so SQLite can seek to before_id in the rowid index instead of scanning.
+HISTORY_PAGE_SQL = """
+    SELECT id, substr(claim, 1, ?), length(claim) > ?, claim_type, timestamp
+    FROM fact_checks
+    {where}
+    ORDER BY id DESC
+    LIMIT ?
+"""
+
+def load_history_page(before_id: Optional[int] = None, limit: int = 20, claim_chars: int = 80) -> Tuple[List[dict], Optional[int]]:
+    """Loads one page of history summaries, newest first.
+
+    Only id, a truncated claim, claim_type and timestamp are read, and paging is
+    keyset-based (id < before_id) so every page costs the same regardless of how
+    deep it is. Returns the rows and the before_id of the next (older) page, or
+    None when this is the last page.
+    """
+    try:
+        cursor = get_connection().cursor()
+        if before_id is None:
+            cursor.execute(HISTORY_PAGE_SQL.format(where=""), (claim_chars, claim_chars, limit + 1))
+        else:
+            cursor.execute(HISTORY_PAGE_SQL.format(where="WHERE id < ?"), (claim_chars, claim_chars, before_id, limit + 1))
+        rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        logging.error(f"Error loading fact-check history from database: {e}")
+        return [], None
+    page = [{
+        'id': row[0],
+        'claim': row[1] + "..." if row[2] else row[1],
+        'claim_type': row[3],
+        'timestamp': row[4]
+    } for row in rows[:limit]]
+    next_before_id = page[-1]['id'] if len(rows) > limit else None
+    return page, next_before_id
+
+def search_fact_checks(query: str, limit: int = 20) -> List[dict]:
+    """Full-text searches claims, final answers and evidence, best matches first.
+
+    Each result has id, claim, claim_type, timestamp and a snippet with the
+    matching terms wrapped in ** for Markdown highlighting. Every term must
+    appear in the claim, the final answer or one of the cited evidence
+    strings. The index stores no text, so snippets are cut from the
+    decompressed fields of the returned rows.
+    """
+    # Quote every word so user input can't be misread as FTS5 query syntax.
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return []
+    quoted = [f'"{term}"' for term in terms]
+    # Claims and evidence live in separate indexes, so each term is matched in either and the matches intersected.
+    term_matches = """
+        SELECT rowid FROM fact_checks_fts WHERE fact_checks_fts MATCH ?
+        UNION
+        SELECT fact_check_id FROM fact_check_evidence
+        WHERE evidence_id IN (SELECT rowid FROM evidence_fts WHERE evidence_fts MATCH ?)
+    """
+    try:
+        cursor = get_connection().cursor()
+        cursor.execute(f"""
+            WITH matches (id) AS ({" INTERSECT ".join(term_matches for _ in terms)}),
+            text_rank (id, rank) AS MATERIALIZED (
+                SELECT rowid, bm25(fact_checks_fts, 10.0, 3.0, 1.0) FROM fact_checks_fts WHERE fact_checks_fts MATCH ?
+            ),
+            evidence_hits (id, rank) AS MATERIALIZED (
+                SELECT rowid, bm25(evidence_fts) FROM evidence_fts WHERE evidence_fts MATCH ?
+            ),
+            evidence_rank (id, rank) AS (
+                SELECT l.fact_check_id, MIN(e.rank)
+                FROM evidence_hits e
+                JOIN fact_check_evidence l ON l.evidence_id = e.id
+                WHERE l.fact_check_id IN matches
+                GROUP BY l.fact_check_id
+            )
+            SELECT fc.id, fc.claim, fc.claim_type, fc.timestamp, fc.final_answer, fc.gathered_evidence, fc.evidence_refs
+            FROM matches m
+            JOIN fact_checks fc ON fc.id = m.id
+            LEFT JOIN text_rank t ON t.id = m.id
+            LEFT JOIN evidence_rank e ON e.id = m.id
+            ORDER BY COALESCE(t.rank, 0) + COALESCE(e.rank, 0)
+            LIMIT ?
+        """, (*(q for term in quoted for q in (term, term)), " OR ".join(quoted), " OR ".join(quoted), limit))
+        rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        logging.error(f"Error searching fact-checks: {e}")
+        return []
+    results = []
+    for fact_id, claim, claim_type, timestamp, final_answer, inline_evidence, evidence_refs in rows:
+        # The snippet comes from whichever field matches the most terms, reading evidence only if needed.
+        snippets = [_snippet(claim, terms), _snippet(_unpack(final_answer), terms)]
+        if max(matched for _, matched in snippets) < len(set(term.lower() for term in terms)):
+            evidence = _load_evidence(fact_id, json.loads(evidence_refs)) if evidence_refs is not None else json.loads(inline_evidence or "[]")
+            snippets += [_snippet(text, terms) for text in evidence]
+        results.append({
+            'id': fact_id,
+            'claim': claim,
+            'claim_type': claim_type,
+            'timestamp': timestamp,
+            'snippet': max(snippets, key=lambda snippet: snippet[1])[0]
+        })
+    return results
+
+def _term_matches(word: str, term: str) -> bool:
+    """Approximates the index's porter stemming: equal words, or ones differing only in a short suffix."""
+    word, term = word.lower(), term.lower()
+    if word == term:
+        return True
+    stem = len(os.path.commonprefix([word, term]))
+    return stem >= 3 and stem >= max(len(word), len(term)) - 3
+
+def _snippet(text: Optional[str], terms: List[str], words: int = 12) -> Tuple[str, int]:
+    """Returns up to words words of text around its first match with ** around every match, and how many distinct terms it matches."""
+    tokens = list(re.finditer(r"\w+", text or ""))
+    matched = {term.lower() for token in tokens for term in terms if _term_matches(token.group(), term)}
+    hits = [i for i, token in enumerate(tokens) if any(_term_matches(token.group(), term) for term in terms)]
+    if not hits:
+        return "", 0
+    start = max(0, min(hits[0] - words // 4, len(tokens) - words))
+    end = min(len(tokens), start + words)
+    pieces = []
+    position = tokens[start].start()
+    for i in range(start, end):
+        token = tokens[i]
+        pieces.append(text[position:token.start()])
+        pieces.append(f"**{token.group()}**" if i in hits else token.group())
+        position = token.end()
+    return ("…" if start > 0 else "") + "".join(pieces).strip() + ("…" if end < len(tokens) else ""), len(matched)
+
+def load_fact_check(fact_id: int) -> Optional[dict]:
+    """Loads a single fact-check result by id."""
+    try:
+        cursor = get_connection().cursor()
+        cursor.execute("SELECT * FROM fact_checks WHERE id = ?", (fact_id,))
+        row = cursor.fetchone()
+        return _row_to_fact_check(row) if row else None
+    except (sqlite3.Error, json.JSONDecodeError) as e:
+        logging.error(f"Error loading fact-check {fact_id} from database: {e}")
+        return None
+
+def iter_claims() -> Iterator[Tuple[int, str]]:
+    """Yields (id, claim) for every stored fact-check without loading the other columns."""
+    try:
+        yield from get_connection().execute("SELECT id, claim FROM fact_checks")
+    except sqlite3.Error as e:
+        logging.error(f"Error reading claims from database: {e}")
+
+_NEWS_SUFFIX = "/news"
+
+def _freshness_class(claim: str, claim_type: Optional[str]) -> str:
+    """The claim type, marked when the claim is about recent events; stored so staleness can be queried by class."""
+    return normalize_claim_type(claim_type) + (_NEWS_SUFFIX if is_time_sensitive(claim) else "")
+
+def _class_freshness_hours(freshness_class: str, windows: Dict[str, float], news_hours: float) -> float:
+    news = freshness_class.endswith(_NEWS_SUFFIX)
+    claim_type = freshness_class[:-len(_NEWS_SUFFIX)] if news else freshness_class
+    hours = float(windows.get(claim_type, windows.get("default", 0)))
+    if hours > 0 and news:
+        hours = min(hours, news_hours)
+    return hours
+
+def fact_check_freshness_hours(claim: str, claim_type: Optional[str], windows: Dict[str, float], news_hours: float) -> float:
+    """How long a stored fact-check stays fresh, by claim type; claims about recent events use news_hours when that is shorter.
+
+    0 means the fact-check never goes stale.
+    """
+    return _class_freshness_hours(_freshness_class(claim, claim_type), windows, news_hours)
+
+def load_stale_fact_checks(windows: Dict[str, float], news_hours: float, limit: int = 20) -> List[dict]:
+    """Returns up to limit current fact-checks that are older than their freshness window, least recently checked first.
+
+    Only the latest version of each fact-check is considered, and its age
+    counts from when it was last checked by the refresh job, if it was. Each
+    freshness class is one indexed range scan of at most limit rows, so the
+    cost doesn't grow with the size of the history.
+    """
+    candidates = []
+    try:
+        cursor = get_connection().cursor()
+        for claim_type in CLAIM_TYPES:
+            for freshness_class in (claim_type, claim_type + _NEWS_SUFFIX):
+                hours = _class_freshness_hours(freshness_class, windows, news_hours)
+                if hours <= 0:
+                    continue
+                cursor.execute("""
+                    SELECT *, COALESCE(checked_at, timestamp) FROM fact_checks
+                    WHERE superseded = 0 AND freshness_class = ? AND COALESCE(checked_at, timestamp) < datetime('now', ?)
+                    ORDER BY COALESCE(checked_at, timestamp) LIMIT ?
+                """, (freshness_class, f"-{hours} hours", limit))
+                candidates.extend(cursor.fetchall())
+        candidates.sort(key=lambda row: row[-1])
+        return [_row_to_fact_check(row[:-1]) for row in candidates[:limit]]
+    except (sqlite3.Error, json.JSONDecodeError) as e:
+        logging.error(f"Error loading stale fact-checks from database: {e}")
+        return []
+
+def mark_fact_check_checked(fact_id: int) -> Future:
+    """Queues recording that a fact-check was found to be still current."""
+    def touch(cursor: sqlite3.Cursor):
+        cursor.execute("UPDATE fact_checks SET checked_at = CURRENT_TIMESTAMP WHERE id = ?", (fact_id,))
+
+    future = _writer.submit(touch)
+    future.add_done_callback(lambda f: _log_write_error("refresh time", f))
+    return future
+
+def load_fact_check_versions(fact_id: int) -> List[dict]:
+    """Returns every version of a fact-check (the one with fact_id, its predecessors and successors), newest first."""
+    try:
+        cursor = get_connection().cursor()
+        cursor.execute("""
+            WITH RECURSIVE
+                root (id) AS (
+                    SELECT id FROM fact_checks WHERE id = ?
+                    UNION SELECT fc.parent_id FROM fact_checks fc JOIN root ON fc.id = root.id WHERE fc.parent_id IS NOT NULL
+                ),
+                versions (id) AS (
+                    SELECT id FROM root
+                    UNION SELECT fc.id FROM fact_checks fc JOIN versions ON fc.parent_id = versions.id
+                )
+            SELECT * FROM fact_checks WHERE id IN (SELECT id FROM versions) ORDER BY id DESC
+        """, (fact_id,))
+        return [_row_to_fact_check(row) for row in cursor.fetchall()]
+    except (sqlite3.Error, json.JSONDecodeError) as e:
+        logging.error(f"Error loading versions of fact-check {fact_id}: {e}")
+        return []
+
+def iter_fact_checks(chunk_size: int = 500) -> Iterator[List[dict]]:
+    """Yields every stored fact-check, oldest first, in lists of up to chunk_size.
+
+    Pages are keyset-based (id > last id), so memory use is bounded by
+    chunk_size however large the table is.
+    """
+    last_id = 0
+    while True:
+        rows = get_connection().execute("SELECT * FROM fact_checks WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield [_row_to_fact_check(row) for row in rows]
+        last_id = rows[-1][0]
+
+def import_fact_checks(chunks: Iterable[List[dict]], renumber: bool = False,
+                       on_saved: Optional[Callable[[List[Tuple[int, str]]], None]] = None) -> int:
+    """Saves exported fact-checks, one transaction per chunk, and returns how many were added.
+
+    on_saved, if given, is called with the (id, claim) pairs of each chunk's
+    added rows once they are committed.
+
+    By default rows keep their ids and timestamps and ids already present are
+    skipped, so an interrupted import can simply be run again. With renumber,
+    rows get new ids (for merging into a database that has its own history) and
+    parent links are remapped through a temporary table on the writer's
+    connection rather than an in-memory map.
+    """
+    def reset_ids(cursor: sqlite3.Cursor):
+        cursor.execute("DROP TABLE IF EXISTS temp.import_ids")
+        if renumber:
+            cursor.execute("CREATE TEMP TABLE import_ids (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+
+    def insert_chunk(chunk: List[dict]) -> Callable[[sqlite3.Cursor], List[Tuple[int, str]]]:
+        def insert(cursor: sqlite3.Cursor) -> List[Tuple[int, str]]:
+            added = []
+            for data in chunk:
+                if renumber:
+                    data = dict(data)
+                    old_id = data.pop('id', None)
+                    if data.get('parent_id') is not None:
+                        row = cursor.execute("SELECT new_id FROM import_ids WHERE old_id = ?", (data['parent_id'],)).fetchone()
+                        data['parent_id'] = row[0] if row else None
+                fact_id = _insert_fact_check(cursor, data, restore=True)
+                if renumber and old_id is not None:
+                    cursor.execute("INSERT OR REPLACE INTO import_ids (old_id, new_id) VALUES (?, ?)", (old_id, fact_id))
+                if fact_id is not None:
+                    added.append((fact_id, data.get('claim')))
+            return added
+        return insert
+
+    _writer.submit(reset_ids).result()
+    added = 0
+    try:
+        for chunk in chunks:
+            saved = _writer.submit(insert_chunk(chunk)).result()
+            if on_saved is not None and saved:
+                on_saved(saved)
+            added += len(saved)
+            logging.info(f"Imported {added} fact-checks so far.")
     finally:
-        if conn:
-            conn.close()
-    return fact_checks
\ No newline at end of file
+        _writer.submit(lambda cursor: cursor.execute("DROP TABLE IF EXISTS temp.import_ids")).result()
+    return added
@@ -1,77 +1,608 @@
 from src.prompt_chains import PromptChains
 from src.search_tools import SearchTools
-from typing import List, Dict
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import contextvars
 import logging
+import queue
 import re
-from src.database import save_fact_check
+import threading
+from config.settings import settings
+from src.budget import PipelineMode, SEARCH_ALWAYS, SEARCH_NEVER, SEARCH_UNCERTAIN, current_budget, get_mode, start_budget
+from src.claim_index import ClaimIndex
+from src.retrieval import ResultPool, SharedSearch, evidence_hash
+from src.tracing import annotate, bind, span, start_trace, start_metrics_server, write_prometheus
+from src.database import (
+    save_fact_check, load_fact_check, iter_claims, save_assumption_verdict, load_assumption_verdict, fact_check_freshness_hours
+)
+from src.singleflight import SingleFlight
+from src.utils import canonical_text, is_time_sensitive
+
+# Stages reported by FactChecker.iter_process_claim, in the order they usually occur.
+DUPLICATE = "duplicate"
+CLASSIFICATION = "classification"
+INITIAL_RESPONSE = "initial_response"
+ASSUMPTIONS = "assumptions"
+ASSUMPTION_VERDICT = "assumption_verdict"
+EVIDENCE = "evidence"
+FINAL_ANSWER_CHUNK = "final_answer_chunk"
+RESULT = "result"
+
+# Verdict recorded for assumptions the claim's budget ran out before verifying.
+UNVERIFIED_VERDICT = "Uncertain - not verified within the pipeline's time and call budget."
+SEARCH_FAILED_VERDICT = "Uncertain - not verified because the search for evidence failed."
+
+def search_query(assumption: str) -> str:
+    """The web search run for an assumption."""
+    return f"{assumption} fact check"
+
+# The search results each assumption of the current claim got, for its evidence hash.
+_searches: contextvars.ContextVar[Optional[Dict[str, List[Dict]]]] = contextvars.ContextVar("searches", default=None)
+
+@contextmanager
+def _record_searches() -> Iterator[Dict[str, List[Dict]]]:
+    searches: Dict[str, List[Dict]] = {}
+    token = _searches.set(searches)
+    try:
+        yield searches
+    finally:
+        try:
+            _searches.reset(token)
+        except ValueError:
+            _searches.set(None)
+
+@dataclass
+class FactCheckEvent:
+    """A progress update from the fact-checking pipeline.
+
+    data holds the stage's output, e.g. {"claim_type": ...} for CLASSIFICATION,
+    {"index", "assumption", "verdict"} for ASSUMPTION_VERDICT, {"text": ...} for
+    FINAL_ANSWER_CHUNK and the complete result dict for RESULT.
+    """
+    stage: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+def _drain(events: Generator[FactCheckEvent, None, Any]) -> Any:
+    """Consumes an event generator and returns its return value."""
+    while True:
+        try:
+            next(events)
+        except StopIteration as stop:
+            return stop.value
+
+def _age_hours(timestamp: str) -> float:
+    """Hours since a stored SQLite timestamp, which is in UTC."""
+    stored = datetime.fromisoformat(timestamp)
+    if stored.tzinfo is None:
+        stored = stored.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - stored).total_seconds() / 3600
 
 class FactChecker:
-    def __init__(self, model_name: str = "gemini-pro", search_tool_name: str = "duckduckgo"):
+    def __init__(self, model_name: str = "gemini-pro", search_tool_name: str = "duckduckgo", max_concurrency: Optional[int] = None):
         self.prompt_chains = PromptChains(model_name=model_name)
         self.search_tools = SearchTools(search_tool_name=search_tool_name)
+        self.max_concurrency = max_concurrency if max_concurrency is not None else settings.VERIFICATION_CONCURRENCY
+        self.claim_index = ClaimIndex(threshold=settings.DUPLICATE_CLAIM_THRESHOLD)
+        self._claim_index_loaded = False
+        self._claim_index_lock = threading.Lock()
+        self._claims_in_flight = SingleFlight()
+        # Shared by every claim this instance checks, so threads aren't started per claim.
+        # Searches have their own pool, as verifications wait on them.
+        self._verify_executor = ThreadPoolExecutor(max_workers=max(1, self.max_concurrency), thread_name_prefix="verify")
+        self._search_executor = ThreadPoolExecutor(max_workers=max(1, self.max_concurrency), thread_name_prefix="search")
+        if settings.METRICS_PORT:
+            start_metrics_server(settings.METRICS_PORT)
+
+    def close(self, wait: bool = True):
+        """Stops the verification and search threads, cancelling queued work; with wait, running work finishes first."""
+        self._verify_executor.shutdown(wait=wait, cancel_futures=True)
+        self._search_executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _load_claim_index(self):
+        """Builds the near-duplicate index from stored claims on first use."""
+        with self._claim_index_lock:
+            if not self._claim_index_loaded:
+                self.claim_index.add_many(iter_claims())
+                self._claim_index_loaded = True
+                logging.info(f"Indexed {len(self.claim_index)} stored claims for duplicate lookup.")
+
+    def _index_saved_claim(self, saved: Future, claim: str):
+        if saved.exception() is None and saved.result() is not None:
+            self.index_claims([(saved.result(), claim)])
+
+    def index_claims(self, claims: Iterable[Tuple[int, str]]):
+        """Adds stored (id, claim) pairs saved outside process_claim, such as bulk saves and imports, to the duplicate lookup.
+
+        Nothing is done before the index is first loaded, as loading reads every stored claim anyway.
+        """
+        if self._claim_index_loaded:
+            for fact_id, claim in claims:
+                self.claim_index.add(fact_id, claim)
+
+    def find_previous_result(self, claim: str) -> Optional[Dict]:
+        """Returns a stored fact-check of a near-identical claim, if one exists and is still fresh.
+
+        Freshness follows FACT_CHECK_FRESHNESS_HOURS for the stored claim's
+        type, or FACT_CHECK_NEWS_FRESHNESS_HOURS for claims about recent
+        events, counting from when the refresh job last confirmed it.
+        """
+        self._load_claim_index()
+        match = self.claim_index.query(claim)
+        if match is None:
+            return None
+        fact_id, similarity = match
+        previous = load_fact_check(fact_id)
+        if previous is None:
+            return None
+        hours = fact_check_freshness_hours(previous['claim'], previous.get('claim_type'),
+                                           settings.FACT_CHECK_FRESHNESS_HOURS, settings.FACT_CHECK_NEWS_FRESHNESS_HOURS)
+        if hours > 0 and _age_hours(previous.get('checked_at') or previous['timestamp']) >= hours:
+            logging.info(f"Claim '{claim}' matches stored fact-check {fact_id}, but it is older than {hours:g} hours; checking again.")
+            return None
+        logging.info(f"Claim '{claim}' matches stored fact-check {fact_id} (similarity {similarity:.2f}).")
+        previous["duplicate_of"] = fact_id
+        previous["similarity"] = similarity
+        return previous
+
+    def _assumption_freshness_hours(self, assumption: str, claim_type: Optional[str]) -> float:
+        """How old a stored verdict for this assumption may be and still be reused."""
+        windows = settings.ASSUMPTION_FRESHNESS_HOURS
+        key = (claim_type or "").strip().strip(".").capitalize()
+        hours = float(windows.get(key, windows.get("default", 0)))
+        if is_time_sensitive(assumption):
+            hours = min(hours, settings.ASSUMPTION_NEWS_FRESHNESS_HOURS)
+        return hours
+
+    def _stored_outcome(self, assumption: str, index: int, policy: str) -> Optional[Tuple[str, Optional[str], List[FactCheckEvent]]]:
+        """Returns (verdict, evidence, events) from a fresh stored verdict for the assumption, if there is one.
+
+        Freshness is judged by the window of the claim type the verdict was
+        stored for. A verdict stored without evidence is only reused when the
+        current search policy wouldn't have searched for it either.
+        """
+        stored = load_assumption_verdict(assumption)
+        if stored is None or stored['age_hours'] >= self._assumption_freshness_hours(assumption, stored['claim_type']):
+            return None
+        if stored['evidence'] is None and self._needs_search(stored['verdict'], policy):
+            return None
+        logging.info(f"Reusing verdict for assumption '{assumption}' verified at {stored['verified_at']}.")
+        formatted_verdict = f"Assumption: {assumption} | Verdict: {stored['verdict']}"
+        events = [FactCheckEvent(ASSUMPTION_VERDICT, {"index": index, "assumption": assumption, "verdict": formatted_verdict, "reused": True})]
+        formatted_evidence = None
+        if stored['evidence'] is not None:
+            formatted_evidence = f"Assumption: {assumption}\nEvidence: {stored['evidence']}"
+            events.append(FactCheckEvent(EVIDENCE, {"index": index, "assumption": assumption, "evidence": formatted_evidence, "reused": True}))
+        return formatted_verdict, formatted_evidence, events
+
+    @staticmethod
+    def _needs_search(verdict: str, policy: str = SEARCH_ALWAYS) -> bool:
+        """Whether web evidence should be gathered for a verdict under the claim's search policy."""
+        lowered = verdict.lower()
+        if policy == SEARCH_NEVER:
+            return False
+        if policy == SEARCH_UNCERTAIN and re.match(r"\W*(true|false)\b", lowered):
+            return False
+        return "uncertain" in lowered or "false" in lowered or "true" in lowered
+
+    @staticmethod
+    def _unverified(assumption: str, index: int, verdict: str = UNVERIFIED_VERDICT) -> Tuple[str, FactCheckEvent]:
+        formatted_verdict = f"Assumption: {assumption} | Verdict: {verdict}"
+        return formatted_verdict, FactCheckEvent(ASSUMPTION_VERDICT, {"index": index, "assumption": assumption, "verdict": formatted_verdict, "unverified": True})
+
+    def _search(self, assumption: str) -> List[Dict]:
+        with span("search"):
+            results = self.search_tools.search(search_query(assumption), num_results=settings.SEARCH_RESULTS_PER_ASSUMPTION)
+        searches = _searches.get()
+        if searches is not None:
+            searches[assumption] = results
+        return results
+
+    def _search_and_summarize(self, assumption: str, shared: Optional[SharedSearch] = None) -> Tuple[str, List[str]]:
+        """Searches the web for an assumption and returns (summarized results, source URLs).
+
+        With shared, results are picked from the pool of every assumption's
+        searches for the claim instead of searching for this one alone. Either
+        way only the top results that fit the retrieval token budget are kept.
+        """
+        pool = shared.pool() if shared is not None else ResultPool({assumption: self._search(assumption)})
+        selected = pool.select(assumption, top_k=settings.RETRIEVAL_TOP_K, token_budget=settings.RETRIEVAL_TOKEN_BUDGET)
+        if shared is not None and not selected and shared.error(assumption) is not None:
+            # Other assumptions' results are used when they match; otherwise this one's search failure stands.
+            raise shared.error(assumption)
+        annotate(selected_results=len(selected))
+        if settings.FETCH_PAGES or current_budget().mode.fetch_pages:
+            with span("fetch_pages"):
+                selected = self.search_tools.fetch_pages(selected)
+        source_urls = [r['href'] for r in selected if r.get('href')]
+        processed_search_results = self.search_tools.process_results(selected)
+
+        with span("summary"):
+            summarized_evidence_text = self.search_tools.summarize_search_results(processed_search_results, query=assumption)
+        return summarized_evidence_text, source_urls
+
+    def _verify_assumption(self, assumption: str, emit: Optional[Callable[[FactCheckEvent], None]] = None, index: int = 0,
+                           shared: Optional[SharedSearch] = None, policy: str = SEARCH_ALWAYS,
+                           claim_type: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Verifies a single assumption and gathers web evidence for it when needed and the budget allows."""
+        emit = emit or (lambda event: None)
+        budget = current_budget()
+        if not budget.try_llm_call():
+            formatted_verdict, event = self._unverified(assumption, index)
+            emit(event)
+            return formatted_verdict, None
+        with span("verdict", index=index):
+            verdict = self.prompt_chains.verification_loop_chain(assumption)
+        logging.debug(f"Assumption: {assumption}\nVerdict: {verdict}")
+        formatted_verdict = f"Assumption: {assumption} | Verdict: {verdict}"
+        emit(FactCheckEvent(ASSUMPTION_VERDICT, {"index": index, "assumption": assumption, "verdict": formatted_verdict}))
+
+        evidence = None
+        source_urls = []
+        if self._needs_search(verdict, policy):
+            # The evidence call is reserved first, so no search is spent on results that can't be used.
+            # Without a prefetched pool this assumption needs a search of its own.
+            reserved = budget.try_llm_call()
+            if reserved and not (shared is not None or budget.take_searches(1)):
+                budget.release_llm_call()
+                reserved = False
+            if reserved:
+                try:
+                    summarized_evidence_text, source_urls = self._search_and_summarize(assumption, shared)
+                except Exception as e:
+                    # Not stored, so the next claim with this assumption searches again.
+                    logging.error(f"Search for assumption '{assumption}' failed: {e}")
+                    budget.release_llm_call()
+                    formatted_verdict, event = self._unverified(assumption, index, SEARCH_FAILED_VERDICT)
+                    emit(event)
+                    return formatted_verdict, None
+                with span("evidence", index=index):
+                    evidence = self.prompt_chains.evidence_gathering_chain(assumption, summarized_evidence_text)
+                logging.debug(f"Evidence for '{assumption}': {evidence}")
+                save_assumption_verdict(assumption, verdict, evidence, source_urls, claim_type)
+        else:
+            save_assumption_verdict(assumption, verdict, evidence, source_urls, claim_type)
+        if evidence is None:
+            return formatted_verdict, None
+        formatted_evidence = f"Assumption: {assumption}\nEvidence: {evidence}"
+        emit(FactCheckEvent(EVIDENCE, {"index": index, "assumption": assumption, "evidence": formatted_evidence}))
+        return formatted_verdict, formatted_evidence
+
+    def _iter_verify_assumptions(self, assumptions: List[str], claim_type: Optional[str] = None,
+                                 reuse_verdicts: bool = True) -> Generator[FactCheckEvent, None, Tuple[List[str], List[str]]]:
+        """Verifies assumptions on the instance's thread pools, yielding events as each one progresses.
+
+        Unless reuse_verdicts is off, a fresh verdict stored by an earlier claim
+        is reused instead of calling the LLM and searching again. When the claim type calls for searching
+        every assumption, the remaining ones are searched for up front, in
+        parallel with their verdict calls, so every assumption's evidence can be
+        drawn from the claim's pooled, deduplicated results. Assumptions still
+        running when the budget's deadline passes are abandoned and reported as
+        unverified. Returns the verdict and evidence lists in input order, so
+        they are identical to a serial run regardless of completion order.
+        """
+        if settings.BATCH_VERIFICATION and len(assumptions) > 1:
+            return (yield from self._iter_verify_assumptions_batched(assumptions, claim_type, reuse_verdicts))
+
+        outcomes: List[Optional[Tuple[str, Optional[str]]]] = [None] * len(assumptions)
+        budget = current_budget()
+        policy = budget.mode.search_policy(claim_type)
+        pending = []
+        for index, assumption in enumerate(assumptions):
+            stored = self._stored_outcome(assumption, index, policy) if reuse_verdicts else None
+            if stored is None:
+                pending.append(index)
+                continue
+            formatted_verdict, formatted_evidence, stored_events = stored
+            outcomes[index] = (formatted_verdict, formatted_evidence)
+            annotate(reused_verdicts=1)
+            yield from stored_events
+
+        if pending:
+            prefetch = [assumptions[i] for i in pending] if policy == SEARCH_ALWAYS else []
+            prefetch = prefetch[:budget.take_searches(len(prefetch))] if prefetch else []
+            events: "queue.Queue[Optional[FactCheckEvent]]" = queue.Queue()
+            shared = SharedSearch(self._search, prefetch, self._search_executor) if prefetch else None
+            futures = {}
+            timed_out = False
+            try:
+
+                def run(index: int):
+                    try:
+                        with span("verify_assumption", index=index):
+                            return self._verify_assumption(assumptions[index], events.put, index, shared, policy, claim_type)
+                    finally:
+                        events.put(None)
+
+                futures = {index: self._verify_executor.submit(bind(run), index) for index in pending}
+                finished = 0
+                while finished < len(futures):
+                    try:
+                        event = events.get(timeout=budget.wait_timeout())
+                    except queue.Empty:
+                        if not budget.expired():
+                            continue
+                        timed_out = True
+                        break
+                    if event is None:
+                        finished += 1
+                    else:
+                        yield event
+                for index, future in futures.items():
+                    if future.done() and not future.cancelled():
+                        outcomes[index] = future.result()
+                    else:
+                        formatted_verdict, event = self._unverified(assumptions[index], index)
+                        outcomes[index] = (formatted_verdict, None)
+                        yield event
+                if shared is not None and not timed_out:
+                    # Prefetched searches no verdict ended up needing still count towards the evidence hash.
+                    shared.pool()
+            finally:
+                # Past the deadline, queued work is dropped and running verifications are left to finish in the background.
+                if timed_out:
+                    for future in futures.values():
+                        future.cancel()
+                    if shared is not None:
+                        shared.cancel()
+
+        assumptions_verdicts = [verdict for verdict, _ in outcomes]
+        gathered_evidence_list = [evidence for _, evidence in outcomes if evidence is not None]
+        return assumptions_verdicts, gathered_evidence_list
+
+    def _iter_verify_assumptions_batched(self, assumptions: List[str], claim_type: Optional[str],
+                                         reuse_verdicts: bool = True) -> Generator[FactCheckEvent, None, Tuple[List[str], List[str]]]:
+        """Verifies assumptions with batched LLM calls: a few chunks of verdicts, then a few chunks of evidence.
+
+        Searches and summaries still run concurrently per assumption in between.
+        The chains charge every chunk (and every retry) to the claim's budget,
+        and assumptions the budget doesn't reach are reported as unverified.
+        """
+        budget = current_budget()
+        policy = budget.mode.search_policy(claim_type)
+        verdicts: List[Optional[str]] = [None] * len(assumptions)
+        evidence: List[Optional[str]] = [None] * len(assumptions)
+        pending = []
+        for index, assumption in enumerate(assumptions):
+            stored = self._stored_outcome(assumption, index, policy) if reuse_verdicts else None
+            if stored is None:
+                pending.append(index)
+                continue
+            verdicts[index], evidence[index], events = stored
+            annotate(reused_verdicts=1)
+            yield from events
+
+        raw_verdicts = {}
+        if pending:
+            with span("verdict", assumptions=len(pending)):
+                raw_verdicts = dict(zip(pending, self.prompt_chains.batch_verification_chain([assumptions[i] for i in pending])))
+        for index in pending:
+            if raw_verdicts[index] is None:
+                # The budget ran out before this assumption's chunk or retry.
+                verdicts[index], event = self._unverified(assumptions[index], index)
+                yield event
+                continue
+            verdicts[index] = f"Assumption: {assumptions[index]} | Verdict: {raw_verdicts[index]}"
+            logging.debug(f"Assumption: {assumptions[index]}\nVerdict: {raw_verdicts[index]}")
+            yield FactCheckEvent(ASSUMPTION_VERDICT, {"index": index, "assumption": assumptions[index], "verdict": verdicts[index]})
+        pending = [i for i in pending if raw_verdicts[i] is not None]
+
+        to_search = [i for i in pending if self._needs_search(raw_verdicts[i], policy)]
+        searched = {}
+        raw_evidence = {}
+        queries = []
+        # An evidence call is reserved before any search is spent, and handed back to the chain once the results are in.
+        if to_search and budget.try_llm_call():
+            queries = [assumptions[i] for i in to_search][:budget.take_searches(len(to_search))]
+            if not queries:
+                budget.release_llm_call()
+        if queries:
+            shared = SharedSearch(self._search, queries, self._search_executor)
+            futures = {}
+            timed_out = False
+            try:
+                # Every search must finish before the pool is ranked for any assumption.
+                shared.pool(timeout=budget.wait_timeout())
+                futures = {i: self._verify_executor.submit(bind(self._search_and_summarize), assumptions[i], shared) for i in to_search}
+                _, not_done = wait(futures.values(), timeout=budget.wait_timeout())
+                timed_out = bool(not_done)
+                for i, future in futures.items():
+                    if future in not_done:
+                        continue
+                    if future.exception() is None:
+                        searched[i] = future.result()
+                    else:
+                        logging.error(f"Search for assumption '{assumptions[i]}' failed: {future.exception()}")
+                        verdicts[i], event = self._unverified(assumptions[i], i, SEARCH_FAILED_VERDICT)
+                        yield event
+            except TimeoutError:
+                timed_out = True
+            finally:
+                if timed_out:
+                    for future in futures.values():
+                        future.cancel()
+                    shared.cancel()
+            if timed_out:
+                budget.expired()
+            budget.release_llm_call()
+            if searched:
+                gathered = [i for i in to_search if i in searched]
+                with span("evidence", assumptions=len(gathered)):
+                    raw_evidence = dict(zip(gathered, self.prompt_chains.batch_evidence_gathering_chain([(assumptions[i], searched[i][0]) for i in gathered])))
+                raw_evidence = {i: e for i, e in raw_evidence.items() if e is not None}
+                for index in raw_evidence:
+                    logging.debug(f"Evidence for '{assumptions[index]}': {raw_evidence[index]}")
+                    evidence[index] = f"Assumption: {assumptions[index]}\nEvidence: {raw_evidence[index]}"
+                    yield FactCheckEvent(EVIDENCE, {"index": index, "assumption": assumptions[index], "evidence": evidence[index]})
 
-    def process_claim(self, claim: str) -> Dict:
-        """Processes a claim through the fact-checking pipeline."""
-        logging.info(f"Processing claim: {claim}")
+        for index in pending:
+            # Verdicts whose evidence the budget cut short aren't stored, so later claims look again.
+            if index in to_search and index not in raw_evidence:
+                continue
+            source_urls = searched[index][1] if index in searched else []
+            save_assumption_verdict(assumptions[index], raw_verdicts[index], raw_evidence.get(index), source_urls, claim_type)
 
-        claim_type = self.prompt_chains.claim_classification_chain(claim)
+        return verdicts, [e for e in evidence if e is not None]
+
+    def verify_assumptions(self, assumptions: List[str], claim_type: Optional[str] = None) -> Tuple[List[str], List[str]]:
+        """Verifies assumptions concurrently and returns (verdicts, evidence) in input order."""
+        return _drain(self._iter_verify_assumptions(assumptions, claim_type))
+
+    def _synthesize(self, claim: str, initial_response: str, assumptions_verdicts: str, gathered_evidence: str, stream: bool) -> Generator[FactCheckEvent, None, str]:
+        if not stream:
+            return self.prompt_chains.final_synthesis_chain(claim, initial_response, assumptions_verdicts, gathered_evidence)
+        chunks = []
+        for chunk in self.prompt_chains.final_synthesis_stream(claim, initial_response, assumptions_verdicts, gathered_evidence):
+            chunks.append(chunk)
+            yield FactCheckEvent(FINAL_ANSWER_CHUNK, {"text": chunk})
+        return "".join(chunks)
+
+    def process_claim(self, claim: str, reuse_previous: bool = True, persist: bool = True, mode: Optional[str] = None) -> Dict:
+        """Processes a claim through the fact-checking pipeline.
+
+        When reuse_previous is set, a stored result for a near-identical claim is
+        returned instead of running the pipeline again. With persist=False the
+        result is not saved, so callers can store results in bulk themselves.
+        mode ("fast", "standard" or "deep"; settings.PIPELINE_MODE by default)
+        sets the claim's budget of LLM calls, searches and time.
+        """
+        return _drain(self._run_pipeline(claim, reuse_previous, persist, stream_final_answer=False, mode=get_mode(mode)))
+
+    def iter_process_claim(self, claim: str, reuse_previous: bool = True, persist: bool = True, mode: Optional[str] = None) -> Iterator[FactCheckEvent]:
+        """Runs the pipeline like process_claim, yielding a FactCheckEvent as each stage finishes.
+
+        The final answer is streamed as FINAL_ANSWER_CHUNK events and the last
+        event is always RESULT, carrying the same dict process_claim returns.
+        """
+        return self._run_pipeline(claim, reuse_previous, persist, stream_final_answer=True, mode=get_mode(mode))
+
+    def reverify(self, previous: Dict, mode: Optional[str] = None, persist: bool = True) -> Dict:
+        """Re-verifies a stored fact-check's assumptions and synthesizes a new answer.
+
+        The classification, initial response and assumptions are kept, stored
+        assumption verdicts are not reused, and the result is saved as a new
+        version of previous (its parent_id is previous["id"]).
+        """
+        return _drain(self._check_claim(previous["claim"], False, persist, False, get_mode(mode), previous=previous))
+
+    def _run_pipeline(self, claim: str, reuse_previous: bool, persist: bool, stream_final_answer: bool, mode: PipelineMode) -> Generator[FactCheckEvent, None, Dict]:
+        """Runs the pipeline, unless the same claim is already being checked with the same options.
+
+        Callers that submit a claim while an identical one (ignoring case,
+        whitespace and punctuation) is in flight wait for it and only receive
+        its RESULT event, carrying a copy of its result, or its error.
+        """
+        key = (canonical_text(claim), reuse_previous, persist, mode.name)
+        call, leader = self._claims_in_flight.begin(key)
+        if not leader:
+            logging.info(f"Waiting for an identical claim that is already being checked: {claim}")
+            result = self._claims_in_flight.wait(call)
+            yield FactCheckEvent(RESULT, result)
+            return result
+
+        try:
+            result = yield from self._check_claim(claim, reuse_previous, persist, stream_final_answer, mode)
+        except BaseException as e:
+            self._claims_in_flight.fail(key, call, e)
+            raise
+        # Resolved before RESULT is yielded, as consumers may stop reading once they have it.
+        self._claims_in_flight.resolve(key, call, result)
+        yield FactCheckEvent(RESULT, result)
+        return result
+
+    def _check_claim(self, claim: str, reuse_previous: bool, persist: bool, stream_final_answer: bool, mode: PipelineMode,
+                     previous: Optional[Dict] = None) -> Generator[FactCheckEvent, None, Dict]:
+        logging.info(f"{'Re-verifying' if previous else 'Processing'} claim in {mode.name} mode: {claim}")
+        with start_trace() as trace, start_budget(mode) as budget, _record_searches() as searches:
+            with span("reverify_claim" if previous else "process_claim", mode=mode.name) as root:
+                if previous is None:
+                    result = yield from self._run_stages(claim, reuse_previous, stream_final_answer)
+                else:
+                    result = yield from self._reverify_stages(previous, stream_final_answer)
+                if budget.exhausted:
+                    root.attributes["budget_exhausted"] = ",".join(budget.exhausted)
+                    annotate(budget_exhaustions=1)
+
+        if result.get("duplicate_of") is None:
+            result["mode"] = mode.name
+            result["searched_assumptions"] = sorted(searches)
+            result["evidence_hash"] = evidence_hash(searches)
+            result["spans"] = trace.to_list()
+            totals = trace.totals()
+            logging.info(f"Fact-check finished in {trace.spans[0].duration_ms:.0f} ms: {totals.get('llm_calls', 0):g} LLM calls, "
+                         f"{totals.get('input_tokens', 0):g} input / {totals.get('output_tokens', 0):g} output tokens, "
+                         f"{totals.get('llm_cache_hits', 0):g} LLM cache hits, {totals.get('search_cache_hits', 0):g} search cache hits.")
+            if persist:
+                # The write is committed in the background; index the claim once its id is known.
+                save_fact_check(result).add_done_callback(lambda saved: self._index_saved_claim(saved, claim))
+        if settings.METRICS_FILE:
+            try:
+                write_prometheus(settings.METRICS_FILE)
+            except OSError as e:
+                logging.warning(f"Could not write metrics to {settings.METRICS_FILE}: {e}")
+        return result
+
+    def _run_stages(self, claim: str, reuse_previous: bool, stream_final_answer: bool) -> Generator[FactCheckEvent, None, Dict]:
+        """Runs the pipeline stages, each in its own span, and returns the result dict (or a reused one)."""
+        if reuse_previous and settings.DUPLICATE_CLAIM_LOOKUP:
+            with span("duplicate_lookup"):
+                previous = self.find_previous_result(claim)
+            if previous is not None:
+                yield FactCheckEvent(DUPLICATE, {"duplicate_of": previous["duplicate_of"], "similarity": previous["similarity"]})
+                return previous
+
+        budget = current_budget()
+        with span("classification"):
+            budget.charge_llm_call()
+            claim_type = self.prompt_chains.claim_classification_chain(claim)
         logging.info(f"Claim Type: {claim_type}")
+        yield FactCheckEvent(CLASSIFICATION, {"claim_type": claim_type})
 
-        initial_response = self.prompt_chains.initial_response_chain(claim)
-        logging.info(f"Initial Response: {initial_response}")
+        with span("initial_response"):
+            budget.charge_llm_call()
+            initial_response = self.prompt_chains.initial_response_chain(claim)
+        logging.debug(f"Initial Response: {initial_response}")
+        yield FactCheckEvent(INITIAL_RESPONSE, {"initial_response": initial_response})
 
         if initial_response.strip().lower() in ["true", "false"]:
             logging.info("Initial response is a simple verdict. Skipping assumption extraction, verification, and evidence gathering.")
             assumptions = []
             assumptions_verdicts = ["No assumptions extracted for simple verdict."]
             gathered_evidence_list = ["No evidence gathered for simple verdict."]
-            final_answer = self.prompt_chains.final_synthesis_chain(
-                claim,
-                initial_response,
-                "No assumptions to verify for simple verdict.",
-                "No evidence gathered for simple verdict."
-            )
+            with span("synthesis"):
+                budget.charge_llm_call()
+                final_answer = yield from self._synthesize(
+                    claim,
+                    initial_response,
+                    "No assumptions to verify for simple verdict.",
+                    "No evidence gathered for simple verdict.",
+                    stream_final_answer
+                )
         else:
-            assumptions_raw = self.prompt_chains.assumption_extraction_chain(initial_response)
-            
+            if budget.try_llm_call():
+                with span("assumption_extraction"):
+                    assumptions_raw = self.prompt_chains.assumption_extraction_chain(initial_response)
+            else:
+                assumptions_raw = "NONE"
+
             if assumptions_raw.strip().upper() == "NONE":
                 assumptions = []
                 logging.info("No assumptions extracted.")
             else:
                 assumptions = re.findall(r'^- (.+)$', assumptions_raw, re.MULTILINE)
                 assumptions = [a.strip() for a in assumptions if a.strip()]
+                if len(assumptions) > budget.mode.max_assumptions:
+                    logging.info(f"Verifying the first {budget.mode.max_assumptions} of {len(assumptions)} assumptions in {budget.mode.name} mode.")
+                    assumptions = assumptions[:budget.mode.max_assumptions]
                 logging.info(f"Extracted Assumptions: {assumptions}")
+            yield FactCheckEvent(ASSUMPTIONS, {"assumptions": assumptions})
 
-            assumptions_verdicts = []
-            gathered_evidence_list = []
-
-            if assumptions:
-                for assumption in assumptions:
-                    verdict = self.prompt_chains.verification_loop_chain(assumption)
-                    logging.info(f"Assumption: {assumption}\nVerdict: {verdict}")
-                    assumptions_verdicts.append(f"Assumption: {assumption} | Verdict: {verdict}")
-
-                    if "uncertain" in verdict.lower() or "false" in verdict.lower() or "true" in verdict.lower():
-                        search_query = f"{assumption} fact check"
-                        search_results = self.search_tools.search(search_query, num_results=10)
-                        processed_search_results = self.search_tools.process_results(search_results)
-                        
-                        summarized_evidence_text = self.search_tools.summarize_search_results(processed_search_results)
-                        
-                        evidence = self.prompt_chains.evidence_gathering_chain(assumption, summarized_evidence_text)
-                        logging.info(f"Evidence for '{assumption}': {evidence}")
-                        gathered_evidence_list.append(f"Assumption: {assumption}\nEvidence: {evidence}")
-            else:
-                logging.info("Skipping assumption verification and evidence gathering as no assumptions were extracted.")
-
-            final_answer = self.prompt_chains.final_synthesis_chain(
-                claim,
-                initial_response,
-                "\n".join(assumptions_verdicts) if assumptions_verdicts else "No assumptions to verify.",
-                "\n".join(gathered_evidence_list) if gathered_evidence_list else "No evidence gathered."
-            )
+            assumptions_verdicts, gathered_evidence_list, final_answer = yield from self._verify_and_synthesize(
+                claim, claim_type, initial_response, assumptions, stream_final_answer)
         
-        logging.info(f"Final Answer: {final_answer}")
+        logging.debug(f"Final Answer: {final_answer}")
 
         result = {
             "claim": claim,
@@ -82,7 +613,44 @@ class FactChecker:
             "gathered_evidence": gathered_evidence_list,
             "final_answer": final_answer
         }
-        
-        save_fact_check(result)
+        return result
+
+    def _verify_and_synthesize(self, claim: str, claim_type: str, initial_response: str, assumptions: List[str], stream_final_answer: bool,
+                               reuse_verdicts: bool = True) -> Generator[FactCheckEvent, None, Tuple[List[str], List[str], str]]:
+        """Verifies the assumptions and synthesizes the final answer. Returns (verdicts, evidence, final answer)."""
+        assumptions_verdicts = []
+        gathered_evidence_list = []
+
+        if assumptions:
+            with span("verification", assumptions=len(assumptions)):
+                assumptions_verdicts, gathered_evidence_list = yield from self._iter_verify_assumptions(assumptions, claim_type, reuse_verdicts)
+        else:
+            logging.info("Skipping assumption verification and evidence gathering as no assumptions were extracted.")
 
-        return result
\ No newline at end of file
+        with span("synthesis"):
+            current_budget().charge_llm_call()
+            final_answer = yield from self._synthesize(
+                claim,
+                initial_response,
+                "\n".join(assumptions_verdicts) if assumptions_verdicts else "No assumptions to verify.",
+                "\n".join(gathered_evidence_list) if gathered_evidence_list else "No evidence gathered.",
+                stream_final_answer
+            )
+        return assumptions_verdicts, gathered_evidence_list, final_answer
+
+    def _reverify_stages(self, previous: Dict, stream_final_answer: bool) -> Generator[FactCheckEvent, None, Dict]:
+        """Runs verification and synthesis again for a stored fact-check, keeping its earlier stages."""
+        assumptions = previous.get("assumptions") or []
+        assumptions_verdicts, gathered_evidence_list, final_answer = yield from self._verify_and_synthesize(
+            previous["claim"], previous.get("claim_type"), previous.get("initial_response") or "", assumptions,
+            stream_final_answer, reuse_verdicts=False)
+        return {
+            "claim": previous["claim"],
+            "claim_type": previous.get("claim_type"),
+            "initial_response": previous.get("initial_response"),
+            "assumptions": assumptions,
+            "assumptions_verdicts": assumptions_verdicts,
+            "gathered_evidence": gathered_evidence_list,
+            "final_answer": final_answer,
+            "parent_id": previous.get("id")
+        }
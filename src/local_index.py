@@ -0,0 +1,403 @@
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+from src.text_ranking import tokenize
+
+SEGMENT_MAGIC = b"FCIDX001"
+# magic, first passage id, passage id span, terms, term bytes, postings
+SEGMENT_HEADER = struct.Struct("<8sQQQQQ")
+INDEXED_SUFFIXES = (".txt", ".md", ".html", ".htm", ".jsonl")
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def _pad8(size: int) -> int:
+    return (size + 7) & ~7
+
+def split_passages(text: str, words: int = 120) -> List[str]:
+    """Splits text into passages of about `words` words, breaking at paragraph ends where possible."""
+    passages, current, count = [], [], 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        tokens = paragraph.split()
+        while tokens:
+            room = words - count
+            current.extend(tokens[:room])
+            count += len(tokens[:room])
+            tokens = tokens[room:]
+            if count >= words:
+                passages.append(" ".join(current))
+                current, count = [], 0
+        # Start a new passage at a paragraph break once this one is reasonably full.
+        if count >= words // 2:
+            passages.append(" ".join(current))
+            current, count = [], 0
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+def read_documents(path: Path) -> Iterator[Tuple[str, str, str]]:
+    """Yields (title, url, text) for each document in a corpus file.
+
+    .jsonl files hold one {"title", "url", "text"} object per line (the format
+    of common Wikipedia extractors); other files are one document each, titled
+    by their first line.
+    """
+    if path.suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    doc = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping malformed line {number} of {path}.")
+                    continue
+                url = doc.get("url") or f"{path.resolve().as_uri()}#line-{number}"
+                yield doc.get("title") or path.stem, url, doc.get("text", "")
+        return
+    raw = path.read_text(encoding="utf-8", errors="replace")
+    if path.suffix in (".html", ".htm"):
+        from src.search_tools import extract_main_text
+        raw = extract_main_text(raw, max_chars=len(raw))
+    first_line = next((line for line in raw.splitlines() if line.strip()), path.stem)
+    yield first_line.strip().lstrip("#").strip()[:200], path.resolve().as_uri(), raw
+
+class Segment:
+    """One immutable, memory-mapped slice of the inverted index.
+
+    The file holds the passage lengths, a sorted term dictionary and the
+    postings (passage id, term frequency) of every term, in native byte order.
+    Terms are found by binary search, so nothing is loaded into memory up front.
+    Deleted passages are marked in a bitmap of one bit per passage id.
+
+    A segment is reference counted: the index holds one reference while the
+    segment is current and each search holds one while reading it, and the
+    file is unmapped when the last is released.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._refs = 1
+        self._refs_lock = threading.Lock()
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.first_id, span, self.term_count, blob_size, postings = SEGMENT_HEADER.unpack_from(self._map, 0)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not an index segment.")
+        view = memoryview(self._map)
+        offset = SEGMENT_HEADER.size
+        self.lengths = view[offset:offset + 4 * span].cast("I")
+        offset = _pad8(offset + 4 * span)
+        self._term_offsets = view[offset:offset + 8 * (self.term_count + 1)].cast("Q")
+        offset += 8 * (self.term_count + 1)
+        self._posting_offsets = view[offset:offset + 8 * (self.term_count + 1)].cast("Q")
+        offset += 8 * (self.term_count + 1)
+        self._terms = view[offset:offset + blob_size]
+        offset = _pad8(offset + blob_size)
+        self._postings = view[offset:offset + 8 * postings].cast("I")
+        self.deleted = bytearray((span + 7) // 8)
+
+    def contains(self, passage_id: int) -> bool:
+        return 0 <= passage_id - self.first_id < len(self.lengths)
+
+    def mark_deleted(self, passage_id: int):
+        offset = passage_id - self.first_id
+        self.deleted[offset >> 3] |= 1 << (offset & 7)
+
+    def _term(self, i: int) -> bytes:
+        return bytes(self._terms[self._term_offsets[i]:self._term_offsets[i + 1]])
+
+    def postings(self, term: str) -> memoryview:
+        """Returns the term's postings as a flat [id, tf, id, tf, ...] view (empty if absent)."""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.term_count or self._term(lo) != key:
+            return self._postings[0:0]
+        return self._postings[2 * self._posting_offsets[lo]:2 * self._posting_offsets[lo + 1]]
+
+    def length(self, passage_id: int) -> int:
+        return self.lengths[passage_id - self.first_id]
+
+    def acquire(self):
+        with self._refs_lock:
+            self._refs += 1
+
+    def release(self):
+        with self._refs_lock:
+            self._refs -= 1
+            last = self._refs == 0
+        if last:
+            self.close()
+
+    def close(self):
+        for view in (self.lengths, self._term_offsets, self._posting_offsets, self._terms, self._postings):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+    @staticmethod
+    def write(path: Path, passages: Sequence[Tuple[int, List[str]]]):
+        """Writes a segment for (passage id, tokens) pairs, which must be sorted by id."""
+        first_id = passages[0][0]
+        span = passages[-1][0] - first_id + 1
+        lengths = array("I", bytes(4 * span))
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for passage_id, tokens in passages:
+            lengths[passage_id - first_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((passage_id, tf))
+        terms = sorted(postings, key=lambda t: t.encode("utf-8"))
+        term_offsets, posting_offsets = array("Q", [0]), array("Q", [0])
+        blob, flat = bytearray(), array("I")
+        for term in terms:
+            blob += term.encode("utf-8")
+            term_offsets.append(len(blob))
+            for passage_id, tf in postings[term]:
+                flat.append(passage_id)
+                flat.append(tf)
+            posting_offsets.append(len(flat) // 2)
+
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, first_id, span, len(terms), len(blob), len(flat) // 2))
+            f.write(lengths.tobytes())
+            f.write(bytes(_pad8(f.tell()) - f.tell()))
+            f.write(term_offsets.tobytes())
+            f.write(posting_offsets.tobytes())
+            f.write(blob)
+            f.write(bytes(_pad8(f.tell()) - f.tell()))
+            f.write(flat.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+class LocalIndex:
+    """A BM25 full-text index over a directory of documents, stored in index_dir.
+
+    Documents are split into passages, which are the unit of retrieval. Passage
+    text and per-file modification times live in SQLite; the inverted index
+    lives in memory-mapped segment files. update() only reads files that are
+    new or changed since the last run and writes their passages to a new
+    segment (replaced passages are marked deleted); once there are more than
+    max_segments, everything is compacted into one.
+    """
+
+    def __init__(self, index_dir: str, passage_words: int = 120, max_segments: int = 8):
+        self.index_dir = Path(index_dir)
+        self.passage_words = passage_words
+        self.max_segments = max_segments
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._segments: List[Segment] = []
+        self._generation = None
+        self._passage_count = 0
+        self._avg_length = 0.0
+        self._init_db()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_dir / "index.db", timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        with self._connection() as conn:
+            # AUTOINCREMENT: ids are never reused, so segment files and passage ids
+            # still held by a reader can't be mistaken for newer ones.
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL NOT NULL, size INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS passages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    length INTEGER NOT NULL,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_passages_path ON passages (path);
+                CREATE INDEX IF NOT EXISTS idx_passages_deleted ON passages (id) WHERE deleted = 1;
+                CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+            """)
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._passage_count
+
+    def _refresh(self):
+        """Reopens the segments and corpus statistics when another update (maybe in another process) changed them."""
+        conn = self._connection()
+        generation = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        with self._lock:
+            if generation == self._generation:
+                return
+            # Segments still listed are kept; dropped ones are released, and closed once no search is reading them.
+            current = {segment.path.name: segment for segment in self._segments}
+            filenames = [row[0] for row in conn.execute("SELECT filename FROM segments ORDER BY id")]
+            self._segments = [current.pop(name, None) or Segment(self.index_dir / name) for name in filenames]
+            for segment in current.values():
+                segment.release()
+            # Deletions only ever add bits; compaction writes new segments without the deleted passages.
+            segment_starts = [segment.first_id for segment in self._segments]
+            for (passage_id,) in conn.execute("SELECT id FROM passages WHERE deleted = 1"):
+                i = bisect_right(segment_starts, passage_id) - 1
+                if i >= 0 and self._segments[i].contains(passage_id):
+                    self._segments[i].mark_deleted(passage_id)
+            count, avg = conn.execute("SELECT COUNT(*), AVG(length) FROM passages WHERE deleted = 0").fetchone()
+            self._passage_count, self._avg_length = count, avg or 0.0
+            self._generation = generation
+
+    def update(self, corpus_dir: str) -> Dict[str, int]:
+        """Indexes new and changed files under corpus_dir and drops removed ones. Returns counts of each."""
+        corpus = Path(corpus_dir).resolve()
+        conn = self._connection()
+        known = {path: (mtime, size) for path, mtime, size in conn.execute("SELECT path, mtime, size FROM files")}
+        seen, changed = set(), []
+        for path in sorted(corpus.rglob("*")):
+            if path.suffix.lower() not in INDEXED_SUFFIXES or not path.is_file():
+                continue
+            key = str(path)
+            seen.add(key)
+            stat = path.stat()
+            if known.get(key) != (stat.st_mtime, stat.st_size):
+                changed.append((path, stat))
+        removed = [path for path in known if path not in seen and path.startswith(str(corpus))]
+
+        new_passages: List[Tuple[int, List[str]]] = []
+        with conn:
+            for path in removed + [str(p) for p, _ in changed if str(p) in known]:
+                conn.execute("UPDATE passages SET deleted = 1 WHERE path = ? AND deleted = 0", (path,))
+            conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            for path, stat in changed:
+                for title, url, text in read_documents(path):
+                    for passage in split_passages(text, self.passage_words):
+                        tokens = tokenize(f"{title} {passage}")
+                        cursor = conn.execute("INSERT INTO passages (path, title, url, text, length) VALUES (?, ?, ?, ?, ?)",
+                                              (str(path), title, url, passage, len(tokens)))
+                        new_passages.append((cursor.lastrowid, tokens))
+                conn.execute("INSERT OR REPLACE INTO files (path, mtime, size) VALUES (?, ?, ?)", (str(path), stat.st_mtime, stat.st_size))
+            if new_passages:
+                self._add_segment(conn, new_passages)
+            self._bump_version(conn)
+        logging.info(f"Indexed {len(changed)} new or changed files ({len(new_passages)} passages) and removed {len(removed)} from {corpus}.")
+        if conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0] > self.max_segments:
+            self.compact()
+        return {"indexed": len(changed), "removed": len(removed), "passages": len(new_passages)}
+
+    def _add_segment(self, conn: sqlite3.Connection, passages: Sequence[Tuple[int, List[str]]]):
+        segment_id = conn.execute("INSERT INTO segments (filename) VALUES ('')").lastrowid
+        filename = f"segment-{segment_id:06d}.idx"
+        Segment.write(self.index_dir / filename, passages)
+        conn.execute("UPDATE segments SET filename = ? WHERE id = ?", (filename, segment_id))
+
+    def compact(self):
+        """Rewrites all live passages into a single segment and purges deleted ones."""
+        conn = self._connection()
+        with conn:
+            old = [row[0] for row in conn.execute("SELECT filename FROM segments")]
+            conn.execute("DELETE FROM passages WHERE deleted = 1")
+            conn.execute("DELETE FROM segments")
+            passages = [(passage_id, tokenize(f"{title} {text}"))
+                        for passage_id, title, text in conn.execute("SELECT id, title, text FROM passages ORDER BY id")]
+            if passages:
+                self._add_segment(conn, passages)
+            self._bump_version(conn)
+        with self._lock:
+            for segment in self._segments:
+                segment.release()
+            self._segments, self._generation = [], None
+        for filename in old:
+            try:
+                (self.index_dir / filename).unlink()
+            except OSError as e:
+                logging.warning(f"Could not remove old index segment {filename}: {e}")
+        logging.info(f"Compacted the local index into one segment of {len(passages)} passages.")
+
+    def search(self, query: str, num_results: int = 5) -> List[Dict]:
+        """Returns the best BM25 matches as {"title", "href", "body"} dicts, one passage per document."""
+        self._refresh()
+        with self._lock:
+            segments = list(self._segments)
+            for segment in segments:
+                segment.acquire()
+            count, avg_length = self._passage_count, self._avg_length
+        if not count:
+            for segment in segments:
+                segment.release()
+            return []
+        try:
+            scores = self._score(query, segments, count, avg_length)
+        finally:
+            for segment in segments:
+                segment.release()
+        # Extra candidates, since lower-ranked passages of an already chosen document are skipped.
+        best = heapq.nlargest(num_results * 4, scores.items(), key=lambda item: item[1])
+        if not best:
+            return []
+        ids = [passage_id for passage_id, _ in best]
+        rows = {row[0]: row[1:] for row in self._connection().execute(
+            f"SELECT id, title, url, text FROM passages WHERE id IN ({','.join('?' * len(ids))})", ids)}
+        results, urls = [], set()
+        for passage_id in ids:
+            if passage_id not in rows or rows[passage_id][1] in urls:
+                continue
+            title, url, text = rows[passage_id]
+            urls.add(url)
+            results.append({"title": title, "href": url, "body": text})
+            if len(results) == num_results:
+                break
+        return results
+
+    @staticmethod
+    def _score(query: str, segments: List[Segment], count: int, avg_length: float) -> Dict[int, float]:
+        """BM25 scores of the live passages matching query. No views into the segments outlive the call."""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            term_postings = [(segment, segment.postings(term)) for segment in segments]
+            df = sum(len(p) // 2 for _, p in term_postings)
+            if not df:
+                continue
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for segment, postings in term_postings:
+                deleted, first_id = segment.deleted, segment.first_id
+                for i in range(0, len(postings), 2):
+                    passage_id, tf = postings[i], postings[i + 1]
+                    offset = passage_id - first_id
+                    if deleted[offset >> 3] >> (offset & 7) & 1:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.length(passage_id) / avg_length)
+                    scores[passage_id] = scores.get(passage_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def close(self):
+        """Releases the index's segments; each is unmapped once the searches still reading it finish."""
+        with self._lock:
+            for segment in self._segments:
+                segment.release()
+            self._segments, self._generation = [], None
@@ -1,58 +1,183 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from typing import Dict, Any
-from src.utils import load_prompts
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+import json
+import logging
+import re
+from src.clients import compile_prompt, get_chat_model, get_prompts
+from src.resilience import get_backend
+from src.tracing import record_llm_usage
+from src.budget import current_budget
+from src.cache import create_llm_response_cache
 from config.settings import settings
 
+VERDICTS = {"true": "True", "false": "False", "uncertain": "Uncertain"}
+
+def parse_json_items(raw: str, count: int, fields: Sequence[str]) -> Dict[int, Dict[str, str]]:
+    """Parses a JSON array of {"index": n, ...} objects from an LLM response.
+
+    Returns the valid items keyed by zero-based position. Items with a missing
+    or out-of-range index, or a missing/empty field, are dropped so that the
+    caller can retry just those entries.
+    """
+    text = re.sub(r"^```(?:json)?|```$", "", raw.strip(), flags=re.MULTILINE)
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        return {}
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or not isinstance(item.get("index"), int) or not 1 <= item["index"] <= count:
+            continue
+        values = {field: item.get(field) for field in fields}
+        if all(isinstance(v, str) and v.strip() for v in values.values()):
+            parsed[item["index"] - 1] = {k: v.strip() for k, v in values.items()}
+    return parsed
+
 class PromptChains:
     def __init__(self, model_name: str = settings.LLM_MODEL, temperature: float = settings.TEMPERATURE, max_tokens: int = settings.MAX_TOKENS):
-        self.prompts = load_prompts("D:\\AI-Fact-Checker-Bot\\gemini-fact-checker\\config\\prompts.yaml")
-        self.llm = self._initialize_llm(model_name, temperature, max_tokens)
-
-    def _initialize_llm(self, model_name: str, temperature: float, max_tokens: int):
         # Only Gemini is supported
-        if "gemini" in model_name:
-            return ChatGoogleGenerativeAI(model=model_name, temperature=temperature, max_tokens=max_tokens, google_api_key=settings.GEMINI_API_KEY)
-        else:
+        if "gemini" not in model_name:
             raise ValueError(f"Unsupported LLM model: {model_name}. Only Gemini models are supported in this configuration.")
+        self.prompts = get_prompts()
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self._llm = None
+        self.response_cache = create_llm_response_cache()
+
+    @property
+    def llm(self):
+        """The shared Gemini client for this model and configuration, created on the first LLM call."""
+        if self._llm is None:
+            self._llm = get_chat_model(self.model_name, self.temperature, self.max_tokens)
+        return self._llm
+
+    @llm.setter
+    def llm(self, llm):
+        self._llm = llm
+
+    def _run_chain(self, prompt_name: str, inputs: Dict[str, Any]) -> str:
+        """Runs a prompt from prompts.yaml through the LLM, reusing cached responses for identical inputs."""
+        template = self.prompts[prompt_name]
+        cache_key = self.response_cache.make_key(template, inputs, self.model_name, self.temperature, self.max_tokens)
+
+        def invoke() -> str:
+            messages = compile_prompt(template).format_messages(**inputs)
+            response = get_backend("gemini").call(lambda: self.llm.invoke(messages))
+            record_llm_usage(response)
+            return response.content
+
+        return self.response_cache.get_or_compute(cache_key, invoke)
+
+    def _stream_chain(self, prompt_name: str, inputs: Dict[str, Any]) -> Iterator[str]:
+        """Like _run_chain, but yields the response in chunks as the LLM produces them."""
+        template = self.prompts[prompt_name]
+        cache_key = self.response_cache.make_key(template, inputs, self.model_name, self.temperature, self.max_tokens)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt = compile_prompt(template)
+        chunks = []
+        # A stream can't be retried once chunks have been shown, so it is rate limited but runs once.
+        usage = []
+        with get_backend("gemini").guard():
+            for chunk in self.llm.stream(prompt.format_messages(**inputs)):
+                if getattr(chunk, "usage_metadata", None):
+                    usage.append(chunk)
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield chunk.content
+        record_llm_usage(*usage)
+        self.response_cache.set(cache_key, "".join(chunks))
 
     def claim_classification_chain(self, claim: str) -> str:
-        prompt = ChatPromptTemplate.from_template(self.prompts["claim_classification_prompt"])
-        chain = prompt | self.llm
-        response = chain.invoke({"claim": claim})
-        return response.content.strip() # Strip whitespace to get clean category
+        response = self._run_chain("claim_classification_prompt", {"claim": claim})
+        return response.strip() # Strip whitespace to get clean category
 
     def initial_response_chain(self, claim: str) -> str:
-        prompt = ChatPromptTemplate.from_template(self.prompts["initial_response_prompt"])
-        chain = prompt | self.llm
-        response = chain.invoke({"claim": claim})
-        return response.content
+        return self._run_chain("initial_response_prompt", {"claim": claim})
 
     def assumption_extraction_chain(self, initial_response: str) -> str:
-        prompt = ChatPromptTemplate.from_template(self.prompts["assumption_extraction_prompt"])
-        chain = prompt | self.llm
-        response = chain.invoke({"initial_response": initial_response})
-        return response.content
+        return self._run_chain("assumption_extraction_prompt", {"initial_response": initial_response})
 
     def verification_loop_chain(self, assumption: str) -> str:
-        prompt = ChatPromptTemplate.from_template(self.prompts["verification_loop_prompt"])
-        chain = prompt | self.llm
-        response = chain.invoke({"assumption": assumption})
-        return response.content
+        return self._run_chain("verification_loop_prompt", {"assumption": assumption})
+
+    def batch_verification_chain(self, assumptions: List[str], batch_size: Optional[int] = None) -> List[Optional[str]]:
+        """Verifies assumptions in chunks of batch_size per LLM call.
+
+        Returns one "Verdict: reason" string per assumption, in order. Any entry
+        missing or malformed in the model's JSON is verified on its own with
+        verification_loop_chain. Every call is charged to the current claim's
+        budget; None marks an assumption the budget left unverified.
+        """
+        batch_size = batch_size or settings.VERIFICATION_BATCH_SIZE
+        results: List[Optional[str]] = [None] * len(assumptions)
+        budget = current_budget()
+        for start in range(0, len(assumptions), batch_size):
+            if not budget.try_llm_call():
+                return results
+            chunk = assumptions[start:start + batch_size]
+            numbered = "\n".join(f"{i}. {a}" for i, a in enumerate(chunk, start=1))
+            parsed = parse_json_items(self._run_chain("batch_verification_prompt", {"assumptions": numbered}), len(chunk), ("verdict", "reason"))
+            for offset, item in parsed.items():
+                verdict = VERDICTS.get(item["verdict"].strip(".").lower())
+                if verdict:
+                    results[start + offset] = f"{verdict}: {item['reason']}"
+        return self._fill_missing(results, lambda i: self.verification_loop_chain(assumptions[i]), "verdicts")
+
+    def batch_evidence_gathering_chain(self, items: List[Tuple[str, str]], batch_size: Optional[int] = None) -> List[Optional[str]]:
+        """Gathers evidence for (assumption, search_results) pairs in chunks of batch_size per LLM call.
+
+        Entries missing or malformed in the model's JSON fall back to
+        evidence_gathering_chain. Every call is charged to the current claim's
+        budget; None marks an entry the budget left without evidence.
+        """
+        batch_size = batch_size or settings.EVIDENCE_BATCH_SIZE
+        results: List[Optional[str]] = [None] * len(items)
+        budget = current_budget()
+        for start in range(0, len(items), batch_size):
+            if not budget.try_llm_call():
+                return results
+            chunk = items[start:start + batch_size]
+            numbered = "\n\n".join(f"Assumption {i}: {a}\nSearch Results {i}: {r}" for i, (a, r) in enumerate(chunk, start=1))
+            parsed = parse_json_items(self._run_chain("batch_evidence_gathering_prompt", {"items": numbered}), len(chunk), ("evidence",))
+            for offset, item in parsed.items():
+                results[start + offset] = item["evidence"]
+        return self._fill_missing(results, lambda i: self.evidence_gathering_chain(*items[i]), "evidence")
+
+    @staticmethod
+    def _fill_missing(results: List[Optional[str]], single_call, description: str) -> List[Optional[str]]:
+        """Retries missing entries one call at a time, each charged to the current claim's budget."""
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            logging.warning(f"Batched response missed {len(missing)} of {len(results)} {description}; retrying them one at a time.")
+        budget = current_budget()
+        for i in missing:
+            if not budget.try_llm_call():
+                break
+            results[i] = single_call(i)
+        return results
 
     def evidence_gathering_chain(self, assumption: str, search_results: str) -> str:
-        prompt = ChatPromptTemplate.from_template(self.prompts["evidence_gathering_prompt"])
-        chain = prompt | self.llm
-        response = chain.invoke({"assumption": assumption, "search_results": search_results})
-        return response.content
+        return self._run_chain("evidence_gathering_prompt", {"assumption": assumption, "search_results": search_results})
+
+    def final_synthesis_stream(self, claim: str, initial_response: str, assumptions_verdicts: str, gathered_evidence: str) -> Iterator[str]:
+        return self._stream_chain("final_synthesis_prompt", {
+            "claim": claim,
+            "initial_response": initial_response,
+            "assumptions_verdicts": assumptions_verdicts,
+            "gathered_evidence": gathered_evidence
+        })
 
     def final_synthesis_chain(self, claim: str, initial_response: str, assumptions_verdicts: str, gathered_evidence: str) -> str:
-        prompt = ChatPromptTemplate.from_template(self.prompts["final_synthesis_prompt"])
-        chain = prompt | self.llm
-        response = chain.invoke({
+        return self._run_chain("final_synthesis_prompt", {
             "claim": claim,
             "initial_response": initial_response,
             "assumptions_verdicts": assumptions_verdicts,
             "gathered_evidence": gathered_evidence
         })
-        return response.content
\ No newline at end of file
@@ -0,0 +1,116 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from config.settings import settings
+from src.database import load_stale_fact_checks, mark_fact_check_checked
+from src.fact_checker import search_query
+from src.resilience import TokenBucket
+from src.retrieval import evidence_hash
+from src.utils import is_time_sensitive
+
+UNCHANGED = "unchanged"
+UPDATED = "updated"
+FAILED = "failed"
+
+class Refresher:
+    """Keeps stored fact-checks current by re-verifying stale ones in the background.
+
+    For each fact-check past its freshness window, the searches its evidence
+    came from are repeated without the search cache. If the results hash the
+    same as before, the fact-check is only marked as checked. Otherwise its
+    assumptions are verified again, the answer is re-synthesized, and the
+    result is stored as a new version. Searches and re-verifications have their
+    own rate limits, and the job waits while busy() reports interactive work,
+    so it only uses capacity that users' claims don't need.
+    """
+
+    def __init__(self, fact_checker, mode: Optional[str] = None, searches_per_minute: Optional[float] = None,
+                 reverifications_per_hour: Optional[float] = None, busy: Optional[Callable[[], bool]] = None):
+        self.fact_checker = fact_checker
+        self.mode = mode or settings.REFRESH_MODE
+        self.busy = busy or (lambda: False)
+        searches_per_minute = searches_per_minute or settings.REFRESH_SEARCHES_PER_MINUTE
+        reverifications_per_hour = reverifications_per_hour or settings.REFRESH_REVERIFICATIONS_PER_HOUR
+        self._search_limit = TokenBucket(searches_per_minute / 60, capacity=1)
+        self._reverify_limit = TokenBucket(reverifications_per_hour / 3600, capacity=1)
+        self.stopped = threading.Event()
+
+    def stop(self):
+        """Stops the job after the fact-check it is working on."""
+        self.stopped.set()
+
+    def _wait_turn(self, limit: TokenBucket) -> bool:
+        """Waits until interactive work is done and the rate limit allows a call; False once stopped."""
+        while self.busy():
+            if self.stopped.wait(1.0):
+                return False
+        limit.acquire(cancel=self.stopped)
+        return not self.stopped.is_set()
+
+    def evidence_changed(self, fact_check: Dict) -> Optional[bool]:
+        """Repeats the fact-check's searches and compares their results with the stored hash.
+
+        Returns None if the job was stopped first. Fact-checks stored before
+        evidence was hashed count as changed, as there is nothing to compare.
+        So do time-sensitive ones that were answered without searching, since
+        repeating no searches would always match; other unsearched claims have
+        nothing that could have changed.
+        """
+        searched = fact_check.get("searched_assumptions")
+        if fact_check.get("evidence_hash") is None or searched is None:
+            return True
+        if not searched:
+            return is_time_sensitive(fact_check.get("claim") or "")
+        results = {}
+        for assumption in searched:
+            if not self._wait_turn(self._search_limit):
+                return None
+            results[assumption] = self.fact_checker.search_tools.search(
+                search_query(assumption), num_results=settings.SEARCH_RESULTS_PER_ASSUMPTION, refresh=True)
+        return evidence_hash(results) != fact_check["evidence_hash"]
+
+    def refresh(self, fact_check: Dict) -> Optional[str]:
+        """Brings one stored fact-check up to date. Returns UNCHANGED or UPDATED, or None if the job was stopped."""
+        changed = self.evidence_changed(fact_check)
+        if changed is None:
+            return None
+        if not changed:
+            mark_fact_check_checked(fact_check["id"])
+            logging.info(f"Evidence for fact-check {fact_check['id']} is unchanged: {fact_check['claim']}")
+            return UNCHANGED
+        if not self._wait_turn(self._reverify_limit):
+            return None
+        logging.info(f"Evidence for fact-check {fact_check['id']} changed; re-verifying: {fact_check['claim']}")
+        self.fact_checker.reverify(fact_check, mode=self.mode)
+        return UPDATED
+
+    def run_once(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """Refreshes up to limit stale fact-checks (REFRESH_BATCH_SIZE by default), least recently checked first."""
+        counts = {UNCHANGED: 0, UPDATED: 0, FAILED: 0}
+        stale = load_stale_fact_checks(settings.FACT_CHECK_FRESHNESS_HOURS, settings.FACT_CHECK_NEWS_FRESHNESS_HOURS,
+                                       limit or settings.REFRESH_BATCH_SIZE)
+        for fact_check in stale:
+            try:
+                outcome = self.refresh(fact_check)
+            except Exception as e:
+                # Left as it was, so the next run tries it again.
+                logging.error(f"Error refreshing fact-check {fact_check['id']}: {e}")
+                outcome = FAILED
+            if outcome is None:
+                break
+            counts[outcome] += 1
+        if stale:
+            logging.info(f"Refreshed {len(stale)} stale fact-checks: {counts[UPDATED]} updated, {counts[UNCHANGED]} unchanged, {counts[FAILED]} failed.")
+        return counts
+
+    def run_forever(self, interval_minutes: float, limit: Optional[int] = None):
+        """Calls run_once every interval_minutes until stop() is called."""
+        while not self.stopped.is_set():
+            self.run_once(limit)
+            self.stopped.wait(interval_minutes * 60)
+
+    def start(self, interval_minutes: float) -> threading.Thread:
+        """Runs run_forever on a daemon thread."""
+        thread = threading.Thread(target=self.run_forever, args=(interval_minutes,), name="refresh", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,275 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+from config.settings import settings
+
+T = TypeVar("T")
+
+THROTTLE_MARKERS = ("429", "rate limit", "ratelimit", "resource exhausted", "resource_exhausted", "quota", "too many requests")
+TRANSIENT_MARKERS = ("timeout", "timed out", "temporarily", "unavailable", "connection", "500", "502", "503", "504", "deadline")
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the backend while its circuit breaker is open."""
+
+class BackendError(RuntimeError):
+    """Raised when a backend call still fails after all retries."""
+
+def classify_error(error: BaseException) -> str:
+    """Returns "throttled", "transient" or "fatal" for an exception raised by a backend call."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status == 429:
+        return "throttled"
+    if isinstance(status, int) and 500 <= status < 600:
+        return "transient"
+    text = f"{type(error).__name__} {error}".lower()
+    if any(marker in text for marker in THROTTLE_MARKERS):
+        return "throttled"
+    if isinstance(error, (TimeoutError, ConnectionError)) or any(marker in text for marker in TRANSIENT_MARKERS):
+        return "transient"
+    return "fatal"
+
+class TokenBucket:
+    """Client-side rate limiter: allows rate_per_second calls on average with bursts of up to capacity."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cancel: Optional[threading.Event] = None) -> float:
+        """Blocks until a token is available and returns the seconds spent waiting.
+
+        If cancel is set while waiting, returns early without taking a token.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            if cancel is None:
+                time.sleep(delay)
+            elif cancel.wait(delay):
+                return waited + delay
+            waited += delay
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: grows by about one slot per limit's worth of successes, halves on throttling."""
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 32):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self):
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def on_throttle(self):
+        with self._condition:
+            self.limit = max(self.minimum, self.limit / 2)
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failed calls and rejects calls for reset_seconds.
+
+    After that one trial call is let through (half-open): success closes the
+    circuit again, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"Circuit opened after {self.failures} consecutive failures.")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+class Backend:
+    """Rate limiting, adaptive concurrency, retries and circuit breaking for one external service."""
+
+    def __init__(self, name: str, requests_per_minute: float, max_concurrency: int, max_attempts: int = 4,
+                 base_delay: float = 1.0, max_delay: float = 30.0, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1, max_concurrency))
+        self.limiter = AdaptiveLimiter(initial=max(1, max_concurrency // 2), maximum=max(1, max_concurrency))
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self._counters = {"calls": 0, "successes": 0, "failures": 0, "retries": 0, "throttled": 0, "rejected": 0}
+        self._wait_seconds = 0.0
+        self._latency_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps many threads that were throttled together from retrying in lockstep.
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Runs the enclosed call once under the backend's limits, recording its outcome without retrying."""
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{self.name} is unavailable after repeated failures; not calling it for now.")
+        self._count("calls")
+        waited = self.bucket.acquire()
+        with self.limiter.slot():
+            started = time.monotonic()
+            try:
+                yield
+            except Exception as e:
+                kind = classify_error(e)
+                self._count("failures")
+                if kind == "throttled":
+                    self._count("throttled")
+                    self.limiter.on_throttle()
+                if kind == "fatal":
+                    # The service answered; the request itself was bad, so this says nothing about its health.
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                raise
+            finally:
+                with self._lock:
+                    self._wait_seconds += waited
+                    self._latency_seconds += time.monotonic() - started
+        self._count("successes")
+        self.limiter.on_success()
+        self.breaker.record_success()
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Calls fn under the backend's limits, retrying throttled and transient failures with jittered backoff.
+
+        Raises CircuitOpenError while the circuit is open, the original error
+        for failures that aren't worth retrying, and BackendError once the
+        retries are used up.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.guard():
+                    return fn()
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == "fatal":
+                    raise
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    raise BackendError(f"{self.name} call failed after {attempt} attempts: {e}") from e
+                delay = self._backoff(attempt)
+                logging.warning(f"{self.name} call {kind} ({e}); retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_attempts}).")
+                self._count("retries")
+                time.sleep(delay)
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            metrics = dict(self._counters)
+            metrics["wait_seconds"] = round(self._wait_seconds, 3)
+            metrics["latency_seconds"] = round(self._latency_seconds, 3)
+        metrics["concurrency_limit"] = round(self.limiter.limit, 2)
+        metrics["in_flight"] = self.limiter.in_flight
+        metrics["circuit_state"] = self.breaker.state
+        return metrics
+
+_backends: Dict[str, Backend] = {}
+_backends_lock = threading.Lock()
+
+BACKEND_SETTINGS = {
+    "gemini": ("GEMINI_REQUESTS_PER_MINUTE", "GEMINI_MAX_CONCURRENCY"),
+    "duckduckgo": ("SEARCH_REQUESTS_PER_MINUTE", "SEARCH_MAX_CONCURRENCY"),
+}
+
+def get_backend(name: str) -> Backend:
+    """Returns the process-wide Backend for name, so every client of a service shares its limits."""
+    with _backends_lock:
+        if name not in _backends:
+            rate_setting, concurrency_setting = BACKEND_SETTINGS[name]
+            _backends[name] = Backend(
+                name,
+                requests_per_minute=getattr(settings, rate_setting),
+                max_concurrency=getattr(settings, concurrency_setting),
+                max_attempts=settings.RETRY_MAX_ATTEMPTS,
+                base_delay=settings.RETRY_BASE_DELAY,
+                max_delay=settings.RETRY_MAX_DELAY,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+            )
+        return _backends[name]
+
+def backend_metrics() -> Dict[str, Dict[str, float]]:
+    """Returns the metrics of every backend used so far, keyed by backend name."""
+    with _backends_lock:
+        backends = dict(_backends)
+    return {name: backend.metrics() for name, backend in backends.items()}
+
+def reset_backends():
+    """Drops all backends so they are rebuilt from the current settings (used by tests)."""
+    with _backends_lock:
+        _backends.clear()
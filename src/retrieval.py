@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Executor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from src.claim_index import claim_tokens, jaccard
+from src.text_ranking import BM25, estimate_tokens, tokenize
+from src.tracing import bind
+from src.utils import canonical_text, normalize_text
+
+# Query parameters that only track where a click came from.
+TRACKING_PARAMS = frozenset(["fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid", "spm"])
+# Snippets sharing at least this fraction of content words are treated as the same text.
+SNIPPET_DUPLICATE_THRESHOLD = 0.8
+
+def canonicalize_url(url: str) -> str:
+    """Reduces a URL to a form shared by trivially different links to the same page.
+
+    The scheme, "www." prefix, fragment, tracking parameters, parameter order
+    and trailing slash are ignored.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    params = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                    if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_"))
+    path = parts.path.rstrip("/")
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{host}{path}{query}"
+
+def evidence_hash(results_by_query: Dict[str, List[Dict]]) -> str:
+    """Fingerprints search results, so a later search can tell whether the evidence changed.
+
+    Result order, tracking parameters, case and whitespace don't count as
+    changes; a new, removed or reworded result does.
+    """
+    fingerprint = sorted(
+        (canonical_text(query), sorted({(canonicalize_url(r.get('href') or ''), normalize_text(r.get('title') or ''), normalize_text(r.get('body') or ''))
+                                        for r in results}))
+        for query, results in results_by_query.items()
+    )
+    return hashlib.sha256(json.dumps(fingerprint).encode("utf-8")).hexdigest()
+
+def result_tokens(result: Dict) -> List[str]:
+    return tokenize(f"{result.get('title', '')} {result.get('body', '')}")
+
+def result_cost(result: Dict) -> int:
+    """Approximate prompt tokens the result takes once formatted by SearchTools.process_results."""
+    return estimate_tokens(f"Result 00:\nTitle: {result.get('title', 'N/A')}\nLink: {result.get('href', 'N/A')}\nSnippet: {result.get('body', 'N/A')}\n\n")
+
+class ResultPool:
+    """Search results for all of a claim's assumptions, deduplicated and ranked per assumption.
+
+    Results are merged across queries, dropping repeats of the same canonical
+    URL and snippets that are near-duplicates of one already kept. select()
+    then reranks the whole pool with BM25 against one assumption, so a page
+    found while searching for another assumption can still be used.
+    """
+
+    def __init__(self, results_by_query: Dict[str, List[Dict]], snippet_threshold: float = SNIPPET_DUPLICATE_THRESHOLD):
+        self.results: List[Dict] = []
+        self._origins: Dict[str, List[int]] = {}
+        seen_urls: Dict[str, int] = {}
+        snippets: List[Tuple[str, ...]] = []
+        total = 0
+        for query, results in results_by_query.items():
+            origin = self._origins.setdefault(query, [])
+            for result in results:
+                total += 1
+                index = self._find_duplicate(result, seen_urls, snippets, snippet_threshold)
+                if index is None:
+                    index = len(self.results)
+                    self.results.append(result)
+                    snippets.append(claim_tokens(result.get('body') or result.get('title') or ""))
+                    if result.get('href'):
+                        seen_urls[canonicalize_url(result['href'])] = index
+                if index not in origin:
+                    origin.append(index)
+        if total:
+            logging.info(f"Pooled {len(self.results)} unique search results out of {total} across {len(results_by_query)} queries.")
+        self._bm25 = BM25([result_tokens(r) for r in self.results])
+
+    @staticmethod
+    def _find_duplicate(result: Dict, seen_urls: Dict[str, int], snippets: List[Tuple[str, ...]], threshold: float) -> Optional[int]:
+        if result.get('href'):
+            index = seen_urls.get(canonicalize_url(result['href']))
+            if index is not None:
+                return index
+        tokens = claim_tokens(result.get('body') or result.get('title') or "")
+        if not tokens:
+            return None
+        for index, other in enumerate(snippets):
+            if other and jaccard(tokens, other) >= threshold:
+                return index
+        return None
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def select(self, query: str, top_k: int = 5, token_budget: int = 1200) -> List[Dict]:
+        """Returns up to top_k of the results most relevant to query that fit within token_budget.
+
+        When nothing in the pool matches the query, the results originally
+        returned for it are used in their search-engine order instead.
+        """
+        scores = self._bm25.scores(tokenize(query))
+        ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: scores[i], reverse=True)
+        if not ranked:
+            ranked = self._origins.get(query, [])
+        chosen, used = [], 0
+        for i in ranked:
+            if len(chosen) >= top_k:
+                break
+            cost = result_cost(self.results[i])
+            if used + cost > token_budget:
+                continue
+            chosen.append(self.results[i])
+            used += cost
+        return chosen
+
+class SharedSearch:
+    """Runs the searches for several queries concurrently and pools the results once all are done.
+
+    Callers that need the pool block in pool() until every search finishes;
+    the pool is built only once. A failed search contributes no results, and
+    its error is available from error(), so one bad query doesn't break the
+    assumptions sharing the pool.
+    """
+
+    def __init__(self, search: Callable[[str], List[Dict]], queries: Iterable[str], executor: Executor):
+        self._futures = {query: executor.submit(bind(search), query) for query in dict.fromkeys(queries)}
+        self._pool: Optional[ResultPool] = None
+        self._errors: Dict[str, BaseException] = {}
+        self._lock = threading.Lock()
+
+    def pool(self, timeout: Optional[float] = None) -> ResultPool:
+        """Returns the pooled results; raises TimeoutError if the searches don't finish within timeout."""
+        with self._lock:
+            if self._pool is None:
+                _, not_done = wait(self._futures.values(), timeout=timeout)
+                if not_done:
+                    raise TimeoutError(f"{len(not_done)} of {len(self._futures)} searches did not finish in time.")
+                results = {}
+                for query, future in self._futures.items():
+                    error = future.exception()
+                    if error is None:
+                        results[query] = future.result()
+                    else:
+                        logging.warning(f"Search for '{query}' failed; pooling the other searches' results without it: {error}")
+                        self._errors[query] = error
+                self._pool = ResultPool(results)
+            return self._pool
+
+    def cancel(self):
+        """Cancels the searches that haven't started yet, e.g. once the claim's deadline has passed."""
+        for future in self._futures.values():
+            future.cancel()
+
+    def error(self, query: str) -> Optional[BaseException]:
+        """The exception the search for query raised, if it failed. Only meaningful once pool() has returned."""
+        return self._errors.get(query)
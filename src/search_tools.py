@@ -1,67 +1,397 @@
-from duckduckgo_search import DDGS
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import threading
 import time
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
+import requests
 from config.settings import settings
+from src.budget import current_budget
+from src.cache import DiskCache, create_llm_response_cache
+from src.clients import compile_prompt, get_chat_model
+from src.utils import normalize_text, is_time_sensitive
+from src.text_ranking import extractive_summary
+from src.local_index import LocalIndex
+from src.resilience import get_backend
+from src.retrieval import canonicalize_url
+from src.singleflight import SingleFlight
+from src.tracing import annotate, bind, record_llm_usage
 import logging
 
+SUMMARY_PROMPT = "Summarize the following search results concisely, focusing only on information relevant to fact-checking. Extract key facts and avoid opinions or irrelevant details:\n\n{search_results}"
+SUMMARY_TEMPERATURE = 0.1
+SUMMARY_MAX_TOKENS = 512
+# Elements that hold navigation, scripts or boilerplate rather than page content.
+NON_CONTENT_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg", "button"]
+CONTENT_TAGS = ["h1", "h2", "h3", "p", "li", "blockquote", "td"]
+FETCH_USER_AGENT = "Mozilla/5.0 (compatible; FactCheckerBot/1.0)"
+
+
+def extract_main_text(html: str, max_chars: int = 4000) -> str:
+    """Extracts the readable text of an HTML page, preferring its <article> or <main> element."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(NON_CONTENT_TAGS):
+        tag.decompose()
+    root = soup.find("article") or soup.find("main") or soup.body or soup
+    blocks = []
+    length = 0
+    for element in root.find_all(CONTENT_TAGS):
+        # Nested content tags (e.g. <p> inside <li>) would otherwise be counted twice.
+        if element.find_parent(CONTENT_TAGS) is not None:
+            continue
+        text = " ".join(element.get_text(" ", strip=True).split())
+        if len(text) < 25 and element.name not in ("h1", "h2", "h3"):
+            continue
+        blocks.append(text)
+        length += len(text) + 1
+        if length >= max_chars:
+            break
+    if not blocks:
+        blocks = [" ".join(root.get_text(" ", strip=True).split())]
+    return "\n".join(blocks)[:max_chars]
+
+
+class PageFetcher:
+    """Downloads result pages concurrently and extracts their main text.
+
+    Requests share one keep-alive session, at most per_host requests run
+    against any single host at a time, and bodies larger than max_bytes are
+    abandoned. Extracted text is cached on disk by URL together with the
+    page's ETag/Last-Modified, so a stale entry is revalidated with a
+    conditional request rather than downloaded again.
+    """
+
+    def __init__(self, cache: DiskCache, workers: int = 8, per_host: int = 2, timeout: float = 5.0,
+                 max_bytes: int = 2_000_000, max_chars: int = 4000, fresh_seconds: int = 86400):
+        self.cache = cache
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.fresh_seconds = fresh_seconds
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = FETCH_USER_AGENT
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Returns the extracted text of url, or None if it could not be fetched."""
+        cached = self.cache.get(url)
+        if cached is not None and time.time() - cached["fetched_at"] < self.fresh_seconds:
+            return cached["text"]
+
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            with self._slot(url):
+                with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                    if response.status_code == 304 and cached is not None:
+                        logging.info(f"Page not modified since last fetch: {url}")
+                        cached["fetched_at"] = time.time()
+                        self.cache.set(url, cached, ttl=settings.SEARCH_CACHE_TTL)
+                        return cached["text"]
+                    response.raise_for_status()
+                    content_type = response.headers.get("Content-Type", "")
+                    if "html" not in content_type and "text/plain" not in content_type:
+                        logging.info(f"Skipping {url}: unsupported content type '{content_type}'.")
+                        return None
+                    body = self._read_capped(response)
+                    if body is None:
+                        logging.info(f"Skipping {url}: page is larger than {self.max_bytes} bytes.")
+                        return None
+                    encoding = response.encoding or response.apparent_encoding or "utf-8"
+        except requests.RequestException as e:
+            logging.warning(f"Error fetching page {url}: {e}")
+            return cached["text"] if cached is not None else None
+
+        html = body.decode(encoding, errors="replace")
+        text = extract_main_text(html, self.max_chars) if "html" in content_type else html[:self.max_chars]
+        entry = {"text": text, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"), "fetched_at": time.time()}
+        self.cache.set(url, entry, ttl=settings.SEARCH_CACHE_TTL)
+        return text
+
+    def _read_capped(self, response: requests.Response) -> Optional[bytes]:
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            return None
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=65536):
+            size += len(chunk)
+            if size > self.max_bytes:
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def fetch_many(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """Fetches urls concurrently and returns {url: text or None}."""
+        unique = list(dict.fromkeys(urls))
+        return dict(zip(unique, self._executor.map(self.fetch, unique)))
+
+
+class SearchBackend:
+    """A search engine behind SearchTools.search.
+
+    search() returns dicts with "title", "href" and "body" keys, best first,
+    and raises when the search itself fails; an empty list means nothing was
+    found. Results of cacheable backends are kept in the search cache.
+    """
+    name = ""
+    cacheable = True
+
+    def search(self, query: str, num_results: int) -> List[Dict]:
+        raise NotImplementedError
+
+class DuckDuckGoBackend(SearchBackend):
+    name = "duckduckgo"
+
+    def search(self, query: str, num_results: int) -> List[Dict]:
+        """Performs a DuckDuckGo search.
+
+        Rate limits and transient errors are retried by the shared "duckduckgo"
+        backend; if the search still fails the error is raised, so callers
+        never mistake a failed search for one that found nothing.
+        """
+        from duckduckgo_search import DDGS
+
+        def run() -> List[Dict]:
+            return list(DDGS().text(keywords=query, max_results=num_results) or [])
+
+        try:
+            return get_backend("duckduckgo").call(run)
+        except Exception as e:
+            logging.error(f"Error during DuckDuckGo search for '{query}': {e}")
+            raise
+
+class LocalIndexBackend(SearchBackend):
+    """Searches a LocalIndex of documents on disk. Lookups take milliseconds, so results aren't cached."""
+    name = "local"
+    cacheable = False
+
+    def __init__(self, index: LocalIndex, corpus_dir: Optional[str] = None):
+        self.index = index
+        if corpus_dir:
+            self.index.update(corpus_dir)
+        if not len(self.index):
+            logging.warning(f"The local search index in {index.index_dir} is empty; build it with: python main.py index <corpus directory>")
+
+    def search(self, query: str, num_results: int) -> List[Dict]:
+        results = self.index.search(query, num_results)
+        annotate(local_search_results=len(results))
+        return results
+
+class FanoutBackend(SearchBackend):
+    """Queries several backends in parallel and interleaves their results by rank.
+
+    Results pointing at the same page are kept once. A backend that fails is
+    skipped; the search only fails when all of them do.
+    """
+    name = "fanout"
+
+    def __init__(self, backends: List[SearchBackend]):
+        self.backends = backends
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(backends)) * 4, thread_name_prefix="fanout")
+
+    def search(self, query: str, num_results: int) -> List[Dict]:
+        futures = [self._executor.submit(bind(backend.search), query, num_results) for backend in self.backends]
+        ranked, errors = [], []
+        for backend, future in zip(self.backends, futures):
+            try:
+                ranked.append(future.result())
+            except Exception as e:
+                logging.warning(f"{backend.name} search failed during fan-out for '{query}': {e}")
+                errors.append(e)
+        if errors and not ranked:
+            raise errors[0]
+        merged, seen = [], set()
+        for rank in range(max((len(results) for results in ranked), default=0)):
+            for results in ranked:
+                if rank < len(results):
+                    key = canonicalize_url(results[rank]['href']) if results[rank].get('href') else id(results[rank])
+                    if key not in seen:
+                        seen.add(key)
+                        merged.append(results[rank])
+        return merged
+
+def _local_backend() -> LocalIndexBackend:
+    index = LocalIndex(settings.LOCAL_INDEX_DIR, passage_words=settings.LOCAL_INDEX_PASSAGE_WORDS, max_segments=settings.LOCAL_INDEX_MAX_SEGMENTS)
+    return LocalIndexBackend(index, corpus_dir=settings.LOCAL_CORPUS_DIR or None)
+
+# Values of SEARCH_TOOL. "fanout" combines the backends listed in FANOUT_BACKENDS.
+SEARCH_BACKENDS: Dict[str, Callable[[], SearchBackend]] = {
+    "duckduckgo": DuckDuckGoBackend,
+    "local": _local_backend,
+    "fanout": lambda: FanoutBackend([create_search_backend(name) for name in settings.FANOUT_BACKENDS]),
+}
+
+def create_search_backend(name: str) -> SearchBackend:
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"Unsupported search tool: {name}. Choose one of: {', '.join(SEARCH_BACKENDS)}.")
+    return SEARCH_BACKENDS[name]()
+
 class SearchTools:
     def __init__(self, search_tool_name: str = "duckduckgo"):
         self.search_tool_name = search_tool_name
-        if self.search_tool_name != "duckduckgo":
-            raise ValueError(f"Unsupported search tool: {self.search_tool_name}. Only 'duckduckgo' is supported in this configuration.")
-        self.llm_for_summary = ChatGoogleGenerativeAI(
-            model=settings.LLM_MODEL,
-            temperature=0.1,
-            max_tokens=512,
-            google_api_key=settings.GEMINI_API_KEY
-        )
-        self._cache = {}
-
-    def search(self, query: str, num_results: int = 5) -> List[Dict]:
-        """Performs a web search using the specified search tool."""
-        cache_key = f"{query}_{num_results}"
-        if cache_key in self._cache:
-            logging.info(f"Returning search results from cache for query: {query}")
-            return self._cache[cache_key]
+        self.backend = create_search_backend(search_tool_name)
+        self._llm_for_summary = None
+        self.response_cache = create_llm_response_cache()
+        self._cache = DiskCache(settings.SEARCH_CACHE_FILE, table="search_results", max_entries=settings.SEARCH_CACHE_MAX_ENTRIES)
+        self._page_fetcher: Optional[PageFetcher] = None
+        self._page_fetcher_lock = threading.Lock()
+        self._searches_in_flight = SingleFlight()
+
+    @property
+    def llm_for_summary(self):
+        """The shared Gemini client used by the LLM summarizer, created on first use."""
+        if self._llm_for_summary is None:
+            self._llm_for_summary = get_chat_model(settings.LLM_MODEL, SUMMARY_TEMPERATURE, SUMMARY_MAX_TOKENS)
+        return self._llm_for_summary
+
+    @llm_for_summary.setter
+    def llm_for_summary(self, llm):
+        self._llm_for_summary = llm
+
+    def _cache_key(self, query: str, num_results: int) -> str:
+        return f"{self.search_tool_name}:{num_results}:{normalize_text(query)}"
 
-        if self.search_tool_name == "duckduckgo":
-            results = self._duckduckgo_search(query, num_results)
-            self._cache[cache_key] = results
+    def _cache_ttl(self, query: str) -> int:
+        # Queries about recent events go stale quickly, so they get a much shorter cache TTL.
+        if is_time_sensitive(query):
+            return settings.SEARCH_CACHE_NEWS_TTL
+        return settings.SEARCH_CACHE_TTL
+
+    def search(self, query: str, num_results: int = 5, refresh: bool = False) -> List[Dict]:
+        """Searches with the configured backend.
+
+        Concurrent searches for the same query share one request: later callers
+        wait for it and get a copy of its results (or its error). With refresh,
+        cached results are ignored and replaced by the new ones.
+        """
+        if not self.backend.cacheable:
+            results = self.backend.search(query, num_results)
+            annotate(search_results=len(results))
             return results
-        else:
-            raise ValueError(f"Unsupported search tool: {self.search_tool_name}")
+        cache_key = self._cache_key(query, num_results)
+        cached = None if refresh else self._cached_search(query, cache_key)
+        if cached is not None:
+            return cached
 
-    def _duckduckgo_search(self, query: str, num_results: int) -> List[Dict]:
-        """Performs a DuckDuckGo search."""
-        results = []
-        try:
-            ddgs = DDGS()
-            for r in ddgs.text(keywords=query, max_results=num_results):
-                results.append(r)
-        except Exception as e:
-            logging.error(f"Error during DuckDuckGo search: {e}")
+        def run() -> List[Dict]:
+            # The call we were waiting on may have just finished and filled the cache.
+            cached = None if refresh else self._cached_search(query, cache_key)
+            if cached is not None:
+                return cached
+            results = self.backend.search(query, num_results)
+            annotate(search_cache_misses=1, search_results=len(results))
+            # An empty result may only be a transient glitch, so don't pin it in the cache.
+            if results:
+                self._cache.set(cache_key, results, ttl=self._cache_ttl(query))
+            return results
+
+        results, shared = self._searches_in_flight.do((cache_key, refresh), run)
+        if shared:
+            logging.info(f"Shared an in-flight search for query: {query}")
+            annotate(search_coalesced=1, search_results=len(results))
         return results
 
+    def _cached_search(self, query: str, cache_key: str) -> Optional[List[Dict]]:
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logging.info(f"Returning search results from cache for query: {query}")
+            annotate(search_cache_hits=1, search_results=len(cached))
+        return cached
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters and the entry count of the search cache."""
+        return self._cache.stats()
+
+    @property
+    def page_fetcher(self) -> PageFetcher:
+        with self._page_fetcher_lock:
+            if self._page_fetcher is None:
+                self._page_fetcher = PageFetcher(
+                    DiskCache(settings.SEARCH_CACHE_FILE, table="pages", max_entries=settings.SEARCH_CACHE_MAX_ENTRIES),
+                    workers=settings.FETCH_WORKERS,
+                    per_host=settings.FETCH_PER_HOST,
+                    timeout=settings.FETCH_TIMEOUT,
+                    max_bytes=settings.FETCH_MAX_BYTES,
+                    max_chars=settings.FETCH_MAX_CHARS,
+                )
+            return self._page_fetcher
+
+    def fetch_pages(self, search_results: List[Dict], top_n: Optional[int] = None) -> List[Dict]:
+        """Adds the extracted page text of the top_n results as a "content" field.
+
+        Pages are downloaded concurrently; results whose page can't be fetched
+        are returned unchanged, so callers still have the snippet.
+        """
+        top_n = settings.FETCH_TOP_N if top_n is None else top_n
+        urls = [r['href'] for r in search_results[:top_n] if r.get('href')]
+        if not urls:
+            return search_results
+        pages = self.page_fetcher.fetch_many(urls)
+        enriched = []
+        for result in search_results:
+            content = pages.get(result.get('href'))
+            enriched.append({**result, "content": content} if content else result)
+        return enriched
+
     def process_results(self, search_results: List[Dict]) -> str:
         """Processes search results into a readable string format."""
-        processed_string = ""
+        blocks = []
         for i, result in enumerate(search_results):
-            processed_string += f"Result {i+1}:\n"
-            processed_string += f"Title: {result.get('title', 'N/A')}\n"
-            processed_string += f"Link: {result.get('href', 'N/A')}\n"
-            processed_string += f"Snippet: {result.get('body', 'N/A')}\n\n"
-        return processed_string
-
-    def summarize_search_results(self, search_results_text: str) -> str:
-        """Summarizes the raw text of search results using the LLM."""
+            block = f"Result {i+1}:\nTitle: {result.get('title', 'N/A')}\nLink: {result.get('href', 'N/A')}\nSnippet: {result.get('body', 'N/A')}\n"
+            if result.get('content'):
+                block += f"Content: {result['content']}\n"
+            blocks.append(block + "\n")
+        return "".join(blocks)
+
+    def summarize_search_results(self, search_results_text: str, query: Optional[str] = None) -> str:
+        """Summarizes the raw text of search results.
+
+        With SUMMARIZER = "extractive" and a query, the sentences most relevant to
+        the query are selected locally without an LLM call; the LLM summarizer is
+        used otherwise, or when no sentence matches the query. An LLM summary
+        counts against the current claim's budget; once that has run out, the
+        start of the raw text is returned instead.
+        """
         if not search_results_text.strip():
             return "No relevant search results found to summarize."
 
-        prompt_template = ChatPromptTemplate.from_template(
-            "Summarize the following search results concisely, focusing only on information relevant to fact-checking. Extract key facts and avoid opinions or irrelevant details:\n\n{search_results}"
-        )
-        chain = prompt_template | self.llm_for_summary
-        summary = chain.invoke({"search_results": search_results_text})
-        return summary.content
+        if settings.SUMMARIZER == "extractive" and query:
+            summary = extractive_summary(search_results_text, query, token_budget=settings.SUMMARY_TOKEN_BUDGET)
+            if summary:
+                return summary
+            logging.info(f"Extractive summary found nothing relevant to '{query}'; falling back to the LLM summarizer.")
+
+        inputs = {"search_results": search_results_text}
+        cache_key = self.response_cache.make_key(SUMMARY_PROMPT, inputs, settings.LLM_MODEL, SUMMARY_TEMPERATURE, SUMMARY_MAX_TOKENS)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        if not current_budget().try_llm_call():
+            return search_results_text[:settings.SUMMARY_TOKEN_BUDGET * 4]
+
+        def invoke() -> str:
+            messages = compile_prompt(SUMMARY_PROMPT).format_messages(**inputs)
+            response = get_backend("gemini").call(lambda: self.llm_for_summary.invoke(messages))
+            record_llm_usage(response)
+            return response.content
+
+        return self.response_cache.get_or_compute(cache_key, invoke)
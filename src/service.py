@@ -0,0 +1,363 @@
+import asyncio
+import json
+import logging
+import signal
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from config.settings import settings
+from src.budget import get_mode
+from src.database import clear_fact_checks, flush_writes, load_fact_check, load_history_page, search_fact_checks
+from src.tracing import render_prometheus
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+MAX_BODY_BYTES = 64 * 1024
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+def _parse_int(value: Any, name: str) -> int:
+    """int(value), or a 400 error naming the offending field."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"'{name}' must be an integer.")
+
+@dataclass
+class Job:
+    """A submitted claim and everything the pipeline has reported for it so far."""
+    id: str
+    claim: str
+    reuse_previous: bool
+    mode: Optional[str] = None
+    status: str = QUEUED
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def add_event(self, stage: str, data: Dict[str, Any]):
+        self.events.append({"stage": stage, "data": data})
+        self._notify()
+
+    def finish(self, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        self.status, self.result, self.error, self.finished_at = status, result, error, time.time()
+        self._notify()
+
+    def _notify(self):
+        # Wake every streaming reader, then arm a fresh event for the next change.
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def summary(self) -> Dict[str, Any]:
+        return {"job_id": self.id, "claim": self.claim, "mode": self.mode, "status": self.status, "result": self.result,
+                "error": self.error, "submitted_at": self.submitted_at, "finished_at": self.finished_at}
+
+class FactCheckService:
+    """HTTP API for fact-checking claims asynchronously.
+
+    Claims are queued (at most queue_size waiting) and processed by a fixed
+    pool of workers that share one FactChecker, and with it the LLM client,
+    caches, near-duplicate index and database connections. Routes:
+
+        POST   /fact-checks                {"claim": ..., "reuse_previous": true, "mode": "fast"} -> 202 {"job_id"}, 429 when full
+        GET    /fact-checks/<job_id>        job status and, once done, the result
+        GET    /fact-checks/<job_id>/events progress events as newline-delimited JSON, streamed until done
+        GET    /history?before_id=&limit=   a page of stored fact-checks
+        GET    /history/search?q=&limit=    full-text search over stored fact-checks
+        GET    /history/<id>                one stored fact-check
+        DELETE /history                     delete all stored fact-checks
+        GET    /health, GET /metrics
+    """
+
+    def __init__(self, fact_checker, workers: int = 4, queue_size: int = 100, job_retention: int = 1000):
+        self.fact_checker = fact_checker
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.job_retention = job_retention
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.accepting = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> int:
+        """Starts the workers and the HTTP listener; returns the bound port."""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="service")
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self.accepting = True
+        bound_port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Fact-check service listening on http://{host}:{bound_port} with {self.workers} workers.")
+        return bound_port
+
+    async def shutdown(self, drain_timeout: float = 60.0):
+        """Stops taking new jobs, waits up to drain_timeout for queued and running jobs, then stops.
+
+        Jobs still queued or running after drain_timeout are marked failed and
+        abandoned: their threads aren't waited for, and stop at their next event.
+        """
+        self.accepting = False
+        logging.info(f"Draining {self._queue.qsize()} queued and {self._running} running jobs...")
+        drained = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            drained = False
+            logging.warning(f"Drain timed out after {drain_timeout}s; {self._queue.qsize() + self._running} jobs were not finished.")
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            if job.status in (QUEUED, RUNNING):
+                job.finish(FAILED, error="The service shut down before this job finished.")
+        # Closed last, so clients can keep polling and streaming results while jobs drain.
+        self._server.close()
+        await self._server.wait_closed()
+        self._executor.shutdown(wait=drained, cancel_futures=True)
+        flush_writes()
+        logging.info("Fact-check service stopped.")
+
+    def busy(self) -> bool:
+        """Whether any claim is queued or running. Safe to call from other threads."""
+        return self._running > 0 or (self._queue is not None and not self._queue.empty())
+
+    def submit(self, claim: str, reuse_previous: bool = True, mode: Optional[str] = None) -> Job:
+        if not self.accepting:
+            raise HTTPError(503, "The service is shutting down.")
+        try:
+            mode = get_mode(mode).name
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        job = Job(id=uuid.uuid4().hex, claim=claim, reuse_previous=reuse_previous, mode=mode)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPError(429, f"The job queue is full ({self.queue_size} claims waiting); retry later.", {"Retry-After": "5"})
+        self.jobs[job.id] = job
+        self._prune_jobs()
+        return job
+
+    def _prune_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in (DONE, FAILED)]
+        for job_id in finished[:max(0, len(self.jobs) - self.job_retention)]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            self._running += 1
+            job.status = RUNNING
+            job._notify()
+            try:
+                result = await loop.run_in_executor(self._executor, self._run_job, job, loop)
+                job.finish(DONE, result=result)
+            except Exception as e:
+                logging.error(f"Fact-check job {job.id} failed: {e}")
+                job.finish(FAILED, error=str(e))
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    def _run_job(self, job: Job, loop: asyncio.AbstractEventLoop) -> Optional[Dict]:
+        result = None
+        for event in self.fact_checker.iter_process_claim(job.claim, reuse_previous=job.reuse_previous, mode=job.mode):
+            if job.status == FAILED:
+                # Abandoned by shutdown.
+                return None
+            loop.call_soon_threadsafe(job.add_event, event.stage, event.data)
+            if event.stage == "result":
+                result = event.data
+        return result
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, path, query, body = await self._read_request(reader)
+            await self._route(method, path, query, body, writer)
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": str(e)}, e.headers)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logging.error(f"Error handling service request: {e}")
+            await self._send_json(writer, 500, {"error": "Internal server error."})
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, List[str]], bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        try:
+            method, target, _version = request_line.split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line.")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = _parse_int(headers.get("content-length") or "0", "Content-Length")
+        if length < 0:
+            raise HTTPError(400, "'Content-Length' must not be negative.")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request bodies are limited to {MAX_BODY_BYTES} bytes.")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), body
+
+    async def _route(self, method: str, path: str, query: Dict[str, List[str]], body: bytes, writer: asyncio.StreamWriter):
+        parts = [p for p in path.split("/") if p]
+        if parts == ["fact-checks"] and method == "POST":
+            payload = self._parse_json(body)
+            claim = payload.get("claim")
+            if not isinstance(claim, str) or not claim.strip():
+                raise HTTPError(400, "A non-empty 'claim' string is required.")
+            mode = payload.get("mode")
+            if mode is not None and not isinstance(mode, str):
+                raise HTTPError(400, "'mode' must be a string.")
+            job = self.submit(claim.strip(), bool(payload.get("reuse_previous", True)), mode)
+            await self._send_json(writer, 202, {"job_id": job.id, "status": job.status}, {"Location": f"/fact-checks/{job.id}"})
+        elif len(parts) == 2 and parts[0] == "fact-checks" and method == "GET":
+            await self._send_json(writer, 200, self._job(parts[1]).summary())
+        elif len(parts) == 3 and parts[0] == "fact-checks" and parts[2] == "events" and method == "GET":
+            await self._stream_events(self._job(parts[1]), writer)
+        elif parts == ["history"] and method == "GET":
+            before_id = query.get("before_id", [None])[0]
+            rows, next_before_id = await asyncio.to_thread(
+                load_history_page, _parse_int(before_id, "before_id") if before_id else None, self._int_param(query, "limit", 20))
+            await self._send_json(writer, 200, {"fact_checks": rows, "next_before_id": next_before_id})
+        elif parts == ["history"] and method == "DELETE":
+            await asyncio.to_thread(clear_fact_checks)
+            # The deleted claims must no longer be offered as near-duplicates.
+            claim_index = getattr(self.fact_checker, "claim_index", None)
+            if claim_index is not None:
+                claim_index.clear()
+            await self._send_json(writer, 200, {"cleared": True})
+        elif parts == ["history", "search"] and method == "GET":
+            rows = await asyncio.to_thread(search_fact_checks, query.get("q", [""])[0], self._int_param(query, "limit", 20))
+            await self._send_json(writer, 200, {"fact_checks": rows})
+        elif len(parts) == 2 and parts[0] == "history" and method == "GET":
+            row = await asyncio.to_thread(load_fact_check, _parse_int(parts[1], "id"))
+            if row is None:
+                raise HTTPError(404, f"No fact-check with id {parts[1]}.")
+            await self._send_json(writer, 200, row)
+        elif parts == ["health"] and method == "GET":
+            await self._send_json(writer, 200, {"status": "ok" if self.accepting else "draining",
+                                                "queued": self._queue.qsize(), "running": self._running})
+        elif parts == ["metrics"] and method == "GET":
+            await self._send(writer, 200, render_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            raise HTTPError(404 if method in ("GET", "POST", "DELETE") else 405, f"No route for {method} {path}.")
+
+    def _job(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPError(404, f"No job with id {job_id}.")
+        return job
+
+    @staticmethod
+    def _parse_json(body: bytes) -> Dict[str, Any]:
+        try:
+            payload = json.loads(body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise HTTPError(400, "The request body must be JSON.")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "The request body must be a JSON object.")
+        return payload
+
+    @staticmethod
+    def _int_param(query: Dict[str, List[str]], name: str, default: int) -> int:
+        return max(1, min(100, _parse_int(query.get(name, [default])[0], name)))
+
+    async def _stream_events(self, job: Job, writer: asyncio.StreamWriter):
+        """Sends every event of the job as one JSON line per chunk, replaying past ones first."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        sent = 0
+        while True:
+            changed = job.changed
+            while sent < len(job.events):
+                line = json.dumps(job.events[sent], ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+                writer.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                sent += 1
+            await writer.drain()
+            if job.status in (DONE, FAILED):
+                if job.status == FAILED:
+                    line = json.dumps({"stage": "error", "data": {"error": job.error}}).encode("utf-8") + b"\n"
+                    writer.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                break
+            await changed.wait()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        await self._send(writer, status, json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"), "application/json", headers)
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+def serve(host: str, port: int, workers: int, queue_size: int, drain_timeout: float):
+    """Runs the service until SIGINT/SIGTERM, then drains in-flight jobs before exiting.
+
+    With REFRESH_INTERVAL_MINUTES set, stale fact-checks are refreshed in the
+    background whenever no claims are queued or running.
+    """
+    from src.database import init_db
+    from src.fact_checker import FactChecker
+    from src.refresh import Refresher
+
+    async def main():
+        init_db()
+        fact_checker = FactChecker(model_name=settings.LLM_MODEL, search_tool_name=settings.SEARCH_TOOL)
+        service = FactCheckService(fact_checker, workers=workers, queue_size=queue_size)
+        await service.start(host, port)
+        refresher = None
+        if settings.REFRESH_INTERVAL_MINUTES > 0:
+            refresher = Refresher(fact_checker, busy=service.busy)
+            refresher.start(settings.REFRESH_INTERVAL_MINUTES)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:  # Windows
+                signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+        await stop.wait()
+        if refresher is not None:
+            refresher.stop()
+        await service.shutdown(drain_timeout)
+        # Verifications of jobs abandoned by the drain timeout aren't waited for.
+        fact_checker.close(wait=False)
+
+    asyncio.run(main())
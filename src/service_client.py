@@ -0,0 +1,90 @@
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+import requests
+from src.fact_checker import FactCheckEvent, RESULT
+
+class ServiceError(Exception):
+    """Raised when the fact-check service rejects a request or a job fails."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class FactCheckClient:
+    """Talks to a FactCheckService over HTTP.
+
+    It offers the same iter_process_claim/process_claim methods as FactChecker
+    and the same history functions as src.database, so callers like the
+    Streamlit app can use either without other changes.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10.0, session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=kwargs.pop("timeout", self.timeout), **kwargs)
+        except requests.RequestException as e:
+            raise ServiceError(f"Could not reach the fact-check service at {self.base_url}: {e}")
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("error", response.text)
+            except ValueError:
+                message = response.text
+            raise ServiceError(f"{method} {path} failed with {response.status_code}: {message}", response.status_code)
+        return response
+
+    def submit(self, claim: str, reuse_previous: bool = True, mode: Optional[str] = None) -> str:
+        """Queues a claim and returns its job id. Raises ServiceError with status 429 when the queue is full."""
+        payload = {"claim": claim, "reuse_previous": reuse_previous}
+        if mode is not None:
+            payload["mode"] = mode
+        return self._request("POST", "/fact-checks", json=payload).json()["job_id"]
+
+    def get_job(self, job_id: str) -> Dict:
+        return self._request("GET", f"/fact-checks/{job_id}").json()
+
+    def iter_events(self, job_id: str) -> Iterator[FactCheckEvent]:
+        """Yields the job's events from the start, then live ones until it finishes."""
+        response = self._request("GET", f"/fact-checks/{job_id}/events", stream=True, timeout=(self.timeout, None))
+        with response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event["stage"] == "error":
+                    raise ServiceError(f"Fact-check job {job_id} failed: {event['data']['error']}")
+                yield FactCheckEvent(event["stage"], event["data"])
+
+    def iter_process_claim(self, claim: str, reuse_previous: bool = True, persist: bool = True, mode: Optional[str] = None) -> Iterator[FactCheckEvent]:
+        # The service always persists results; persist is accepted for parity with FactChecker.
+        yield from self.iter_events(self.submit(claim, reuse_previous, mode))
+
+    def process_claim(self, claim: str, reuse_previous: bool = True, persist: bool = True, mode: Optional[str] = None) -> Dict:
+        for event in self.iter_process_claim(claim, reuse_previous, persist, mode):
+            if event.stage == RESULT:
+                return event.data
+        raise ServiceError("The fact-check service closed the stream without a result.")
+
+    def load_history_page(self, before_id: Optional[int] = None, limit: int = 20) -> Tuple[List[dict], Optional[int]]:
+        params = {"limit": limit}
+        if before_id is not None:
+            params["before_id"] = before_id
+        page = self._request("GET", "/history", params=params).json()
+        return page["fact_checks"], page["next_before_id"]
+
+    def load_fact_check(self, fact_id: int) -> Optional[dict]:
+        try:
+            return self._request("GET", f"/history/{fact_id}").json()
+        except ServiceError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def search_fact_checks(self, query: str, limit: int = 20) -> List[dict]:
+        return self._request("GET", "/history/search", params={"q": query, "limit": limit}).json()["fact_checks"]
+
+    def clear_fact_checks(self):
+        self._request("DELETE", "/history")
@@ -0,0 +1,68 @@
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one computation.
+
+    The first caller for a key (the leader) runs the computation; callers that
+    arrive while it is in flight wait for it and receive a deep copy of its
+    result, so they can modify it freely, or the exception it raised. The key
+    is forgotten as soon as the call finishes: nothing is cached here, so a
+    failed call is simply retried by the next caller.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def begin(self, key: Hashable) -> Tuple[Future, bool]:
+        """Returns the in-flight call for key and whether the caller is its leader.
+
+        A leader must end the call with resolve() or fail(); other callers wait
+        with wait().
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def resolve(self, key: Hashable, future: Future, result: Any):
+        self._forget(key, future)
+        future.set_result(result)
+
+    def fail(self, key: Hashable, future: Future, error: BaseException):
+        # Waiters shouldn't see the leader's GeneratorExit or KeyboardInterrupt as their own.
+        if not isinstance(error, Exception):
+            error = RuntimeError(f"The shared call was interrupted: {error!r}")
+        self._forget(key, future)
+        future.set_exception(error)
+
+    @staticmethod
+    def wait(future: Future) -> Any:
+        return copy.deepcopy(future.result())
+
+    def _forget(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Runs fn, or waits for the identical call already running. Returns (result, shared)."""
+        future, leader = self.begin(key)
+        if not leader:
+            return self.wait(future), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self.fail(key, future, e)
+            raise
+        self.resolve(key, future, result)
+        return result, False
@@ -0,0 +1,89 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence
+from src.claim_index import STOPWORDS
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+# Lines of SearchTools.process_results output that carry no evidence text.
+_RESULT_METADATA = re.compile(r"^(Result \d+:|Link:)")
+_RESULT_FIELD_PREFIX = re.compile(r"^(Title|Snippet|Content):\s*")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token for English)."""
+    return len(text) // 4 + 1
+
+class BM25:
+    """Okapi BM25 over a fixed set of tokenized documents.
+
+    Term frequencies are kept as postings (term -> [(doc, tf)]), so scoring a
+    query only touches documents that contain at least one query term.
+    """
+
+    def __init__(self, documents: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(documents)
+        self.doc_lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.doc_lengths) / self.doc_count) if self.doc_count else 0.0
+        self.postings: Dict[str, List[tuple]] = {}
+        for doc_id, doc in enumerate(documents):
+            for term, tf in Counter(doc).items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def scores(self, query_tokens: Sequence[str]) -> List[float]:
+        """Returns one score per document, in document order."""
+        scores = [0.0] * self.doc_count
+        if not self.avg_length:
+            return scores
+        for term in set(query_tokens):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+def split_sentences(text: str) -> List[str]:
+    """Splits search result text into sentences, dropping result numbering and links."""
+    sentences = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or _RESULT_METADATA.match(line):
+            continue
+        line = _RESULT_FIELD_PREFIX.sub("", line)
+        sentences.extend(s.strip() for s in SENTENCE_PATTERN.split(line) if s.strip())
+    return sentences
+
+def extractive_summary(text: str, query: str, token_budget: int = 300) -> str:
+    """Picks the sentences most relevant to query (by BM25) that fit within token_budget.
+
+    Selected sentences are returned as a bulleted list in their original order.
+    Returns an empty string when nothing in the text matches the query.
+    """
+    sentences = list(dict.fromkeys(split_sentences(text)))
+    query_tokens = tokenize(query)
+    if not sentences or not query_tokens:
+        return ""
+    scores = BM25([tokenize(s) for s in sentences]).scores(query_tokens)
+    ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: scores[i], reverse=True)
+
+    chosen, used = [], 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i])
+        if used + cost > token_budget:
+            continue
+        chosen.append(i)
+        used += cost
+    return "\n".join(f"- {sentences[i]}" for i in sorted(chosen))
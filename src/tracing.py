@@ -0,0 +1,236 @@
+import contextvars
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from src.resilience import backend_metrics
+
+# Upper bounds (seconds) of the stage duration histogram buckets.
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = "factchecker"
+
+@dataclass
+class Span:
+    """One timed stage of a fact-check. start is seconds since the trace began."""
+    id: int
+    name: str
+    parent: Optional[int]
+    start: float
+    duration_ms: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "name": self.name, "parent": self.parent, "start": round(self.start, 4),
+                "duration_ms": round(self.duration_ms, 2), "attributes": dict(self.attributes)}
+
+class Trace:
+    """The spans recorded while processing one claim, possibly from several threads."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.started = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _open(self, name: str, parent: Optional[int], attributes: Dict[str, Any]) -> Span:
+        with self._lock:
+            span = Span(next(self._ids), name, parent, time.perf_counter() - self.started, attributes=attributes)
+            self.spans.append(span)
+            return span
+
+    def add(self, span: Span, counts: Dict[str, float]):
+        with self._lock:
+            for key, amount in counts.items():
+                span.attributes[key] = span.attributes.get(key, 0) + amount
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [span.to_dict() for span in self.spans]
+
+    def totals(self) -> Dict[str, float]:
+        """Sums every numeric counter (tokens, cache hits, ...) over all spans."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                for key, value in span.attributes.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        totals[key] = totals.get(key, 0) + value
+        return totals
+
+class MetricsRegistry:
+    """Process-wide stage duration histograms and counters, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            buckets, total = self._histograms.setdefault(stage, ([0] * (len(DURATION_BUCKETS) + 1), [0.0]))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            buckets[-1] += 1
+            total[0] += seconds
+
+    def increment(self, name: str, stage: str, amount: float):
+        with self._lock:
+            self._counters[(name, stage)] = self._counters.get((name, stage), 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        lines = [f"# HELP {METRIC_PREFIX}_stage_duration_seconds Wall time of each pipeline stage.",
+                 f"# TYPE {METRIC_PREFIX}_stage_duration_seconds histogram"]
+        with self._lock:
+            for stage, (buckets, total) in sorted(self._histograms.items()):
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'{METRIC_PREFIX}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {buckets[-1]}')
+                lines.append(f'{METRIC_PREFIX}_stage_duration_seconds_sum{{stage="{stage}"}} {total[0]:.6f}')
+                lines.append(f'{METRIC_PREFIX}_stage_duration_seconds_count{{stage="{stage}"}} {buckets[-1]}')
+            counter_names = sorted({name for name, _ in self._counters})
+            for name in counter_names:
+                lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+                for (counter, stage), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f'{METRIC_PREFIX}_{name}_total{{stage="{stage}"}} {value:g}')
+        for backend, values in sorted(backend_metrics().items()):
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)):
+                    lines.append(f'{METRIC_PREFIX}_backend_{key}{{backend="{backend}"}} {value:g}')
+            lines.append(f'{METRIC_PREFIX}_backend_circuit_open{{backend="{backend}"}} {int(values["circuit_state"] != "closed")}')
+        return "\n".join(lines) + "\n"
+
+METRICS = MetricsRegistry()
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+def _reset(var: contextvars.ContextVar, token: contextvars.Token):
+    try:
+        var.reset(token)
+    except ValueError:
+        # A generator closed from another context can't restore the value it set; just clear it.
+        var.set(None)
+
+@contextmanager
+def start_trace() -> Iterator[Trace]:
+    """Collects the spans opened inside the block (and in threads started with bind) into a new Trace."""
+    trace = Trace()
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _reset(_current_span, span_token)
+        _reset(_current_trace, trace_token)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Times the enclosed stage. Its duration and counts always feed the process-wide metrics;
+    the span itself is only kept when a trace is active."""
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    parent_id = parent.id if parent else None
+    current = trace._open(name, parent_id, attributes) if trace else Span(0, name, parent_id, 0.0, attributes)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        elapsed = time.perf_counter() - started
+        current.duration_ms = elapsed * 1000
+        _reset(_current_span, token)
+        METRICS.observe(name, elapsed)
+
+def annotate(**counts: float):
+    """Adds counts (tokens, cache hits, ...) to the current span and the process-wide counters."""
+    current = _current_span.get()
+    stage = current.name if current else "none"
+    for key, amount in counts.items():
+        METRICS.increment(key, stage, amount)
+    trace = _current_trace.get()
+    if trace and current and current.id:
+        trace.add(current, counts)
+
+def record_llm_usage(*messages: Any):
+    """Counts an LLM call and its input/output tokens from the response's usage_metadata."""
+    input_tokens = output_tokens = 0
+    for message in messages:
+        usage = getattr(message, "usage_metadata", None)
+        if isinstance(usage, dict):
+            input_tokens += usage.get("input_tokens", 0) or 0
+            output_tokens += usage.get("output_tokens", 0) or 0
+    annotate(llm_calls=1, input_tokens=input_tokens, output_tokens=output_tokens)
+
+def stage_summary(spans: List[Dict[str, Any]]) -> List[Tuple[str, float, float]]:
+    """Returns (stage, duration_ms, LLM tokens) for each top-level stage of a stored trace,
+    counting the tokens of all its nested spans."""
+    if not spans:
+        return []
+    parents = {s["id"]: s["parent"] for s in spans}
+    root = spans[0]["id"]
+    tokens: Dict[int, float] = {}
+    for s in spans:
+        node = s["id"]
+        while parents.get(node) is not None and parents[node] != root:
+            node = parents[node]
+        tokens[node] = tokens.get(node, 0) + s["attributes"].get("input_tokens", 0) + s["attributes"].get("output_tokens", 0)
+    return [(s["name"], s["duration_ms"], tokens.get(s["id"], 0)) for s in spans if s["parent"] == root]
+
+def bind(fn: Callable) -> Callable:
+    """Wraps fn to run in a copy of the current context, so spans it opens on a worker thread
+    join the caller's trace. Bind once per submitted task: a context can't run on two threads."""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+def render_prometheus() -> str:
+    return METRICS.render()
+
+def write_prometheus(path: str):
+    """Writes the metrics to path atomically, e.g. for node_exporter's textfile collector."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """Serves /metrics on a background thread. Safe to call repeatedly; only one server is started."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                logging.warning(f"Could not start metrics endpoint on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+            logging.info(f"Serving Prometheus metrics on http://{host}:{_server.server_port}/metrics")
+        return _server
@@ -1,10 +1,27 @@
 import streamlit as st
 import re
-import os
-import logging
-from src.fact_checker import FactChecker
+from src.fact_checker import (
+    FactChecker, DUPLICATE, CLASSIFICATION, INITIAL_RESPONSE, ASSUMPTIONS,
+    ASSUMPTION_VERDICT, EVIDENCE, FINAL_ANSWER_CHUNK, RESULT
+)
 from config.settings import settings
-from src.database import load_all_fact_checks, DATABASE_FILE
+from src.database import load_history_page, load_fact_check, clear_fact_checks, search_fact_checks
+from src.resilience import backend_metrics
+from src.tracing import stage_summary
+
+if settings.FACT_CHECK_SERVICE_URL:
+    # Claims and history go through the shared fact-check service instead of this process.
+    from src.service_client import FactCheckClient
+    service_client = FactCheckClient(settings.FACT_CHECK_SERVICE_URL)
+    load_history_page, load_fact_check = service_client.load_history_page, service_client.load_fact_check
+    clear_fact_checks, search_fact_checks = service_client.clear_fact_checks, service_client.search_fact_checks
+else:
+    service_client = None
+
+@st.cache_resource
+def shared_fact_checker():
+    """One FactChecker per process, shared by every session: its LLM clients, caches and claim index are built once."""
+    return service_client or FactChecker(model_name=settings.LLM_MODEL, search_tool_name=settings.SEARCH_TOOL)
 
 def strip_markdown(text):
     text = re.sub(r'\*\*([^\*]+)\*\*', r'\1', text)
@@ -13,43 +30,100 @@ def strip_markdown(text):
     text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
     return text
 
+def run_fact_check(fact_checker, claim, reuse_previous, mode=None):
+    """Runs the pipeline, rendering each stage as soon as it finishes, and returns the result."""
+    result = None
+    with st.status("Fact-checking in progress...", expanded=True) as status:
+        answer_placeholder = None
+        answer_text = ""
+        for event in fact_checker.iter_process_claim(claim, reuse_previous=reuse_previous, mode=mode):
+            if event.stage == DUPLICATE:
+                status.update(label="Found a previous fact-check of a near-identical claim.")
+            elif event.stage == CLASSIFICATION:
+                st.markdown(f"**Claim Type:** `{event.data['claim_type']}`")
+            elif event.stage == INITIAL_RESPONSE:
+                st.markdown(f"**Initial Response:** {event.data['initial_response']}")
+                status.update(label="Extracting and verifying assumptions...")
+            elif event.stage == ASSUMPTIONS and event.data['assumptions']:
+                st.markdown("#### Assumptions and Verdicts:")
+            elif event.stage == ASSUMPTION_VERDICT:
+                st.markdown(f"- {event.data['verdict']}")
+            elif event.stage == EVIDENCE:
+                st.markdown(f"```\n{event.data['evidence']}\n```")
+            elif event.stage == FINAL_ANSWER_CHUNK:
+                if answer_placeholder is None:
+                    status.update(label="Writing the final answer...")
+                    st.markdown("**Final Answer:**")
+                    answer_placeholder = st.empty()
+                answer_text += event.data['text']
+                answer_placeholder.markdown(answer_text)
+            elif event.stage == RESULT:
+                result = event.data
+        status.update(label="Fact-checking complete!", state="complete", expanded=False)
+    return result
+
+HISTORY_PAGE_SIZE = 20
+
 def clear_history_callback():
-    if os.path.exists(DATABASE_FILE):
-        os.remove(DATABASE_FILE)
-    st.session_state.fact_history = []
-    st.session_state.selected_fact_index = None
-    st.session_state.fact_checker_instance = FactChecker(model_name=settings.LLM_MODEL, search_tool_name=settings.SEARCH_TOOL)
+    clear_fact_checks()
+    st.session_state.history_cursors = [None]
+    st.session_state.selected_fact_id = None
+    st.session_state.selected_entry = None
+    if service_client is None:
+        # The deleted claims must no longer be offered as near-duplicates.
+        fact_checker.claim_index.clear()
     st.session_state.clear_flag = True
     st.success("History and database cleared!")
 
-if 'fact_checker_instance' not in st.session_state:
-    st.session_state.fact_checker_instance = FactChecker(model_name=settings.LLM_MODEL, search_tool_name=settings.SEARCH_TOOL)
-fact_checker = st.session_state.fact_checker_instance
+def select_fact_check(fact_id):
+    # Full rows are only loaded for the entry being viewed.
+    st.session_state.selected_fact_id = fact_id
+    st.session_state.selected_entry = load_fact_check(fact_id)
+
+def older_page_callback(before_id):
+    st.session_state.history_cursors.append(before_id)
+
+def newer_page_callback():
+    st.session_state.history_cursors.pop()
+
+fact_checker = shared_fact_checker()
 
 st.set_page_config(page_title="AI Fact-Checker Bot", layout="wide")
 
 st.title("🤖 AI Fact-Checker Bot")
 st.subheader("Verify claims with the power of AI and web search.")
 
-if "fact_history" not in st.session_state:
-    logging.info("Loading history from database...")
-    st.session_state.fact_history = load_all_fact_checks()
-    logging.info(f"Loaded {len(st.session_state.fact_history)} items into session state.")
-if "selected_fact_index" not in st.session_state:
-    st.session_state.selected_fact_index = None
+# Only the current page's cursor stack and the selected entry live in the session,
+# so per-session memory doesn't grow with the size of the history table.
+if "history_cursors" not in st.session_state:
+    st.session_state.history_cursors = [None]
+if "selected_fact_id" not in st.session_state:
+    st.session_state.selected_fact_id = None
+if "selected_entry" not in st.session_state:
+    st.session_state.selected_entry = None
 
 claim_input = st.text_area("Enter the claim you want to fact-check:", height=100, key="claim_input")
+reuse_previous = st.checkbox("Reuse previous results for near-identical claims", value=True, key="reuse_previous")
+pipeline_mode = st.radio(
+    "Depth", list(settings.PIPELINE_MODES), horizontal=True, key="pipeline_mode",
+    index=list(settings.PIPELINE_MODES).index(settings.PIPELINE_MODE) if settings.PIPELINE_MODE in settings.PIPELINE_MODES else 0,
+    help="Fast answers quickly from fewer searches; deep searches every assumption. Each mode caps LLM calls, searches and time per claim."
+)
 
 if st.button("Fact-Check"):
     if claim_input:
-        with st.spinner("Fact-checking in progress..."):
-            try:
-                result = fact_checker.process_claim(claim_input)
-                st.session_state.fact_history.append(result) 
+        try:
+            result = run_fact_check(fact_checker, claim_input, reuse_previous, pipeline_mode)
+            if result.get('duplicate_of') is not None:
+                st.info(f"Showing a previous fact-check of a near-identical claim (similarity {result['similarity']:.0%}). Untick the box above to run a fresh check.")
+                st.session_state.selected_fact_id = result['duplicate_of']
+            else:
                 st.success("Fact-checking complete!")
-                st.session_state.selected_fact_index = len(st.session_state.fact_history) - 1
-            except Exception as e:
-                st.error(f"An error occurred during fact-checking: {e}")
+                st.session_state.selected_fact_id = None
+            st.session_state.selected_entry = result
+            st.session_state.history_cursors = [None]
+        except Exception as e:
+            st.error(f"An error occurred during fact-checking: {e}")
     else:
         st.warning("Please enter a claim to fact-check.")
 
@@ -57,38 +131,65 @@ st.markdown("---")
 
 st.sidebar.header("Fact-Check History")
 
-if st.session_state.fact_history:
-    history_options = []
-    for i, entry in enumerate(st.session_state.fact_history):
-        display_claim = strip_markdown(entry['claim'])
-        truncated_claim = display_claim[:50] + "..." if len(display_claim) > 50 else display_claim
-        history_options.append(f"Claim {i+1}: {truncated_claim}")
-    
-    current_index = st.session_state.selected_fact_index if st.session_state.selected_fact_index is not None else 0
-    
-    selected_option = st.sidebar.radio(
-        "Select a past fact-check:",
-        options=history_options,
-        index=current_index,
-        key="history_radio"
-    )
-    
-    st.session_state.selected_fact_index = history_options.index(selected_option)
-
+search_query = st.sidebar.text_input("Search history", key="history_search", placeholder="e.g. SpaceX launch")
+
+if search_query.strip():
+    search_results = search_fact_checks(search_query, limit=HISTORY_PAGE_SIZE)
+    for entry in search_results:
+        st.sidebar.button(
+            f"Claim {entry['id']}: {strip_markdown(entry['claim'])[:80]}",
+            key=f"search_{entry['id']}",
+            on_click=select_fact_check,
+            args=(entry['id'],),
+            type="primary" if entry['id'] == st.session_state.selected_fact_id else "secondary",
+            use_container_width=True
+        )
+        st.sidebar.caption(entry['snippet'])
+    if not search_results:
+        st.sidebar.info("No matching fact-checks.")
 else:
-    st.sidebar.info("No fact-checks yet.")
+    history_page, next_before_id = load_history_page(before_id=st.session_state.history_cursors[-1], limit=HISTORY_PAGE_SIZE)
+
+    if history_page:
+        for entry in history_page:
+            display_claim = strip_markdown(entry['claim'])
+            st.sidebar.button(
+                f"Claim {entry['id']}: {display_claim}",
+                key=f"history_{entry['id']}",
+                on_click=select_fact_check,
+                args=(entry['id'],),
+                type="primary" if entry['id'] == st.session_state.selected_fact_id else "secondary",
+                use_container_width=True
+            )
+
+        newer_column, older_column = st.sidebar.columns(2)
+        newer_column.button("← Newer", on_click=newer_page_callback, disabled=len(st.session_state.history_cursors) == 1)
+        older_column.button("Older →", on_click=older_page_callback, args=(next_before_id,), disabled=next_before_id is None)
+    else:
+        st.sidebar.info("No fact-checks yet.")
 
 st.sidebar.markdown("---")
 st.sidebar.button("Clear All History", on_click=clear_history_callback)
 
+metrics = backend_metrics()
+if metrics:
+    with st.sidebar.expander("Backend health"):
+        for name, values in metrics.items():
+            st.caption(f"**{name}**: circuit {values['circuit_state']}, concurrency limit {values['concurrency_limit']}, "
+                       f"{values['successes']}/{values['calls']} calls succeeded, {values['retries']} retries, "
+                       f"{values['throttled']} throttled, {values['rejected']} rejected")
+
 if "clear_flag" in st.session_state and st.session_state.clear_flag:
     st.session_state.clear_flag = False
     st.rerun()
 
-if st.session_state.selected_fact_index is not None and st.session_state.fact_history:
-    selected_entry = st.session_state.fact_history[st.session_state.selected_fact_index]
+if st.session_state.selected_entry is not None:
+    selected_entry = st.session_state.selected_entry
     
-    st.header(f"Details for Claim {st.session_state.selected_fact_index + 1}")
+    if selected_entry.get('id') is not None:
+        st.header(f"Details for Claim {selected_entry['id']}")
+    else:
+        st.header("Details for Latest Claim")
     
     with st.chat_message("user"):
         st.write(f"**Claim:** {selected_entry['claim']}")
@@ -106,6 +207,11 @@ if st.session_state.selected_fact_index is not None and st.session_state.fact_hi
             st.markdown("#### Gathered Evidence:")
             for ge in selected_entry['gathered_evidence']:
                 st.markdown(f"```\n{ge}\n```")
+
+            if selected_entry.get('spans'):
+                st.markdown("#### Timing:")
+                for stage, duration_ms, tokens in stage_summary(selected_entry['spans']):
+                    st.markdown(f"- {stage}: {duration_ms:.0f} ms, {tokens:g} tokens")
         
         st.write(f"**Final Answer:** {selected_entry['final_answer']}")
 else:
@@ -1,7 +1,22 @@
+import re
 import yaml
 from pathlib import Path
 
+TIME_SENSITIVE_PATTERN = re.compile(r"\b(latest|today|yesterday|tonight|current|currently|now|recent|recently|breaking|news|this (week|month|year))\b")
+
 def load_prompts(file_path: str) -> dict:
     """Loads prompts from a YAML file."""
     with open(file_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
\ No newline at end of file
+        return yaml.safe_load(f)
+
+def normalize_text(text: str) -> str:
+    """Lowercases text and collapses runs of whitespace, for use in cache and lookup keys."""
+    return " ".join(text.lower().split())
+
+def canonical_text(text: str) -> str:
+    """Normalizes text and drops punctuation, so trivially different phrasings share one key."""
+    return normalize_text(re.sub(r"[^\w\s]", " ", text))
+
+def is_time_sensitive(text: str) -> bool:
+    """Returns True for text about recent events, whose answers go stale quickly."""
+    return TIME_SENSITIVE_PATTERN.search(normalize_text(text)) is not None
@@ -0,0 +1,27 @@
+import pytest
+from config.settings import settings
+from src.clients import reset_clients
+from src.database import flush_writes
+from src.resilience import reset_backends
+from src.search_tools import SEARCH_BACKENDS, SearchBackend
+
+class FakeSearchBackend(SearchBackend):
+    """Finds nothing, without touching the network; tests that need results patch SearchTools.search."""
+    name = "mock-search"
+
+    def search(self, query, num_results):
+        return []
+
+@pytest.fixture(autouse=True)
+def isolated_environment(tmp_path, monkeypatch):
+    """Keeps tests away from the developer's database and caches."""
+    monkeypatch.setattr("src.database.DATABASE_FILE", str(tmp_path / "fact_checks.db"))
+    monkeypatch.setattr(settings, "SEARCH_CACHE_FILE", str(tmp_path / "search_cache.db"))
+    monkeypatch.setattr(settings, "LLM_CACHE_FILE", str(tmp_path / "llm_cache.db"))
+    monkeypatch.setitem(SEARCH_BACKENDS, "mock-search", FakeSearchBackend)
+    # Fresh rate limiters, circuit breakers and LLM clients, so one test's calls or mocks never leak into the next.
+    reset_backends()
+    reset_clients()
+    yield tmp_path
+    # Don't let queued writes from this test land in the next test's database.
+    flush_writes()
@@ -0,0 +1,57 @@
+import io
+import pytest
+from src.archive import export_history, import_history, read_archive, write_archive
+from src.database import clear_fact_checks, init_db, load_all_fact_checks, save_fact_check
+
+@pytest.fixture(autouse=True)
+def database():
+    init_db()
+
+def make_history():
+    first = save_fact_check({"claim": "The Eiffel Tower is in Paris", "claim_type": "Factual", "initial_response": "Yes.",
+                             "assumptions": ["a"], "assumptions_verdicts": ["True"], "gathered_evidence": ["Evidence " * 50],
+                             "final_answer": "True."}).result()
+    save_fact_check({"claim": "The Eiffel Tower is in Paris", "claim_type": "Factual", "initial_response": "Yes.",
+                     "assumptions": ["a"], "assumptions_verdicts": ["True"], "gathered_evidence": ["Evidence " * 50, "More"],
+                     "final_answer": "Still true.", "parent_id": first, "searched_assumptions": ["a"]}).result()
+    return load_all_fact_checks()
+
+@pytest.mark.parametrize("name,layout", [("history.jsonl", "jsonl"), ("history.jsonl.gz", "jsonl"), ("history.cols.gz", "columns")])
+def test_export_import_round_trip(tmp_path, name, layout):
+    history = make_history()
+    path = str(tmp_path / name)
+    assert export_history(path, layout, chunk_size=1) == 2
+    clear_fact_checks()
+
+    assert import_history(path, chunk_size=1) == 2
+    assert load_all_fact_checks() == history
+    # Ids already present are skipped, so re-running an import is harmless.
+    assert import_history(path) == 0
+
+def test_renumbered_import_remaps_parents(tmp_path):
+    history = make_history()
+    path = str(tmp_path / "history.jsonl")
+    export_history(path)
+    assert import_history(path, renumber=True) == 2
+
+    copies = load_all_fact_checks()[2:]
+    assert [row["id"] for row in copies] == [history[1]["id"] + 1, history[1]["id"] + 2]
+    assert copies[1]["parent_id"] == copies[0]["id"]
+    assert copies[1]["gathered_evidence"] == history[1]["gathered_evidence"]
+
+def test_imported_claims_are_indexed_for_duplicate_lookup(tmp_path):
+    from unittest.mock import MagicMock
+    make_history()
+    path = str(tmp_path / "history.jsonl")
+    export_history(path)
+    fact_checker = MagicMock()
+    import_history(path, renumber=True, fact_checker=fact_checker)
+
+    copies = load_all_fact_checks()[2:]
+    fact_checker.index_claims.assert_called_once_with([(row["id"], row["claim"]) for row in copies])
+
+def test_read_archive_accepts_headerless_jsonl_and_column_chunks():
+    output = io.StringIO()
+    write_archive([[{"claim": "a"}, {"claim": "b"}], [{"claim": "c"}]], output, "columns")
+    lines = output.getvalue().splitlines() + ['{"claim": "d"}', '{"line": 5, "claim": "e", "error": "boom"}']
+    assert [[row["claim"] for row in chunk] for chunk in read_archive(lines, chunk_size=3)] == [["a", "b", "c"], ["d"]]
@@ -0,0 +1,68 @@
+import io
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from src.batch import prune_output, read_claims, run_batch
+from src.database import init_db, load_all_fact_checks
+
+def fake_result(claim, **kwargs):
+    if claim == "boom":
+        raise RuntimeError("LLM unavailable")
+    return {"claim": claim, "claim_type": "Factual", "initial_response": "", "assumptions": [],
+            "assumptions_verdicts": [], "gathered_evidence": [], "final_answer": f"Verdict for {claim}"}
+
+@pytest.fixture
+def fact_checker():
+    init_db()
+    checker = MagicMock()
+    checker.process_claim.side_effect = fake_result
+    return checker
+
+def test_read_claims_skips_blank_lines():
+    assert list(read_claims(["a\n", "\n", " b \n"])) == [(1, "a"), (3, "b")]
+
+def test_run_batch_streams_results_and_bulk_inserts(fact_checker, tmp_path):
+    output = io.StringIO()
+    claims = read_claims(["claim one\n", "boom\n", "claim two\n"])
+    summary = run_batch(fact_checker, claims, output, workers=2, checkpoint_path=str(tmp_path / "ckpt"), db_chunk_size=1)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(line["line"] for line in lines) == [1, 2, 3]
+    assert [line["error"] for line in lines if line["line"] == 2] == ["LLM unavailable"]
+    assert summary == {"processed": 2, "failed": 1, "skipped": 0}
+    assert sorted(row["claim"] for row in load_all_fact_checks()) == ["claim one", "claim two"]
+    fact_checker.process_claim.assert_any_call("claim one", reuse_previous=True, persist=False)
+
+def test_run_batch_resumes_from_checkpoint(fact_checker, tmp_path):
+    checkpoint = str(tmp_path / "ckpt")
+    run_batch(fact_checker, read_claims(["claim one\n"]), io.StringIO(), checkpoint_path=checkpoint)
+    fact_checker.process_claim.reset_mock()
+
+    summary = run_batch(fact_checker, read_claims(["claim one\n", "claim two\n"]), io.StringIO(), checkpoint_path=checkpoint)
+    fact_checker.process_claim.assert_called_once_with("claim two", reuse_previous=True, persist=False)
+    assert summary["skipped"] == 1
+    assert len(load_all_fact_checks()) == 2
+
+def test_bulk_saved_claims_are_found_as_duplicates(tmp_path):
+    from src.fact_checker import FactChecker
+    init_db()
+    fact_checker = FactChecker(model_name="mock-gemini-model", search_tool_name="mock-search")
+    assert fact_checker.find_previous_result("The Moon orbits the Earth") is None  # loads the (empty) index
+    chains = fact_checker.prompt_chains
+    with patch.object(chains, 'claim_classification_chain', return_value="Factual") as classification, \
+         patch.object(chains, 'initial_response_chain', return_value="True"), \
+         patch.object(chains, 'final_synthesis_chain', return_value="True. It does."):
+        run_batch(fact_checker, read_claims(["The Moon orbits the Earth\n"]), io.StringIO(), checkpoint_path=str(tmp_path / "first"))
+        output = io.StringIO()
+        run_batch(fact_checker, read_claims(["the moon orbits the earth?\n"]), output, checkpoint_path=str(tmp_path / "second"))
+
+    assert classification.call_count == 1
+    assert json.loads(output.getvalue())["duplicate_of"] == load_all_fact_checks()[0]["id"]
+    assert len(load_all_fact_checks()) == 1
+
+def test_prune_output_keeps_one_record_per_completed_line(tmp_path):
+    output = tmp_path / "results.jsonl"
+    records = [{"line": 1, "claim": "a"}, {"line": 2, "error": "boom"}, {"line": 3, "claim": "c"}, {"line": 1, "claim": "a"}]
+    output.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+    assert prune_output(str(output), {1}) == 3
+    assert [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()] == [{"line": 1, "claim": "a"}]
@@ -0,0 +1,20 @@
+import json
+from benchmarks import compare, run
+
+def test_benchmark_suite_runs_offline(tmp_path):
+    output = tmp_path / "report.json"
+    run.main(["--assumptions", "2", "--concurrency", "2", "--claims", "2", "--claim-workers", "2",
+              "--llm-latency", "0", "--search-latency", "0", "--rows", "50", "--single-inserts", "20",
+              "--chunk-size", "10", "--result-counts", "10", "--startup-runs", "1", "--output", str(output)])
+    report = json.loads(output.read_text())
+
+    pipeline = report["results"]["pipeline"][0]
+    assert pipeline["assumptions"] == 2 and pipeline["throughput_claims_per_min"] > 0
+    assert pipeline["tokens_per_claim"] > 0
+    assert report["results"]["db"][0]["rows"] == 50
+    assert report["results"]["process_results"][0]["us_per_call"] > 0
+    assert report["results"]["startup"][0]["import_s"] > 0
+
+    flattened = compare.flatten(report)
+    assert flattened[("db", "rows=50", "load_all_fact_checks_s")] >= 0
+    assert compare.main([str(output), str(output)]) == 0
@@ -0,0 +1,75 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from config.settings import settings
+from src.fact_checker import FactChecker
+from src.prompt_chains import PromptChains
+from src.budget import Budget, PipelineMode, SEARCH_ALWAYS, SEARCH_NEVER, SEARCH_UNCERTAIN, current_budget, get_mode, normalize_claim_type, start_budget
+
+def test_get_mode_reads_settings_and_rejects_unknown_modes():
+    assert get_mode("FAST").name == "fast"
+    assert get_mode().name == settings.PIPELINE_MODE
+    with pytest.raises(ValueError, match="Unknown pipeline mode"):
+        get_mode("exhaustive")
+
+def test_search_policy_follows_claim_type():
+    mode = PipelineMode("test", max_llm_calls=10, max_searches=10, deadline_seconds=10, max_assumptions=5, search_confident=("Mixed",))
+    assert normalize_claim_type("**Opinion.**") == "Opinion"
+    assert normalize_claim_type("Something else") == "Mixed"
+    assert mode.search_policy("Opinion") == SEARCH_NEVER
+    assert mode.search_policy("Unverifiable") == SEARCH_NEVER
+    assert mode.search_policy("Factual") == SEARCH_UNCERTAIN
+    assert mode.search_policy("Mixed") == SEARCH_ALWAYS
+
+def test_budget_keeps_a_call_for_synthesis_and_caps_searches():
+    budget = Budget(PipelineMode("test", max_llm_calls=3, max_searches=2, deadline_seconds=10, max_assumptions=5))
+    budget.charge_llm_call()
+    assert budget.try_llm_call()
+    assert not budget.try_llm_call()
+    assert budget.take_searches(3) == 2
+    assert budget.take_searches() == 0
+    assert budget.exhausted == ["llm_calls", "searches"]
+
+def test_expired_budget_denies_optional_work():
+    budget = Budget(PipelineMode("test", max_llm_calls=10, max_searches=10, deadline_seconds=0, max_assumptions=5))
+    assert budget.expired()
+    assert not budget.try_llm_call()
+    assert budget.take_searches() == 0
+    assert budget.exhausted == ["deadline"]
+
+def test_current_budget_is_unlimited_outside_start_budget():
+    assert current_budget().wait_timeout() is None
+    with start_budget(get_mode("fast")) as budget:
+        assert current_budget() is budget
+    assert current_budget() is not budget
+
+def test_no_search_is_spent_once_llm_calls_run_out():
+    fact_checker = FactChecker(model_name="mock-gemini-model", search_tool_name="mock-search")
+    # One call for the verdict, one held back for synthesis: none left for evidence.
+    mode = PipelineMode("test", max_llm_calls=2, max_searches=5, deadline_seconds=10, max_assumptions=5)
+    with start_budget(mode) as budget, \
+         patch.object(fact_checker.prompt_chains, 'verification_loop_chain', return_value="Uncertain"), \
+         patch.object(fact_checker.search_tools, 'search') as mock_search:
+        fact_checker.verify_assumptions(["A"])
+    mock_search.assert_not_called()
+    assert budget.searches == 0 and budget.llm_calls == 1
+
+def test_batch_retries_are_charged_to_the_budget():
+    chains = PromptChains(model_name="mock-gemini-model")
+    chains.llm = MagicMock()
+    chains.llm.invoke.side_effect = [MagicMock(content='[]'), MagicMock(content="True - retried")]
+    mode = PipelineMode("test", max_llm_calls=3, max_searches=5, deadline_seconds=10, max_assumptions=5)
+    with start_budget(mode) as budget:
+        assert chains.batch_verification_chain(["A", "B"]) == ["True - retried", None]
+    assert budget.llm_calls == 2 and budget.exhausted == ["llm_calls"]
+
+def test_every_batch_chunk_is_charged_and_the_rest_left_unverified():
+    chains = PromptChains(model_name="mock-gemini-model")
+    chains.llm = MagicMock()
+    chains.llm.invoke.return_value = MagicMock(content='[{"index": 1, "verdict": "True", "reason": "ok"}]')
+    # Four chunks of one, but only two calls to spare after the one held back for synthesis.
+    mode = PipelineMode("test", max_llm_calls=3, max_searches=5, deadline_seconds=10, max_assumptions=5)
+    with start_budget(mode) as budget:
+        assert chains.batch_verification_chain(["A", "B", "C", "D"], batch_size=1) == ["True: ok", "True: ok", None, None]
+        assert chains.batch_evidence_gathering_chain([("A", "r")], batch_size=1) == [None]
+    assert chains.llm.invoke.call_count == 2
+    assert budget.llm_calls == 2 and budget.exhausted == ["llm_calls"]
@@ -0,0 +1,53 @@
+import pytest
+from src.claim_index import ClaimIndex, claim_tokens
+from src.database import init_db, save_fact_check, get_connection
+from src.fact_checker import FactChecker
+from unittest.mock import patch
+
+@pytest.fixture
+def claim_index():
+    index = ClaimIndex(threshold=0.9)
+    index.add(1, "The capital of France is Paris.")
+    index.add(2, "SpaceX is a private company")
+    return index
+
+def test_claim_tokens_ignore_case_punctuation_and_stopwords():
+    assert claim_tokens("The capital of France is Paris.") == claim_tokens("paris is the capital of france?")
+
+def test_query_finds_trivial_variations(claim_index):
+    assert claim_index.query("paris is the capital of france?") == (1, 1.0)
+    assert claim_index.query("Is SpaceX a PRIVATE company") == (2, 1.0)
+
+def test_query_rejects_different_or_negated_claims(claim_index):
+    assert claim_index.query("Lyon is the capital of France") is None
+    assert claim_index.query("Paris is not the capital of France") is None
+    assert claim_index.query("What type of mammal lays the biggest eggs?") is None
+
+def test_process_claim_returns_previous_result():
+    init_db()
+    fact_id = save_fact_check({"claim": "The capital of France is Paris.", "claim_type": "Factual",
+                               "initial_response": "Yes.", "assumptions": [], "assumptions_verdicts": [],
+                               "gathered_evidence": [], "final_answer": "True."}).result()
+    fact_checker = FactChecker(model_name="mock-gemini-model", search_tool_name="mock-search")
+    with patch.object(fact_checker.prompt_chains, 'claim_classification_chain') as mock_classification:
+        result = fact_checker.process_claim("paris is the capital of france?")
+
+    mock_classification.assert_not_called()
+    assert result["duplicate_of"] == fact_id
+    assert result["final_answer"] == "True."
+
+def test_stale_previous_results_are_checked_again():
+    init_db()
+    stored = {"initial_response": "Yes.", "assumptions": [], "assumptions_verdicts": [], "gathered_evidence": [], "final_answer": "True."}
+    old_id = save_fact_check(dict(stored, claim="The Moon orbits the Earth", claim_type="Factual")).result()
+    news_id = save_fact_check(dict(stored, claim="What happened in the latest SpaceX launch?", claim_type="Factual")).result()
+    get_connection().execute("UPDATE fact_checks SET timestamp = datetime('now', '-2000 hours') WHERE id = ?", (old_id,))
+    get_connection().execute("UPDATE fact_checks SET timestamp = datetime('now', '-12 hours') WHERE id = ?", (news_id,))
+    get_connection().commit()
+    fact_checker = FactChecker(model_name="mock-gemini-model", search_tool_name="mock-search")
+
+    assert fact_checker.find_previous_result("the moon orbits the earth") is None
+    assert fact_checker.find_previous_result("what happened in the latest spacex launch") is None
+    get_connection().execute("UPDATE fact_checks SET checked_at = CURRENT_TIMESTAMP WHERE id = ?", (old_id,))
+    get_connection().commit()
+    assert fact_checker.find_previous_result("the moon orbits the earth")["duplicate_of"] == old_id
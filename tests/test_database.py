@@ -0,0 +1,127 @@
+import sqlite3
+import pytest
+from src.database import (
+    init_db, save_fact_check, save_fact_checks, load_all_fact_checks, load_fact_check,
+    clear_fact_checks, flush_writes, get_connection, load_history_page, search_fact_checks, _writer
+)
+
+@pytest.fixture(autouse=True)
+def database():
+    init_db()
+
+def make_fact_check(claim):
+    return {"claim": claim, "claim_type": "Factual", "initial_response": "", "assumptions": ["a"],
+            "assumptions_verdicts": [], "gathered_evidence": [], "final_answer": "True."}
+
+def test_database_uses_wal_and_indexes():
+    conn = get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(fact_checks)")}
+    assert {"idx_fact_checks_timestamp", "idx_fact_checks_claim", "idx_fact_checks_stale"} <= indexes
+
+def test_queued_writes_resolve_to_row_ids():
+    futures = [save_fact_check(make_fact_check(f"claim {i}")) for i in range(20)]
+    flush_writes()
+    ids = [future.result() for future in futures]
+    assert len(set(ids)) == 20
+    assert load_fact_check(ids[3])["claim"] == "claim 3"
+    assert load_fact_check(ids[3])["assumptions"] == ["a"]
+
+def test_failed_write_does_not_roll_back_others():
+    def broken(cursor):
+        cursor.execute("INSERT INTO fact_checks (claim) VALUES (NULL)")  # violates NOT NULL
+
+    bad = _writer.submit(broken)
+    good = save_fact_check(make_fact_check("still saved"))
+    flush_writes()
+    with pytest.raises(sqlite3.IntegrityError):
+        bad.result()
+    assert load_fact_check(good.result())["claim"] == "still saved"
+
+def test_bulk_save_and_clear():
+    assert save_fact_checks([make_fact_check("one"), make_fact_check("two")])
+    assert [row["claim"] for row in load_all_fact_checks()] == ["one", "two"]
+    clear_fact_checks()
+    assert load_all_fact_checks() == []
+
+def test_history_pages_are_keyset_paginated_summaries():
+    save_fact_checks([make_fact_check(f"claim number {i} " + "x" * 100) for i in range(5)])
+    first, cursor = load_history_page(limit=2, claim_chars=20)
+    assert [row["claim"] for row in first] == ["claim number 4 xxxxx...", "claim number 3 xxxxx..."]
+    assert set(first[0]) == {"id", "claim", "claim_type", "timestamp"}
+
+    second, cursor = load_history_page(before_id=cursor, limit=2, claim_chars=20)
+    third, last_cursor = load_history_page(before_id=cursor, limit=2, claim_chars=20)
+    assert [row["claim"][:14] for row in second + third] == ["claim number 2", "claim number 1", "claim number 0"]
+    assert last_cursor is None
+
+def test_history_pages_seek_by_rowid():
+    from src.database import HISTORY_PAGE_SQL
+    plan = get_connection().execute("EXPLAIN QUERY PLAN " + HISTORY_PAGE_SQL.format(where="WHERE id < ?"), (80, 80, 100, 21)).fetchall()
+    assert any("SEARCH fact_checks USING INTEGER PRIMARY KEY (rowid<?)" in row[-1] for row in plan)
+
+def test_search_fact_checks_ranks_and_highlights():
+    entry = make_fact_check("The Eiffel Tower is in Paris")
+    entry["gathered_evidence"] = ["Assumption: tower location\nEvidence: Completed in 1889 for the World's Fair."]
+    save_fact_checks([make_fact_check("Python is the best programming language"), entry])
+
+    results = search_fact_checks("eiffel tower")
+    assert [r["claim"] for r in results] == ["The Eiffel Tower is in Paris"]
+    assert "**Eiffel**" in results[0]["snippet"]
+    assert search_fact_checks("1889")[0]["claim"] == "The Eiffel Tower is in Paris"
+    assert search_fact_checks('"unbalanced OR (') == []
+
+def test_search_index_stores_no_text_and_indexes_shared_evidence_once():
+    shared = "Assumption: tower height\nEvidence: The Eiffel Tower is 330 metres tall."
+    entries = [make_fact_check(f"Landmark claim {i}") for i in range(3)]
+    for entry in entries:
+        entry["gathered_evidence"] = [shared]
+    save_fact_checks(entries)
+
+    conn = get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM evidence_fts").fetchone()[0] == 1
+    assert "fact_checks_fts_content" not in {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert sorted(r["claim"] for r in search_fact_checks("landmark metres")) == [f"Landmark claim {i}" for i in range(3)]
+    assert search_fact_checks("landmark paris") == []
+    assert "**metres**" in search_fact_checks("metres")[0]["snippet"]
+
+def test_search_index_backfills_existing_rows_and_follows_deletes():
+    conn = get_connection()
+    save_fact_checks([make_fact_check("SpaceX launched a rocket")])
+    conn.execute("DROP TABLE fact_checks_fts")
+    conn.commit()
+    init_db()
+    assert len(search_fact_checks("spacex")) == 1
+    clear_fact_checks()
+    assert search_fact_checks("spacex") == []
+
+def test_long_fields_are_compressed_and_evidence_stored_once():
+    summary = "Assumption: tower height\nEvidence: The Eiffel Tower is 330 metres tall. " * 20
+    entries = [make_fact_check(f"The Eiffel Tower is tall {i}") for i in range(3)]
+    for entry in entries:
+        entry["gathered_evidence"] = [summary, "short"]
+        entry["final_answer"] = "True. " * 100
+    ids = [save_fact_check(entry).result() for entry in entries]
+
+    conn = get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM evidence").fetchone()[0] == 2
+    assert conn.execute("SELECT typeof(final_answer) FROM fact_checks WHERE id = ?", (ids[0],)).fetchone()[0] == "blob"
+    loaded = load_fact_check(ids[1])
+    assert loaded["gathered_evidence"] == [summary, "short"]
+    assert loaded["final_answer"] == "True. " * 100
+    assert search_fact_checks("330 metres")[0]["id"] in ids
+
+    conn.execute("DELETE FROM fact_checks WHERE id IN (?, ?)", ids[:2])
+    conn.commit()
+    assert conn.execute("SELECT refs FROM evidence").fetchall() == [(1,), (1,)]
+    conn.execute("DELETE FROM fact_checks WHERE id = ?", (ids[2],))
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM evidence").fetchone()[0] == 0
+
+def test_rows_in_the_old_uncompressed_format_still_load():
+    conn = get_connection()
+    conn.execute("INSERT INTO fact_checks (claim, assumptions, gathered_evidence, final_answer) VALUES (?, ?, ?, ?)",
+                 ("Old row", '["a"]', '["inline evidence"]', "False."))
+    conn.commit()
+    fact_id = load_history_page()[0][0]["id"]
+    assert load_fact_check(fact_id)["gathered_evidence"] == ["inline evidence"]
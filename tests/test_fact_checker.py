@@ -1,5 +1,5 @@
 import pytest
-from src.fact_checker import FactChecker
+from src.fact_checker import FactChecker, SEARCH_FAILED_VERDICT
 from unittest.mock import MagicMock, patch
 
 @pytest.fixture(autouse=True)
@@ -28,13 +28,13 @@ def test_fact_checker_initialization(fact_checker_instance):
 @patch('src.search_tools.SearchTools.summarize_search_results')
 @patch('src.prompt_chains.PromptChains.evidence_gathering_chain')
 @patch('src.prompt_chains.PromptChains.final_synthesis_chain')
-@patch('src.database.save_fact_check') # Mock database save
+@patch('src.fact_checker.save_fact_check') # Mock database save
 def test_process_claim(mock_save_fact_check, mock_final_synthesis, mock_evidence_gathering, mock_summarize_search_results, mock_process_results, mock_search,
                        mock_verification_loop, mock_assumption_extraction, mock_initial_response, mock_claim_classification,
                        fact_checker_instance):
     mock_claim_classification.return_value = "Factual"
     mock_initial_response.return_value = "Initial response to the claim."
-    mock_assumption_extraction.return_value = "Assumption 1\nAssumption 2"
+    mock_assumption_extraction.return_value = "- Assumption 1\n- Assumption 2"
     mock_verification_loop.side_effect = ["True", "Uncertain"]
     mock_search.return_value = [{"title": "Test Result", "href": "http://example.com", "body": "Snippet"}]
     mock_process_results.return_value = "Processed search results."
@@ -43,7 +43,8 @@ def test_process_claim(mock_save_fact_check, mock_final_synthesis, mock_evidence
     mock_final_synthesis.return_value = "Final synthesized answer."
 
     claim = "This is a test claim."
-    result = fact_checker_instance.process_claim(claim)
+    # Deep mode searches every Factual assumption, even ones the model is confident about.
+    result = fact_checker_instance.process_claim(claim, mode="deep")
 
     mock_claim_classification.assert_called_once_with(claim)
     mock_initial_response.assert_called_once_with(claim)
@@ -62,3 +63,272 @@ def test_process_claim(mock_save_fact_check, mock_final_synthesis, mock_evidence
     assert "Initial response to the claim." in result["initial_response"]
     assert "Assumption 1" in result["assumptions"]
     assert "Assumption 2" in result["assumptions"]
+
+@patch('src.fact_checker.save_fact_check')
+def test_verify_assumptions_preserves_order_when_concurrent(mock_save_fact_check, fact_checker_instance):
+    import time
+
+    def slow_verification(assumption):
+        # Earlier assumptions finish last so completion order differs from input order.
+        time.sleep(0.05 if assumption == "A" else 0.0)
+        return f"True - {assumption}"
+
+    fact_checker_instance.max_concurrency = 3
+    with patch.object(fact_checker_instance.prompt_chains, 'verification_loop_chain', side_effect=slow_verification), \
+         patch.object(fact_checker_instance.search_tools, 'search', return_value=[]), \
+         patch.object(fact_checker_instance.search_tools, 'summarize_search_results', return_value="Summary"), \
+         patch.object(fact_checker_instance.prompt_chains, 'evidence_gathering_chain', side_effect=lambda a, s: f"Evidence {a}"):
+        verdicts, evidence = fact_checker_instance.verify_assumptions(["A", "B", "C"])
+
+    assert verdicts == [f"Assumption: {a} | Verdict: True - {a}" for a in ["A", "B", "C"]]
+    assert evidence == [f"Assumption: {a}\nEvidence: Evidence {a}" for a in ["A", "B", "C"]]
+
+@patch('src.fact_checker.save_fact_check')
+def test_iter_process_claim_streams_stage_events(mock_save_fact_check, fact_checker_instance):
+    from src.fact_checker import CLASSIFICATION, INITIAL_RESPONSE, ASSUMPTIONS, ASSUMPTION_VERDICT, EVIDENCE, FINAL_ANSWER_CHUNK, RESULT
+    chains = fact_checker_instance.prompt_chains
+    with patch.object(chains, 'claim_classification_chain', return_value="Factual"), \
+         patch.object(chains, 'initial_response_chain', return_value="Paris is the capital."), \
+         patch.object(chains, 'assumption_extraction_chain', return_value="- Paris is in France"), \
+         patch.object(chains, 'verification_loop_chain', return_value="True"), \
+         patch.object(chains, 'evidence_gathering_chain', return_value="Encyclopedias agree."), \
+         patch.object(chains, 'final_synthesis_stream', return_value=iter(["True. ", "Paris is the capital."])), \
+         patch.object(fact_checker_instance.search_tools, 'search', return_value=[]), \
+         patch.object(fact_checker_instance.search_tools, 'summarize_search_results', return_value="Summary"):
+        events = list(fact_checker_instance.iter_process_claim("The capital of France is Paris.", reuse_previous=False, mode="deep"))
+
+    assert [e.stage for e in events] == [CLASSIFICATION, INITIAL_RESPONSE, ASSUMPTIONS, ASSUMPTION_VERDICT, EVIDENCE,
+                                         FINAL_ANSWER_CHUNK, FINAL_ANSWER_CHUNK, RESULT]
+    assert events[-1].data["final_answer"] == "True. Paris is the capital."
+    mock_save_fact_check.assert_called_once_with(events[-1].data)
+
+def test_shared_assumptions_are_verified_once(fact_checker_instance):
+    from src.database import init_db, flush_writes, get_connection, save_fact_check
+    init_db()
+    chains = fact_checker_instance.prompt_chains
+    search_results = [{"title": "France", "href": "http://example.com/paris", "body": "Paris is in France."}]
+    with patch.object(chains, 'verification_loop_chain', return_value="True - well known") as mock_verification, \
+         patch.object(chains, 'evidence_gathering_chain', return_value="Paris is in France."), \
+         patch.object(fact_checker_instance.search_tools, 'search', return_value=search_results) as mock_search, \
+         patch.object(fact_checker_instance.search_tools, 'summarize_search_results', return_value="Summary"):
+        first = fact_checker_instance.verify_assumptions(["Paris is in France."], claim_type="Factual")
+        flush_writes()
+        second = fact_checker_instance.verify_assumptions(["paris is in France"], claim_type="Factual")
+
+    assert mock_verification.call_count == 1
+    assert mock_search.call_count == 1
+    assert second[0] == ["Assumption: paris is in France | Verdict: True - well known"]
+    assert second[1] == ["Assumption: paris is in France\nEvidence: Paris is in France."]
+
+    fact_id = save_fact_check({"claim": "Paris is the capital of France", "assumptions": ["Paris is in France"]}).result()
+    links = get_connection().execute(
+        "SELECT a.source_urls FROM fact_check_assumptions l JOIN assumptions a ON a.id = l.assumption_id WHERE l.fact_check_id = ?",
+        (fact_id,)
+    ).fetchall()
+    assert links == [('["http://example.com/paris"]',)]
+
+def test_verdicts_stored_without_searching_are_not_reused_by_claims_that_search(fact_checker_instance):
+    from src.budget import get_mode, start_budget
+    from src.database import init_db, flush_writes
+    init_db()
+    chains = fact_checker_instance.prompt_chains
+    search_results = [{"title": "Pizza", "href": "http://example.com/pizza", "body": "Pizza is from Naples."}]
+    with patch.object(chains, 'verification_loop_chain', return_value="True - well known") as mock_verification, \
+         patch.object(chains, 'evidence_gathering_chain', return_value="Pizza is from Naples."), \
+         patch.object(fact_checker_instance.search_tools, 'search', return_value=search_results) as mock_search, \
+         patch.object(fact_checker_instance.search_tools, 'summarize_search_results', return_value="Summary"):
+        with start_budget(get_mode("deep")):
+            fact_checker_instance.verify_assumptions(["Pizza comes from Naples"], claim_type="Opinion")
+        flush_writes()
+        # Another opinion wouldn't search either, so the stored verdict stands.
+        with start_budget(get_mode("deep")):
+            fact_checker_instance.verify_assumptions(["Pizza comes from Naples"], claim_type="Opinion")
+        assert mock_verification.call_count == 1 and mock_search.call_count == 0
+        with start_budget(get_mode("deep")):
+            verdicts, evidence = fact_checker_instance.verify_assumptions(["Pizza comes from Naples"], claim_type="Factual")
+
+    assert mock_verification.call_count == 2 and mock_search.call_count == 1
+    assert evidence == ["Assumption: Pizza comes from Naples\nEvidence: Pizza is from Naples."]
+
+def test_batched_verification_mode(fact_checker_instance, monkeypatch):
+    monkeypatch.setattr("src.fact_checker.settings.BATCH_VERIFICATION", True)
+    chains = fact_checker_instance.prompt_chains
+    with patch.object(chains, 'batch_verification_chain', return_value=["True: a", "False: b"]) as mock_batch_verification, \
+         patch.object(chains, 'batch_evidence_gathering_chain', return_value=["Evidence A", "Evidence B"]) as mock_batch_evidence, \
+         patch.object(chains, 'verification_loop_chain') as mock_single_verification, \
+         patch.object(fact_checker_instance.search_tools, 'search', return_value=[]), \
+         patch.object(fact_checker_instance.search_tools, 'summarize_search_results', side_effect=lambda text, query: f"Summary {query}"):
+        verdicts, evidence = fact_checker_instance.verify_assumptions(["A", "B"])
+
+    mock_batch_verification.assert_called_once_with(["A", "B"])
+    mock_batch_evidence.assert_called_once_with([("A", "Summary A"), ("B", "Summary B")])
+    mock_single_verification.assert_not_called()
+    assert verdicts == ["Assumption: A | Verdict: True: a", "Assumption: B | Verdict: False: b"]
+    assert evidence == ["Assumption: A\nEvidence: Evidence A", "Assumption: B\nEvidence: Evidence B"]
+
+def test_assumptions_share_pooled_search_results(fact_checker_instance):
+    chains = fact_checker_instance.prompt_chains
+    results = {
+        "Paris is the capital of France fact check": [
+            {"title": "Paris", "href": "https://en.wikipedia.org/wiki/Paris", "body": "Paris is the capital of France."},
+        ],
+        "The Eiffel Tower is in Paris fact check": [
+            {"title": "Paris", "href": "https://www.en.wikipedia.org/wiki/Paris?utm_source=ddg", "body": "Paris is the capital of France."},
+            {"title": "Eiffel Tower", "href": "https://example.com/eiffel", "body": "The Eiffel Tower stands in Paris."},
+        ],
+    }
+    with patch.object(chains, 'verification_loop_chain', return_value="True"), \
+         patch.object(chains, 'evidence_gathering_chain', side_effect=lambda assumption, text: text), \
+         patch.object(fact_checker_instance.search_tools, 'search', side_effect=lambda query, num_results: results[query]) as mock_search, \
+         patch.object(fact_checker_instance.search_tools, 'summarize_search_results', side_effect=lambda text, query: text):
+        _, evidence = fact_checker_instance.verify_assumptions(["Paris is the capital of France", "The Eiffel Tower is in Paris"])
+
+    assert mock_search.call_count == 2
+    # The duplicate Wikipedia link appears once in each prompt, and the Eiffel
+    # Tower page is ranked first for the assumption it is about.
+    assert all(e.count("wikipedia.org") == 1 for e in evidence)
+    assert evidence[1].index("eiffel") < evidence[1].index("wikipedia")
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_failed_search_leaves_only_its_assumption_unverified(fact_checker_instance, monkeypatch, batched):
+    monkeypatch.setattr("src.fact_checker.settings.BATCH_VERIFICATION", batched)
+    chains = fact_checker_instance.prompt_chains
+
+    def search(query, num_results):
+        if query.startswith("Bees"):
+            raise RuntimeError("search for Bees failed after retries")
+        return [{"title": "Ants", "href": "https://example.com/ants", "body": "Ants live in colonies."}]
+
+    with patch.object(chains, 'verification_loop_chain', return_value="True"), \
+         patch.object(chains, 'batch_verification_chain', return_value=["True", "True"]), \
+         patch.object(chains, 'evidence_gathering_chain', side_effect=lambda assumption, text: f"Evidence {assumption}"), \
+         patch.object(chains, 'batch_evidence_gathering_chain', side_effect=lambda pairs: [f"Evidence {a}" for a, _ in pairs]), \
+         patch.object(fact_checker_instance.search_tools, 'search', side_effect=search), \
+         patch.object(fact_checker_instance.search_tools, 'summarize_search_results', side_effect=lambda text, query: text), \
+         patch('src.fact_checker.save_assumption_verdict') as mock_save_verdict:
+        verdicts, evidence = fact_checker_instance.verify_assumptions(["Ants live in colonies", "Bees make honey"])
+
+    assert evidence == ["Assumption: Ants live in colonies\nEvidence: Evidence Ants live in colonies"]
+    assert verdicts[1] == f"Assumption: Bees make honey | Verdict: {SEARCH_FAILED_VERDICT}"
+    # The failure isn't cached, so a later claim searches again.
+    assert [c.args[0] for c in mock_save_verdict.call_args_list] == ["Ants live in colonies"]
+
+def test_process_claim_records_spans(fact_checker_instance):
+    from langchain_core.messages import AIMessage
+    from src.database import init_db, flush_writes, load_all_fact_checks
+    init_db()
+    fact_checker_instance.prompt_chains.llm = MagicMock()
+    fact_checker_instance.prompt_chains.llm.invoke.return_value = AIMessage(
+        content="- Paris is in France", usage_metadata={"input_tokens": 10, "output_tokens": 3, "total_tokens": 13})
+
+    result = fact_checker_instance.process_claim("Paris is the capital of France")
+    flush_writes()
+
+    names = [s["name"] for s in result["spans"]]
+    assert names[0] == "process_claim"
+    for stage in ["classification", "initial_response", "assumption_extraction", "verification", "verify_assumption", "verdict", "synthesis"]:
+        assert stage in names
+    llm_spans = [s for s in result["spans"] if s["attributes"].get("llm_calls")]
+    assert len(llm_spans) == 5
+    assert sum(s["attributes"]["input_tokens"] for s in llm_spans) == 50
+    assert all(s["attributes"]["llm_cache_misses"] == 1 for s in llm_spans)
+    assert load_all_fact_checks()[-1]["spans"] == result["spans"]
+
+@patch('src.fact_checker.save_fact_check')
+def test_identical_claims_in_flight_share_one_run(mock_save_fact_check, fact_checker_instance):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    chains = fact_checker_instance.prompt_chains
+    release = threading.Event()
+    joined = threading.Semaphore(0)
+    begin = fact_checker_instance._claims_in_flight.begin
+
+    def counting_begin(key):
+        call = begin(key)
+        joined.release()
+        return call
+
+    def classify(claim):
+        release.wait(5)
+        return "Opinion"
+
+    with patch.object(fact_checker_instance._claims_in_flight, 'begin', counting_begin), \
+         patch.object(chains, 'claim_classification_chain', side_effect=classify) as mock_classification, \
+         patch.object(chains, 'initial_response_chain', return_value="It is a matter of taste."), \
+         patch.object(chains, 'assumption_extraction_chain', return_value=""), \
+         patch.object(chains, 'final_synthesis_chain', return_value="Opinion."):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(fact_checker_instance.process_claim, "Pineapple belongs on pizza.", reuse_previous=False)
+            second = executor.submit(fact_checker_instance.process_claim, "pineapple belongs on  pizza", reuse_previous=False)
+            for _ in range(2):
+                assert joined.acquire(timeout=5)
+            release.set()
+            results = [first.result(), second.result()]
+
+    assert mock_classification.call_count == 1
+    mock_save_fact_check.assert_called_once()
+    assert results[0] == results[1] and results[0] is not results[1]
+    assert results[0]["final_answer"] == "Opinion."
+
+@patch('src.fact_checker.save_fact_check')
+def test_opinion_claims_skip_web_search(mock_save_fact_check, fact_checker_instance):
+    chains = fact_checker_instance.prompt_chains
+    with patch.object(chains, 'claim_classification_chain', return_value="Opinion"), \
+         patch.object(chains, 'initial_response_chain', return_value="Many people like it."), \
+         patch.object(chains, 'assumption_extraction_chain', return_value="- Pineapple is tasty"), \
+         patch.object(chains, 'verification_loop_chain', return_value="Uncertain - a matter of taste"), \
+         patch.object(chains, 'final_synthesis_chain', return_value="Opinion."), \
+         patch.object(fact_checker_instance.search_tools, 'search') as mock_search:
+        result = fact_checker_instance.process_claim("Pineapple belongs on pizza.", reuse_previous=False, mode="deep")
+
+    mock_search.assert_not_called()
+    assert result["mode"] == "deep"
+    assert result["gathered_evidence"] == []
+
+@patch('src.fact_checker.save_fact_check')
+def test_deadline_synthesizes_from_finished_assumptions(mock_save_fact_check, fact_checker_instance, monkeypatch):
+    import threading
+    import time
+    from src.budget import settings as budget_settings
+    from src.fact_checker import UNVERIFIED_VERDICT
+    monkeypatch.setitem(budget_settings.PIPELINE_MODES, "fast", {"max_llm_calls": 10, "max_searches": 0, "deadline_seconds": 0.5, "max_assumptions": 2})
+    chains = fact_checker_instance.prompt_chains
+    stuck = threading.Event()
+
+    def verify(assumption):
+        if assumption == "Slow assumption":
+            stuck.wait(5)
+        return "True - known"
+
+    with patch.object(chains, 'claim_classification_chain', return_value="Factual"), \
+         patch.object(chains, 'initial_response_chain', return_value="Partly true."), \
+         patch.object(chains, 'assumption_extraction_chain', return_value="- Quick assumption\n- Slow assumption\n- Dropped assumption"), \
+         patch.object(chains, 'verification_loop_chain', side_effect=verify), \
+         patch.object(chains, 'final_synthesis_chain', return_value="Partly true.") as mock_synthesis:
+        started = time.perf_counter()
+        result = fact_checker_instance.process_claim("A claim with a slow part.", reuse_previous=False, mode="fast")
+        elapsed = time.perf_counter() - started
+        stuck.set()
+
+    assert elapsed < 2
+    assert result["assumptions"] == ["Quick assumption", "Slow assumption"]
+    assert result["assumptions_verdicts"] == ["Assumption: Quick assumption | Verdict: True - known",
+                                              f"Assumption: Slow assumption | Verdict: {UNVERIFIED_VERDICT}"]
+    mock_synthesis.assert_called_once()
+    assert result["spans"][0]["attributes"]["budget_exhausted"] == "deadline"
+
+def test_thread_pools_are_reused_across_claims(fact_checker_instance):
+    import threading
+    threads = set()
+
+    def verify(assumption):
+        threads.add(threading.current_thread())
+        return "True"
+
+    with patch.object(fact_checker_instance.prompt_chains, 'verification_loop_chain', side_effect=verify), \
+         patch('src.fact_checker.save_assumption_verdict'), patch('src.fact_checker.load_assumption_verdict', return_value=None):
+        for claim in range(6):
+            fact_checker_instance.verify_assumptions([f"{claim} A", f"{claim} B", f"{claim} C"], claim_type="Opinion")
+    assert len(threads) <= fact_checker_instance.max_concurrency
+    fact_checker_instance.close()
+    assert not any(thread.is_alive() for thread in threads)
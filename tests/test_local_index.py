@@ -0,0 +1,92 @@
+import json
+import os
+import pytest
+from src.local_index import LocalIndex, split_passages
+from src.search_tools import FanoutBackend, SearchBackend
+
+@pytest.fixture
+def corpus(tmp_path):
+    docs = tmp_path / "corpus"
+    docs.mkdir()
+    (docs / "eiffel.txt").write_text("Eiffel Tower\nThe Eiffel Tower is a wrought-iron tower in Paris, completed in 1889.", encoding="utf-8")
+    (docs / "moon.md").write_text("# The Moon\nThe Moon orbits the Earth about once every 27 days.", encoding="utf-8")
+    (docs / "articles.jsonl").write_text(json.dumps(
+        {"title": "Great Wall", "url": "https://example.org/wall", "text": "The Great Wall of China is not visible from the Moon with the naked eye."}
+    ) + "\n", encoding="utf-8")
+    return docs
+
+@pytest.fixture
+def index(tmp_path):
+    index = LocalIndex(str(tmp_path / "index"), passage_words=50)
+    yield index
+    index.close()
+
+def test_split_passages():
+    assert split_passages("one two three four five", words=2) == ["one two", "three four", "five"]
+    assert split_passages("   ") == []
+
+def test_search_ranks_matching_documents(corpus, index):
+    assert index.update(str(corpus))["indexed"] == 3
+    results = index.search("Eiffel Tower Paris", num_results=2)
+    assert results[0]["title"] == "Eiffel Tower"
+    assert results[0]["href"] == (corpus / "eiffel.txt").resolve().as_uri()
+    assert "1889" in results[0]["body"]
+    assert {r["title"] for r in index.search("moon")} == {"Great Wall", "The Moon"}
+    assert index.search("zeppelin") == []
+
+def test_incremental_update_and_compact(corpus, index):
+    index.update(str(corpus))
+    assert index.update(str(corpus))["indexed"] == 0
+
+    eiffel = corpus / "eiffel.txt"
+    eiffel.write_text("Statue of Liberty\nThe Statue of Liberty stands in New York Harbor.", encoding="utf-8")
+    os.utime(eiffel, (1, 1))
+    (corpus / "moon.md").unlink()
+    assert index.update(str(corpus)) == {"indexed": 1, "removed": 1, "passages": 1}
+    assert index.search("Eiffel") == []
+    assert index.search("orbits") == []
+    assert index.search("Liberty")[0]["title"] == "Statue of Liberty"
+
+    index.compact()
+    assert len(index) == 2
+    assert index.search("Liberty")[0]["title"] == "Statue of Liberty"
+    assert len(list((index.index_dir).glob("*.idx"))) == 1
+
+def test_superseded_segments_are_closed_once_released(corpus, index):
+    index.update(str(corpus))
+    index.search("Eiffel")
+    first = index._segments[0]
+    (corpus / "mars.txt").write_text("Mars\nMars is the fourth planet from the Sun.", encoding="utf-8")
+    index.update(str(corpus))
+    index.search("Mars")
+    # Unchanged segments are carried over rather than reopened.
+    assert index._segments[0] is first and len(index._segments) == 2
+
+    first.acquire()  # as a search still reading it would
+    index.compact()
+    index.search("Mars")
+    assert not first._map.closed
+    first.release()
+    assert first._map.closed
+
+class StaticBackend(SearchBackend):
+    def __init__(self, name, results=None, error=None):
+        self.name, self.results, self.error = name, results, error
+
+    def search(self, query, num_results):
+        if self.error:
+            raise self.error
+        return self.results[:num_results]
+
+def test_fanout_interleaves_and_deduplicates():
+    local = StaticBackend("local", [{"title": "A", "href": "https://a.org/", "body": "a"},
+                                    {"title": "B", "href": "https://b.org/x", "body": "b"}])
+    web = StaticBackend("web", [{"title": "B again", "href": "https://www.b.org/x?utm_source=feed", "body": "b"},
+                                {"title": "C", "href": "https://c.org/", "body": "c"}])
+    results = FanoutBackend([local, web]).search("query", 5)
+    assert [r["title"] for r in results] == ["A", "B again", "C"]
+
+    broken = StaticBackend("broken", error=RuntimeError("down"))
+    assert FanoutBackend([broken, web]).search("query", 5) == web.results
+    with pytest.raises(RuntimeError, match="down"):
+        FanoutBackend([broken]).search("query", 5)
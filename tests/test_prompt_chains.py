@@ -0,0 +1,76 @@
+import pytest
+from src.prompt_chains import PromptChains
+from unittest.mock import MagicMock
+from config.settings import settings
+
+@pytest.fixture
+def prompt_chains_instance():
+    chains = PromptChains(model_name="mock-gemini-model")
+    chains.llm = MagicMock()
+    chains.llm.invoke.return_value.content = "Factual"
+    return chains
+
+def test_identical_calls_hit_response_cache(prompt_chains_instance):
+    assert prompt_chains_instance.claim_classification_chain("The sky is blue.") == "Factual"
+    assert prompt_chains_instance.claim_classification_chain("The sky is blue.") == "Factual"
+    prompt_chains_instance.llm.invoke.assert_called_once()
+
+    # The disk tier survives a new instance, e.g. after a restart.
+    fresh = PromptChains(model_name="mock-gemini-model")
+    fresh.llm = MagicMock()
+    assert fresh.claim_classification_chain("The sky is blue.") == "Factual"
+    fresh.llm.invoke.assert_not_called()
+
+def test_prompt_change_invalidates_cache(prompt_chains_instance):
+    prompt_chains_instance.initial_response_chain("The sky is blue.")
+    prompt_chains_instance.prompts["initial_response_prompt"] += "\nBe brief."
+    prompt_chains_instance.initial_response_chain("The sky is blue.")
+    assert prompt_chains_instance.llm.invoke.call_count == 2
+
+def test_cache_bypass(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    chains = PromptChains(model_name="mock-gemini-model")
+    chains.llm = MagicMock()
+    chains.llm.invoke.return_value.content = "Opinion"
+    chains.claim_classification_chain("Python is the best programming language.")
+    chains.claim_classification_chain("Python is the best programming language.")
+    assert chains.llm.invoke.call_count == 2
+
+def test_parse_json_items_drops_invalid_entries():
+    from src.prompt_chains import parse_json_items
+    raw = '```json\n[{"index": 1, "verdict": "True", "reason": "Known."}, {"index": 5, "verdict": "False", "reason": "x"}, {"index": 2, "verdict": ""}]\n```'
+    assert parse_json_items(raw, 3, ("verdict", "reason")) == {0: {"verdict": "True", "reason": "Known."}}
+    assert parse_json_items("not json", 3, ("verdict",)) == {}
+
+def test_batch_verification_falls_back_per_item(prompt_chains_instance):
+    prompt_chains_instance.llm.invoke.side_effect = [
+        MagicMock(content='[{"index": 1, "verdict": "True", "reason": "Paris is in France."}, {"index": 3, "verdict": "Maybe", "reason": "?"}]'),
+        MagicMock(content="Uncertain - no data"),
+        MagicMock(content="False - it is not"),
+    ]
+    verdicts = prompt_chains_instance.batch_verification_chain(["Paris is in France", "B", "C"])
+    assert verdicts == ["True: Paris is in France.", "Uncertain - no data", "False - it is not"]
+    assert prompt_chains_instance.llm.invoke.call_count == 3
+
+def test_batch_evidence_gathering_chunks(prompt_chains_instance):
+    prompt_chains_instance.llm.invoke.side_effect = [
+        MagicMock(content='[{"index": 1, "evidence": "E1"}, {"index": 2, "evidence": "E2"}]'),
+        MagicMock(content='[{"index": 1, "evidence": "E3"}]'),
+    ]
+    evidence = prompt_chains_instance.batch_evidence_gathering_chain([("A1", "R1"), ("A2", "R2"), ("A3", "R3")], batch_size=2)
+    assert evidence == ["E1", "E2", "E3"]
+    assert prompt_chains_instance.llm.invoke.call_count == 2
+
+def test_llm_clients_and_prompts_are_shared(tmp_path, monkeypatch):
+    from unittest.mock import patch
+    from src.clients import compile_prompt
+
+    monkeypatch.chdir(tmp_path)  # prompts are found relative to the package, not the working directory
+    with patch('langchain_google_genai.ChatGoogleGenerativeAI') as chat_model:
+        first, second = PromptChains(model_name="gemini-test"), PromptChains(model_name="gemini-test")
+        chat_model.assert_not_called()
+        assert first.llm is second.llm
+        chat_model.assert_called_once()
+    assert first.prompts == second.prompts and first.prompts is not second.prompts
+    template = first.prompts["initial_response_prompt"]
+    assert compile_prompt(template) is compile_prompt(template)
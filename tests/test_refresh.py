@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from config.settings import settings
+from src.database import (
+    init_db, save_fact_check, flush_writes, get_connection, load_fact_check, load_fact_check_versions, load_stale_fact_checks
+)
+from src.fact_checker import FactChecker
+from src.refresh import Refresher, UNCHANGED, UPDATED
+from src.retrieval import evidence_hash
+
+OLD_RESULTS = [{"title": "Launch report", "href": "https://example.com/launch", "body": "The launch was delayed."},
+               {"title": "Schedule", "href": "https://example.org/schedule", "body": "Next window on Friday."}]
+
+@pytest.fixture(autouse=True)
+def database(monkeypatch):
+    init_db()
+    monkeypatch.setattr(settings, "FACT_CHECK_FRESHNESS_HOURS", {"Factual": 24, "Opinion": 0, "default": 24})
+    monkeypatch.setattr(settings, "FACT_CHECK_NEWS_FRESHNESS_HOURS", 6)
+
+def store(claim, age_hours, claim_type="Factual", **fields):
+    fact_check = {"claim": claim, "claim_type": claim_type, "initial_response": "Probably.", "assumptions": ["A"],
+                  "assumptions_verdicts": ["Assumption: A | Verdict: Uncertain"], "gathered_evidence": [], "final_answer": "Old answer.",
+                  "searched_assumptions": ["A"], "evidence_hash": evidence_hash({"A": OLD_RESULTS}), **fields}
+    fact_id = save_fact_check(fact_check).result()
+    get_connection().execute("UPDATE fact_checks SET timestamp = datetime('now', ?) WHERE id = ?", (f"-{age_hours} hours", fact_id))
+    get_connection().commit()
+    return fact_id
+
+def refresher(fact_checker):
+    return Refresher(fact_checker, searches_per_minute=60000, reverifications_per_hour=3600000)
+
+def test_stale_fact_checks_follow_claim_type_windows():
+    old = store("The Eiffel Tower is in Paris", age_hours=48)
+    store("Cats are better than dogs", age_hours=2000, claim_type="Opinion")
+    news = store("What happened in the latest SpaceX launch?", age_hours=12)
+    store("Water boils at 100 degrees Celsius", age_hours=1)
+    superseded = store("The Moon orbits the Earth", age_hours=100)
+    store("The Moon orbits the Earth", age_hours=1, parent_id=superseded)
+
+    stale = load_stale_fact_checks(settings.FACT_CHECK_FRESHNESS_HOURS, settings.FACT_CHECK_NEWS_FRESHNESS_HOURS)
+    assert [row["id"] for row in stale] == [old, news]
+    assert stale[0]["searched_assumptions"] == ["A"]
+    assert load_stale_fact_checks(settings.FACT_CHECK_FRESHNESS_HOURS, settings.FACT_CHECK_NEWS_FRESHNESS_HOURS, limit=1)[0]["id"] == old
+
+def test_unchanged_evidence_is_only_marked_checked():
+    fact_id = store("What happened in the latest SpaceX launch?", age_hours=12)
+    fact_checker = MagicMock()
+    # Reordered results with tracking parameters are still the same evidence.
+    fact_checker.search_tools.search.return_value = [OLD_RESULTS[1], dict(OLD_RESULTS[0], href="https://www.example.com/launch?utm_source=x")]
+
+    assert refresher(fact_checker).run_once() == {UNCHANGED: 1, UPDATED: 0, "failed": 0}
+    fact_checker.search_tools.search.assert_called_once_with("A fact check", num_results=settings.SEARCH_RESULTS_PER_ASSUMPTION, refresh=True)
+    fact_checker.reverify.assert_not_called()
+    flush_writes()
+    assert load_fact_check(fact_id)["checked_at"] is not None
+    assert load_stale_fact_checks(settings.FACT_CHECK_FRESHNESS_HOURS, settings.FACT_CHECK_NEWS_FRESHNESS_HOURS) == []
+
+def test_changed_evidence_stores_new_version():
+    fact_id = store("What happened in the latest SpaceX launch?", age_hours=12)
+    new_results = [{"title": "Launch report", "href": "https://example.com/launch", "body": "The launch succeeded on Friday."}]
+    fact_checker = FactChecker(model_name="mock-gemini-model")
+    with patch.object(fact_checker.search_tools, 'search', return_value=new_results), \
+         patch.object(fact_checker.search_tools, 'summarize_search_results', return_value="Summary"), \
+         patch.object(fact_checker.prompt_chains, 'verification_loop_chain', return_value="Uncertain") as verification, \
+         patch.object(fact_checker.prompt_chains, 'evidence_gathering_chain', return_value="It launched."), \
+         patch.object(fact_checker.prompt_chains, 'final_synthesis_chain', return_value="New answer."), \
+         patch.object(fact_checker.prompt_chains, 'claim_classification_chain') as classification:
+        assert refresher(fact_checker).run_once() == {UNCHANGED: 0, UPDATED: 1, "failed": 0}
+    verification.assert_called_once_with("A")
+    classification.assert_not_called()
+    flush_writes()
+
+    latest, original = load_fact_check_versions(fact_id)
+    assert original["id"] == fact_id and original["final_answer"] == "Old answer."
+    assert latest["parent_id"] == fact_id
+    assert latest["final_answer"] == "New answer."
+    assert latest["initial_response"] == "Probably."
+    assert latest["evidence_hash"] == evidence_hash({"A": new_results})
+    assert [v["id"] for v in load_fact_check_versions(latest["id"])] == [latest["id"], fact_id]
+    assert load_stale_fact_checks(settings.FACT_CHECK_FRESHNESS_HOURS, settings.FACT_CHECK_NEWS_FRESHNESS_HOURS) == []
+
+def test_unsearched_time_sensitive_fact_checks_are_reverified():
+    news = store("What happened in the latest SpaceX launch?", age_hours=12, searched_assumptions=[], evidence_hash=evidence_hash({}))
+    store("The Eiffel Tower is in Paris", age_hours=48, searched_assumptions=[], evidence_hash=evidence_hash({}))
+    fact_checker = MagicMock()
+
+    assert refresher(fact_checker).run_once() == {UNCHANGED: 1, UPDATED: 1, "failed": 0}
+    fact_checker.search_tools.search.assert_not_called()
+    assert [c.args[0]["id"] for c in fact_checker.reverify.call_args_list] == [news]
@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import patch
+from src.resilience import AdaptiveLimiter, Backend, BackendError, CircuitBreaker, CircuitOpenError, TokenBucket, classify_error
+
+class RateLimited(Exception):
+    status_code = 429
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    with patch("src.resilience.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+def test_classify_error():
+    assert classify_error(RateLimited()) == "throttled"
+    assert classify_error(Exception("429 RESOURCE_EXHAUSTED: quota exceeded")) == "throttled"
+    assert classify_error(TimeoutError()) == "transient"
+    assert classify_error(ValueError("bad prompt")) == "fatal"
+
+def test_token_bucket_waits_when_empty(no_sleep):
+    bucket = TokenBucket(rate_per_second=2, capacity=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() > 0
+    assert no_sleep.call_count >= 1
+
+def test_adaptive_limiter_is_aimd():
+    limiter = AdaptiveLimiter(initial=4, maximum=8)
+    limiter.on_throttle()
+    assert limiter.limit == 2
+    for _ in range(10):
+        limiter.on_success()
+    assert 4 < limiter.limit <= 8
+
+def test_backend_retries_throttled_calls(no_sleep):
+    backend = Backend("test", requests_per_minute=6000, max_concurrency=8, max_attempts=3)
+    outcomes = [RateLimited(), RateLimited(), "ok"]
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert backend.call(flaky) == "ok"
+    metrics = backend.metrics()
+    assert metrics["retries"] == 2 and metrics["throttled"] == 2 and metrics["successes"] == 1
+    assert metrics["concurrency_limit"] == 2  # Halved twice from 4 to the minimum of 1, then grown by one.
+
+def test_backend_gives_up_and_does_not_retry_fatal_errors():
+    backend = Backend("test", requests_per_minute=6000, max_concurrency=2, max_attempts=2)
+    with pytest.raises(BackendError):
+        backend.call(lambda: (_ for _ in ()).throw(TimeoutError("read timed out")))
+    calls = []
+    def fatal():
+        calls.append(1)
+        raise ValueError("bad request")
+    with pytest.raises(ValueError):
+        backend.call(fatal)
+    assert len(calls) == 1
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    backend = Backend("test", requests_per_minute=6000, max_concurrency=2, max_attempts=1)
+    backend.breaker = breaker
+    for _ in range(2):
+        with pytest.raises(BackendError):
+            backend.call(lambda: (_ for _ in ()).throw(ConnectionError("connection reset")))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        backend.call(lambda: "never called")
+    assert backend.metrics()["rejected"] == 1
+
+    breaker._opened_at -= 60  # Let the reset timeout pass.
+    assert backend.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.retrieval import ResultPool, SharedSearch, canonicalize_url, result_cost
+
+def test_canonicalize_url_ignores_trivial_differences():
+    assert canonicalize_url("https://www.Example.com/page/?utm_source=x&b=2&a=1#top") == "example.com/page?a=1&b=2"
+    assert canonicalize_url("http://example.com/page?a=1&b=2&fbclid=abc") == "example.com/page?a=1&b=2"
+    assert canonicalize_url("https://example.com/other") != canonicalize_url("https://example.com/page")
+
+def test_result_pool_dedupes_across_queries():
+    pool = ResultPool({
+        "Paris is the capital of France": [
+            {"title": "Paris", "href": "https://en.wikipedia.org/wiki/Paris", "body": "Paris is the capital and largest city of France."},
+            {"title": "France", "href": "https://example.com/france", "body": "France is a country in Western Europe."},
+        ],
+        "The Eiffel Tower is in Paris": [
+            {"title": "Paris", "href": "http://www.en.wikipedia.org/wiki/Paris/", "body": "Paris is the capital of France."},
+            {"title": "Copy", "href": "https://mirror.example.net/paris", "body": "Paris is the capital and largest city of France!"},
+            {"title": "Eiffel Tower", "href": "https://example.com/eiffel", "body": "The Eiffel Tower is a landmark on the Champ de Mars in Paris."},
+        ],
+    })
+    assert [r["href"] for r in pool.results] == [
+        "https://en.wikipedia.org/wiki/Paris", "https://example.com/france", "https://example.com/eiffel"]
+
+def test_select_reranks_pool_within_budget():
+    results = [{"title": f"Page {i}", "href": f"https://example.com/{i}", "body": f"Unrelated filler text number {i}."} for i in range(5)]
+    results.append({"title": "Eiffel Tower", "href": "https://example.com/eiffel", "body": "The Eiffel Tower is in Paris."})
+    pool = ResultPool({"other query": results})
+
+    selected = pool.select("Where is the Eiffel Tower?", top_k=3)
+    assert selected[0]["href"] == "https://example.com/eiffel"
+    assert len(selected) == 1  # Filler results do not match the query at all.
+
+    # Nothing matches: fall back to the query's own results, capped by top_k and budget.
+    fallback = pool.select("other query", top_k=10, token_budget=result_cost(results[0]) * 2)
+    assert [r["href"] for r in fallback] == ["https://example.com/0", "https://example.com/1"]
+
+def test_shared_search_runs_each_query_once():
+    calls = []
+    def search(query):
+        calls.append(query)
+        return [{"title": query, "href": f"https://example.com/{len(calls)}", "body": f"About {query}."}]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        shared = SharedSearch(search, ["alpha", "beta", "alpha"], executor)
+        pool = shared.pool()
+    assert sorted(calls) == ["alpha", "beta"]
+    assert shared.pool() is pool and len(pool) == 2
+
+def test_shared_search_pools_around_a_failed_query():
+    def search(query):
+        if query == "beta":
+            raise RuntimeError("beta failed")
+        return [{"title": query, "href": "https://example.com/alpha", "body": "About alpha."}]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        shared = SharedSearch(search, ["alpha", "beta"], executor)
+        pool = shared.pool()
+    assert len(pool) == 1
+    assert shared.error("alpha") is None and str(shared.error("beta")) == "beta failed"
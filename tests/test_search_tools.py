@@ -9,7 +9,7 @@ def search_tools_instance():
 def test_search_tools_initialization(search_tools_instance):
     assert search_tools_instance is not None
     assert search_tools_instance.search_tool_name == "duckduckgo"
-    with pytest.raises(ValueError, match="Unsupported search tool: serpapi. Only 'duckduckgo' is supported in this configuration."):
+    with pytest.raises(ValueError, match="Unsupported search tool: serpapi. Choose one of: duckduckgo, local, fanout."):
         SearchTools(search_tool_name="serpapi")
 
 @patch('duckduckgo_search.DDGS.text')
@@ -42,7 +42,7 @@ def test_process_results():
     assert "Snippet: Snippet B" in processed_string
 
 @patch('src.search_tools.logging') # Mock logging to prevent actual log output during test
-@patch('src.search_tools.ChatGoogleGenerativeAI') # Mock LLM for summarization
+@patch('langchain_google_genai.ChatGoogleGenerativeAI') # Mock LLM for summarization
 def test_summarize_search_results(mock_llm, mock_logging):
     mock_llm_instance = MagicMock()
     mock_llm.return_value = mock_llm_instance
@@ -57,7 +57,7 @@ def test_summarize_search_results(mock_llm, mock_logging):
     mock_logging.info.assert_not_called() # Ensure no info logs for successful summary
 
 def test_search_cache(search_tools_instance):
-    with patch('src.search_tools.SearchTools._duckduckgo_search') as mock_duckduckgo_search:
+    with patch('src.search_tools.DuckDuckGoBackend.search') as mock_duckduckgo_search:
         mock_duckduckgo_search.return_value = [{"title": "Cached Result"}]
         
         # First call, should hit actual search
@@ -76,3 +76,154 @@ def test_search_cache(search_tools_instance):
         results3 = search_tools_instance.search("another query", num_results=1)
         mock_duckduckgo_search.assert_called_once_with("another query", 1)
         assert results3 == [{"title": "Cached Result"}]
+
+def test_concurrent_identical_searches_share_one_request(search_tools_instance):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    release = threading.Event()
+
+    def slow_search(query, num_results):
+        release.wait(5)
+        return [{"title": "Shared Result", "href": "http://link.com", "body": "Snippet"}]
+
+    with patch('src.search_tools.DuckDuckGoBackend.search', side_effect=slow_search) as mock_duckduckgo_search:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(search_tools_instance.search, query, 1) for query in ["popular query", "Popular  query", "popular query"]]
+            while len(search_tools_instance._searches_in_flight) == 0:
+                release.wait(0.01)
+            release.set()
+            results = [f.result() for f in futures]
+    assert mock_duckduckgo_search.call_count == 1
+    assert all(r == [{"title": "Shared Result", "href": "http://link.com", "body": "Snippet"}] for r in results)
+
+def test_search_cache_normalizes_keys_and_persists(search_tools_instance):
+    with patch('src.search_tools.DuckDuckGoBackend.search') as mock_duckduckgo_search:
+        mock_duckduckgo_search.return_value = [{"title": "Paris"}]
+        search_tools_instance.search("Paris is the capital of France fact check", num_results=10)
+
+        # A new instance (e.g. after a restart) shares the on-disk cache, and case/whitespace don't matter.
+        results = SearchTools().search("  paris is the CAPITAL of france   fact check", num_results=10)
+        mock_duckduckgo_search.assert_called_once()
+        assert results == [{"title": "Paris"}]
+
+def test_search_cache_ttl_and_eviction(tmp_path):
+    from src.cache import DiskCache
+    cache = DiskCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.set("a", [1], ttl=60)
+    cache.set("b", [2], ttl=60)
+    assert cache.get("a") == [1]
+    cache.set("c", [3], ttl=60)  # evicts "b", the least recently used entry
+    assert cache.get("b") is None
+    cache.set("d", [4], ttl=-1)  # already expired
+    assert cache.get("d") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 2}
+
+def test_cache_batches_maintenance_and_access_times(tmp_path):
+    from src.cache import DiskCache
+    cache = DiskCache(str(tmp_path / "cache.db"), max_entries=2, maintenance_interval=4)
+    conn = cache._connection()
+    assert "idx_cache_expires_at" in {row[1] for row in conn.execute("PRAGMA index_list(cache)")}
+    cache.set("a", [1], ttl=60)
+    cache.set("gone", [0], ttl=-1)
+    cache.set("b", [2], ttl=60)
+    accessed = conn.execute("SELECT last_access FROM cache WHERE key = 'a'").fetchone()[0]
+    assert cache.get("a") == [1]
+    # Neither the hit nor the writes so far touched anything else.
+    assert conn.execute("SELECT last_access FROM cache WHERE key = 'a'").fetchone()[0] == accessed
+    assert cache.stats()["entries"] == 3
+
+    cache.set("c", [3], ttl=60)  # the fourth write purges "gone" and evicts "b", the least recently used
+    assert sorted(key for (key,) in conn.execute("SELECT key FROM cache")) == ["a", "c"]
+
+def test_search_cache_ttl_depends_on_query(search_tools_instance):
+    assert search_tools_instance._cache_ttl("What happened in the latest SpaceX launch?") < search_tools_instance._cache_ttl("Paris is the capital of France")
+
+def test_extractive_summary_skips_llm(search_tools_instance):
+    search_tools_instance.llm_for_summary = MagicMock()
+    text = SearchTools().process_results([{"title": "Paris", "href": "http://a.com", "body": "Paris is the capital of France. It is large."}])
+    summary = search_tools_instance.summarize_search_results(text, query="capital of France")
+    assert "Paris is the capital of France." in summary
+    search_tools_instance.llm_for_summary.invoke.assert_not_called()
+
+PAGE_HTML = """<html><head><title>Platypus</title><script>var tracking = 1;</script></head>
+<body><nav><a href="/">Home</a> | <a href="/animals">Animals</a></nav>
+<article><h1>Platypus</h1><p>The platypus is a semiaquatic, egg-laying mammal endemic to eastern Australia.</p>
+<p>Together with the four species of echidna, it is one of the five extant species of monotremes.</p></article>
+<footer>Copyright notice and unrelated links</footer></body></html>"""
+
+@pytest.fixture
+def page_server():
+    """A local HTTP server standing in for result pages; records the requests it receives."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append((self.path, self.headers.get("If-None-Match")))
+            if self.path == "/large":
+                body = b"<p>" + b"x" * 5000 + b"</p>"
+            elif self.path == "/platypus":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = PAGE_HTML.encode("utf-8")
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", requests_seen
+    server.shutdown()
+    server.server_close()
+
+def test_page_fetcher_extracts_and_revalidates(page_server, tmp_path):
+    from src.cache import DiskCache
+    from src.search_tools import PageFetcher
+    base_url, requests_seen = page_server
+    fetcher = PageFetcher(DiskCache(str(tmp_path / "pages.db"), table="pages"), max_bytes=1000, fresh_seconds=0)
+
+    pages = fetcher.fetch_many([f"{base_url}/platypus", f"{base_url}/large", f"{base_url}/missing"])
+    text = pages[f"{base_url}/platypus"]
+    assert "egg-laying mammal" in text and "monotremes" in text
+    assert "tracking" not in text and "Home" not in text and "Copyright" not in text
+    assert pages[f"{base_url}/large"] is None  # Over the size cap.
+    assert pages[f"{base_url}/missing"] is None
+
+    # A stale cache entry is revalidated with its ETag and reused on 304.
+    assert fetcher.fetch(f"{base_url}/platypus") == text
+    assert requests_seen[-1] == ("/platypus", '"v1"')
+
+def test_fetch_pages_adds_content_to_top_results(page_server, search_tools_instance):
+    base_url, _ = page_server
+    results = [{"title": "Platypus", "href": f"{base_url}/platypus", "body": "Snippet"},
+               {"title": "Gone", "href": f"{base_url}/missing", "body": "Other snippet"}]
+    enriched = search_tools_instance.fetch_pages(results, top_n=2)
+    assert "egg-laying mammal" in enriched[0]["content"]
+    assert enriched[1] == results[1]
+    assert "Content: Platypus\nThe platypus is a semiaquatic" in search_tools_instance.process_results(enriched)
+
+@patch('duckduckgo_search.DDGS.text')
+def test_duckduckgo_search_raises_after_retries(mock_ddgs_text, search_tools_instance):
+    from duckduckgo_search.exceptions import RatelimitException
+    mock_ddgs_text.side_effect = RatelimitException("202 Ratelimit")
+    with patch('src.resilience.time.sleep'), pytest.raises(Exception, match="Ratelimit"):
+        search_tools_instance.search("rate limited query", num_results=2)
+    assert mock_ddgs_text.call_count == 4
+    # The failure is not cached as an empty result.
+    mock_ddgs_text.side_effect = None
+    mock_ddgs_text.return_value = [{"title": "Result", "href": "http://link.com", "body": "Snippet"}]
+    assert search_tools_instance.search("rate limited query", num_results=2)[0]["title"] == "Result"
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.claim_index import ClaimIndex
+from src.database import init_db, save_fact_check
+from src.fact_checker import FactCheckEvent, CLASSIFICATION, RESULT
+from src.service import FactCheckService
+from src.service_client import FactCheckClient, ServiceError
+
+class FakeFactChecker:
+    """Emits two events per claim; blocks until release is set when gated."""
+
+    def __init__(self, gated=False):
+        self.release = threading.Event()
+        if not gated:
+            self.release.set()
+
+    def iter_process_claim(self, claim, reuse_previous=True, persist=True, mode=None):
+        yield FactCheckEvent(CLASSIFICATION, {"claim_type": "Factual"})
+        self.release.wait(5)
+        if claim == "boom":
+            raise RuntimeError("LLM unavailable")
+        yield FactCheckEvent(RESULT, {"claim": claim, "final_answer": f"Verdict for {claim}"})
+
+class RunningService:
+    """Runs a FactCheckService on its own event loop thread."""
+
+    def __init__(self, fact_checker, **kwargs):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.service = FactCheckService(fact_checker, **kwargs)
+        port = self.run(self.service.start("127.0.0.1", 0))
+        self.client = FactCheckClient(f"http://127.0.0.1:{port}")
+
+    def run(self, coro, timeout=10):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self, drain_timeout=5):
+        if self.service.accepting:
+            self.run(self.service.shutdown(drain_timeout))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+@pytest.fixture
+def running():
+    init_db()
+    services = []
+
+    def start(fact_checker=None, **kwargs):
+        services.append(RunningService(fact_checker or FakeFactChecker(), **kwargs))
+        return services[-1]
+
+    yield start
+    for service in services:
+        service.stop()
+
+def test_submit_and_stream_result(running):
+    client = running(workers=2).client
+    events = list(client.iter_process_claim("The sky is blue"))
+    assert [e.stage for e in events] == [CLASSIFICATION, RESULT]
+    assert events[-1].data["final_answer"] == "Verdict for The sky is blue"
+
+    job_id = client.submit("Water is wet")
+    assert client.process_claim("Water is wet")["claim"] == "Water is wet"
+    assert [e.stage for e in client.iter_events(job_id)] == [CLASSIFICATION, RESULT]
+    assert client.get_job(job_id)["status"] == "done"
+
+def test_failed_job_raises(running):
+    client = running().client
+    with pytest.raises(ServiceError, match="LLM unavailable"):
+        client.process_claim("boom")
+
+def test_rejects_with_429_when_queue_is_full(running):
+    checker = FakeFactChecker(gated=True)
+    client = running(checker, workers=1, queue_size=1).client
+    client.submit("running")
+    # Let the worker take the first job off the queue before filling it.
+    while client.get_job(client.submit("queued"))["status"] != "queued":
+        time.sleep(0.01)
+    with pytest.raises(ServiceError) as excinfo:
+        client.submit("rejected")
+    assert excinfo.value.status == 429
+    checker.release.set()
+
+def test_shutdown_drains_in_flight_jobs(running):
+    checker = FakeFactChecker(gated=True)
+    service = running(checker, workers=1)
+    job_ids = [service.client.submit(f"claim {i}") for i in range(3)]
+    shutdown = asyncio.run_coroutine_threadsafe(service.service.shutdown(5), service.loop)
+    while service.service.accepting:
+        time.sleep(0.01)
+    with pytest.raises(ServiceError) as excinfo:
+        service.client.submit("too late")
+    assert excinfo.value.status == 503
+    checker.release.set()
+    shutdown.result(10)
+    assert [service.service.jobs[job_id].status for job_id in job_ids] == ["done"] * 3
+
+def test_shutdown_abandons_jobs_that_outlive_the_drain_timeout(running):
+    checker = FakeFactChecker(gated=True)
+    service = running(checker, workers=1)
+    job_ids = [service.client.submit(f"claim {i}") for i in range(2)]
+    while service.service.jobs[job_ids[0]].status != "running":
+        time.sleep(0.01)
+    started = time.monotonic()
+    service.run(service.service.shutdown(0.2))
+    assert time.monotonic() - started < 2
+    assert [service.service.jobs[job_id].status for job_id in job_ids] == ["failed"] * 2
+    checker.release.set()
+
+def test_history_routes(running):
+    client = running().client
+    fact_id = save_fact_check({"claim": "The moon orbits the Earth", "claim_type": "Factual", "initial_response": "",
+                               "assumptions": [], "assumptions_verdicts": [], "gathered_evidence": [],
+                               "final_answer": "True."}).result()
+    rows, _ = client.load_history_page(limit=5)
+    assert [row["id"] for row in rows] == [fact_id]
+    assert client.load_fact_check(fact_id)["final_answer"] == "True."
+    assert client.load_fact_check(fact_id + 1) is None
+    assert [row["id"] for row in client.search_fact_checks("moon")] == [fact_id]
+    client.clear_fact_checks()
+    assert client.load_history_page()[0] == []
+
+def test_non_numeric_parameters_are_bad_requests(running):
+    client = running().client
+    for path in ["/history?before_id=abc", "/history?limit=ten", "/history/abc"]:
+        with pytest.raises(ServiceError) as excinfo:
+            client._request("GET", path)
+        assert excinfo.value.status == 400, path
+
+def test_clearing_history_clears_the_claim_index(running):
+    checker = FakeFactChecker()
+    checker.claim_index = ClaimIndex(threshold=0.5)
+    checker.claim_index.add(1, "The moon orbits the Earth")
+    running(checker).client.clear_fact_checks()
+    assert checker.claim_index.query("The moon orbits the Earth") is None
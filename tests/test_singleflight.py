@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    joined = threading.Semaphore(0)
+    begin = flight.begin
+
+    def counting_begin(key):
+        call = begin(key)
+        joined.release()
+        return call
+
+    flight.begin = counting_begin
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"answer": [42]}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, "key", compute)
+        started.wait(5)
+        followers = [executor.submit(flight.do, "key", compute) for _ in range(3)]
+        for _ in range(4):
+            assert joined.acquire(timeout=5)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True, True]
+    assert all(result == {"answer": [42]} for result, _ in results)
+    # Waiters get their own copy.
+    assert results[1][0] is not results[0][0]
+    assert len(flight) == 0
+
+def test_errors_propagate_to_waiters_and_are_not_kept():
+    flight = SingleFlight()
+    future, leader = flight.begin("key")
+    waiter_future, waiter_leader = flight.begin("key")
+    assert leader and not waiter_leader and waiter_future is future
+    flight.fail("key", future, ValueError("search failed"))
+    with pytest.raises(ValueError, match="search failed"):
+        flight.wait(waiter_future)
+    # The next call runs again rather than reusing the failure.
+    assert flight.do("key", lambda: "fresh") == ("fresh", False)
+
+def test_interrupted_leader_fails_waiters_with_runtime_error():
+    flight = SingleFlight()
+    future, _ = flight.begin("key")
+    flight.fail("key", future, GeneratorExit())
+    with pytest.raises(RuntimeError, match="interrupted"):
+        flight.wait(future)
@@ -0,0 +1,29 @@
+from src.text_ranking import BM25, extractive_summary, split_sentences, tokenize
+
+SEARCH_TEXT = """Result 1:
+Title: Monotremes - Wikipedia
+Link: http://example.com/monotremes
+Snippet: Monotremes are mammals that lay eggs. The platypus and echidnas are the only living monotremes.
+
+Result 2:
+Title: Bird eggs
+Link: http://example.com/birds
+Snippet: The ostrich lays the largest eggs of any living bird. Ostrich eggs weigh about 1.4 kg.
+"""
+
+def test_bm25_prefers_documents_with_rare_query_terms():
+    docs = [tokenize("the platypus lays eggs"), tokenize("birds lay eggs"), tokenize("cats purr")]
+    scores = BM25(docs).scores(tokenize("platypus eggs"))
+    assert scores[0] > scores[1] > scores[2] == 0.0
+
+def test_split_sentences_drops_result_metadata():
+    sentences = split_sentences(SEARCH_TEXT)
+    assert "Monotremes are mammals that lay eggs." in sentences
+    assert not any(s.startswith(("Result", "Link", "Snippet")) for s in sentences)
+
+def test_extractive_summary_keeps_relevant_sentences_within_budget():
+    summary = extractive_summary(SEARCH_TEXT, "Are platypus monotremes?", token_budget=30)
+    assert summary.startswith("- ")
+    assert "platypus" in summary
+    assert "ostrich" not in summary.lower()
+    assert extractive_summary(SEARCH_TEXT, "quantum chromodynamics") == ""
@@ -0,0 +1,49 @@
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from src.tracing import METRICS, annotate, bind, render_prometheus, span, start_metrics_server, start_trace, write_prometheus
+
+def test_spans_nest_across_threads():
+    with start_trace() as trace:
+        with span("verification"):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                def work(index):
+                    with span("verify_assumption", index=index):
+                        annotate(input_tokens=10, output_tokens=2)
+                list(executor.map(lambda f: f.result(), [executor.submit(bind(work), i) for i in range(2)]))
+            annotate(reused_verdicts=1)
+
+    spans = trace.to_list()
+    parent = spans[0]
+    assert parent["name"] == "verification" and parent["parent"] is None
+    assert parent["attributes"] == {"reused_verdicts": 1}
+    children = [s for s in spans if s["name"] == "verify_assumption"]
+    assert sorted(s["attributes"]["index"] for s in children) == [0, 1]
+    assert all(s["parent"] == parent["id"] for s in children)
+    assert trace.totals()["input_tokens"] == 20
+
+def test_prometheus_export(tmp_path):
+    METRICS.clear()
+    with span("classification"):
+        annotate(llm_cache_hits=1)
+    text = render_prometheus()
+    assert 'factchecker_stage_duration_seconds_count{stage="classification"} 1' in text
+    assert 'factchecker_stage_duration_seconds_bucket{stage="classification",le="+Inf"} 1' in text
+    assert 'factchecker_llm_cache_hits_total{stage="classification"} 1' in text
+
+    path = tmp_path / "metrics.prom"
+    write_prometheus(str(path))
+    assert path.read_text() == text
+
+    server = start_metrics_server(0)
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+        assert b"factchecker_stage_duration_seconds" in response.read()
+
+def test_stage_summary_rolls_up_tokens():
+    from src.tracing import stage_summary
+    spans = [
+        {"id": 1, "name": "process_claim", "parent": None, "duration_ms": 30.0, "attributes": {}},
+        {"id": 2, "name": "classification", "parent": 1, "duration_ms": 10.0, "attributes": {"input_tokens": 5, "output_tokens": 1}},
+        {"id": 3, "name": "verification", "parent": 1, "duration_ms": 20.0, "attributes": {}},
+        {"id": 4, "name": "verdict", "parent": 3, "duration_ms": 15.0, "attributes": {"input_tokens": 7, "output_tokens": 2}},
+    ]
+    assert stage_summary(spans) == [("classification", 10.0, 6), ("verification", 20.0, 9)]